@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from openai import OpenAI
+
+from benchmarks.mock_openai import MockOpenAIServer
+from utilities.engine import RequestEngine
+
+MESSAGES = [
+    {"role": "system", "content": "You are a benchmark."},
+    {"role": "user", "content": "Say ok."},
+]
+
+
+def bench_threaded(base_url: str, requests: int, workers: int) -> float:
+    """Issue requests through one synchronous OpenAI client from a thread pool, mirroring the pre-engine ThreadPoolExecutor path, and return requests per second.
+
+    Args:
+            base_url (str): The mock server base URL.
+            requests (int): The total number of completions to request.
+            workers (int): The number of threads in the pool.
+
+    Returns:
+            float: The measured throughput in requests per second.
+    """
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+
+    def call(_: int) -> None:
+        client.chat.completions.create(model="mock", messages=MESSAGES)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(call, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def bench_engine(base_url: str, requests: int, connections: int) -> float:
+    """Issue requests as concurrent coroutines on a RequestEngine with the given pool size and return requests per second.
+
+    Args:
+            base_url (str): The mock server base URL.
+            requests (int): The total number of completions to request.
+            connections (int): The connection pool size of the engine.
+
+    Returns:
+            float: The measured throughput in requests per second.
+    """
+    engine = RequestEngine(connections, api_key="mock", base_url=base_url)
+
+    async def call_all() -> None:
+        await asyncio.gather(
+            *[
+                engine.client.chat.completions.create(model="mock", messages=MESSAGES)
+                for _ in range(requests)
+            ]
+        )
+
+    try:
+        start = time.perf_counter()
+        engine.run(call_all())
+        return requests / (time.perf_counter() - start)
+    finally:
+        engine.close()
+
+
+def run(args: List[str]) -> None:
+    """Compare completion throughput of the threaded client path against the async request engine using a local mock endpoint.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="engine")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--connections", type=int, default=100)
+    options = parser.parse_args(args)
+    with MockOpenAIServer(latency=options.latency) as server:
+        threaded = bench_threaded(server.base_url, options.requests, options.workers)
+        engine = bench_engine(server.base_url, options.requests, options.connections)
+    print(f"threaded ({options.workers} threads): {threaded:.1f} req/s")
+    print(f"engine ({options.connections} connections): {engine:.1f} req/s")
+    print(f"speedup: {engine / threaded:.1f}x")
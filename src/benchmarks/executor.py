@@ -0,0 +1,59 @@
+import argparse
+import copy
+import time
+from typing import List
+
+import settings
+from commands import command_replace_file
+from commands.command_replace_file import ReplaceFile
+from commands.command_think import Think
+from commands.executor import execute_commands
+from commands.state import State
+
+
+def time_edits(files: int, latency: float, max_parallel_commands: int) -> float:
+    """Execute one response's Think and ReplaceFile calls, one edit per file, with modify_file taking a fixed latency in place of its two GPT round trips.
+
+    Args:
+            files (int): The number of files edited.
+            latency (float): The seconds each modify_file call takes.
+            max_parallel_commands (int): The executor's concurrency limit.
+
+    Returns:
+            float: The seconds the tool calls took.
+    """
+    instance = copy.copy(settings.get_settings())
+    instance.max_parallel_commands = max_parallel_commands
+    token = settings.bind_task_settings(instance)
+    names = [f"src/module{i}.py" for i in range(files)]
+    state = State({name: f"value = {i}\n" for i, name in enumerate(names)})
+    commands = [Think("Edit every module", "")]
+    commands += [ReplaceFile(name, "Increment the value") for name in names]
+    start = time.perf_counter()
+    try:
+        execute_commands(state, commands)
+    finally:
+        settings.reset_task_settings(token)
+    return time.perf_counter() - start
+
+
+def run(args: List[str]) -> None:
+    """Compare sequential and concurrent execution of several ReplaceFile calls returned in one tool call response.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="executor")
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    options = parser.parse_args(args)
+
+    def modify_file(original_file, instructions, context="", file_name=None) -> str:
+        time.sleep(options.latency)
+        return original_file + "value += 1\n"
+
+    command_replace_file.modify_file = modify_file
+    print(f"{options.files} ReplaceFile calls, {options.latency:.2f} s per modify_file")
+    for label, workers in (("sequential", 1), ("concurrent", options.files)):
+        elapsed = time_edits(options.files, options.latency, workers)
+        print(f"{label:>10}: {elapsed:6.2f} s")
@@ -0,0 +1,85 @@
+import argparse
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, List
+
+from black import FileMode, format_str
+from utilities.formatter import FormattingService
+
+
+def make_edits(rng: random.Random, lines: int, edits: int) -> List[str]:
+    """Build successive versions of a module as a ReplaceFile loop produces them, each changing one function and arriving unformatted.
+
+    Args:
+            rng (random.Random): The source of values.
+            lines (int): The approximate line count of the module.
+            edits (int): The number of versions.
+
+    Returns:
+            List[str]: The versions, in order.
+    """
+    functions = [
+        f"def function_{i}(value):\n    return value * {rng.randint(0, 1000)}\n"
+        for i in range(lines // 3)
+    ]
+    versions = []
+    for _ in range(edits):
+        i = rng.randrange(len(functions))
+        functions[i] = f"def function_{i}( value ):\n  return {{'v':value*{i}}}\n"
+        versions.append("\n\n".join(functions))
+    return versions
+
+
+def time_session(versions: List[str], format: Callable[[str], str]) -> float:
+    """Format each version the way an edit is formatted today: once after the edit, again when the edit is retried, and once more when the formatted file is written back.
+
+    Args:
+            versions (List[str]): The module versions.
+            format (Callable[[str], str]): The formatting function.
+
+    Returns:
+            float: The seconds spent formatting, per edit.
+    """
+    start = time.perf_counter()
+    for version in versions:
+        formatted = format(version)
+        format(version)
+        format(formatted)
+    return (time.perf_counter() - start) / len(versions)
+
+
+def run(args: List[str]) -> None:
+    """Compare per-edit formatting time of calling black directly with the cached formatting service, in process and in a worker process.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="formatter")
+    parser.add_argument("--lines", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--edits", type=int, default=10)
+    options = parser.parse_args(args)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import black"], check=True)
+    print(f"Starting a process that imports black: {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    worker = FormattingService(max_bytes=64 * 1024 * 1024, worker=True)
+    print(f"Starting the formatting worker: {time.perf_counter() - start:.2f} s, once")
+    try:
+        for lines in options.lines:
+            versions = make_edits(random.Random(0), lines, options.edits)
+            legacy = time_session(
+                versions, lambda code: format_str(code, mode=FileMode())
+            )
+            cached = time_session(
+                versions, FormattingService(max_bytes=64 * 1024 * 1024).format
+            )
+            in_worker = time_session(versions, worker.format)
+            print(
+                f"{lines:>5} lines: black {legacy * 1000:7.1f} ms/edit, "
+                f"cached {cached * 1000:7.1f} ms/edit, "
+                f"cached in worker {in_worker * 1000:7.1f} ms/edit"
+            )
+    finally:
+        worker.close()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import time
+from typing import Dict, List
+
+from tools.imports import dependency_graph, imports
+
+SYSTEM_IMPORTS = """
+Extract any imports from the following source code, returning only the lines that import other files.
+"""
+
+
+def llm_imports(source_code: str) -> str:
+    """The GPT-3.5 import extraction that tools.imports.imports replaced, kept here as the baseline.
+
+    Args:
+            source_code (str): The Python source.
+
+    Returns:
+            str: The model's answer.
+    """
+    from gpt import gpt_query, GPT_3_5
+
+    return gpt_query(source_code, system=SYSTEM_IMPORTS, model=GPT_3_5)
+
+
+def import_lines(text: str) -> set:
+    """Normalize extracted imports to a set of stripped lines, so answers differing only in order, fences or blank lines compare equal.
+
+    Args:
+            text (str): Extracted import statements.
+
+    Returns:
+            set: The lines starting with import or from.
+    """
+    lines = {line.strip() for line in text.splitlines()}
+    return {line for line in lines if line.startswith(("import ", "from "))}
+
+
+def read_sources(directory: str) -> Dict[str, str]:
+    """Read every Python file under a directory.
+
+    Args:
+            directory (str): The directory to walk.
+
+    Returns:
+            Dict[str, str]: The file contents keyed by path relative to the directory's parent.
+    """
+    sources = {}
+    root = os.path.dirname(os.path.abspath(directory))
+    for path, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(".py"):
+                full_path = os.path.join(path, name)
+                with open(full_path, "r") as file:
+                    sources[os.path.relpath(full_path, root)] = file.read()
+    return sources
+
+
+def run(args: List[str]) -> None:
+    """Report the time the AST extractor takes per file and for the whole dependency graph, and with --llm the latency of the GPT-3.5 extractor and how often the two agree.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="imports")
+    parser.add_argument("--directory", type=str, default="src")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--llm",
+        type=int,
+        default=0,
+        help="The number of files to also send to GPT-3.5",
+    )
+    options = parser.parse_args(args)
+    sources = read_sources(options.directory)
+    start = time.perf_counter()
+    for _ in range(options.repeat):
+        extracted = {file: imports(source) for file, source in sources.items()}
+    elapsed = (time.perf_counter() - start) / options.repeat
+    print(
+        f"AST: {len(sources)} files in {elapsed * 1000:.1f} ms, "
+        f"{elapsed / len(sources) * 1e6:.0f} us/file"
+    )
+    start = time.perf_counter()
+    graph = dependency_graph(sources)
+    edges = sum(len(dependencies) for dependencies in graph.values())
+    print(
+        f"Dependency graph: {edges} edges in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    if not options.llm:
+        return
+    files = sorted(sources, key=lambda file: -len(sources[file]))[: options.llm]
+    agreed, latency = 0, 0.0
+    for file in files:
+        start = time.perf_counter()
+        answer = llm_imports(sources[file])
+        latency += time.perf_counter() - start
+        same = import_lines(answer) == import_lines(extracted[file])
+        agreed += same
+        if not same:
+            print(f"  {file}: LLM and AST disagree")
+    print(
+        f"GPT-3.5: {latency / len(files) * 1000:.0f} ms/file, "
+        f"agrees with AST on {agreed}/{len(files)} files"
+    )
@@ -0,0 +1,63 @@
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.quantize import clustered_vectors
+from utilities.ivf import IVFVectorStore
+from utilities.minicos import VectorStore
+
+
+def run(args: List[str]) -> None:
+    """Report build time, queries per second and recall@k of IVFVectorStore at several n_probe settings against exact VectorStore search.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="ivf")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 16, 64])
+    options = parser.parse_args(args)
+    rng = np.random.default_rng(0)
+    for size in options.sizes:
+        keys = clustered_vectors(rng, size, options.dimensions, options.clusters)
+        queries = keys[rng.integers(0, size, options.queries)]
+        queries = queries + rng.standard_normal(queries.shape, np.float32)
+        values = [str(i) for i in range(size)]
+        exact = VectorStore()
+        exact.add_entries(keys, values)
+        start = time.perf_counter()
+        expected = exact.search_many(queries, options.top)
+        exact_qps = options.queries / (time.perf_counter() - start)
+        ann = IVFVectorStore(n_lists=options.lists)
+        ann.add_entries(keys, values)
+        del keys
+        start = time.perf_counter()
+        ann.train()
+        build = time.perf_counter() - start
+        print(
+            f"{size} x {options.dimensions}: exact {exact_qps:.0f} QPS; "
+            f"IVF {len(ann.centroids)} lists built in {build:.1f}s"
+        )
+        del exact
+        for n_probe in options.probes:
+            ann.n_probe = n_probe
+            start = time.perf_counter()
+            results = ann.search_many(queries, options.top)
+            qps = options.queries / (time.perf_counter() - start)
+            recall = np.mean(
+                [
+                    len(set(found) & set(wanted)) / options.top
+                    for found, wanted in zip(results, expected)
+                ]
+            )
+            print(
+                f"  n_probe {n_probe:>3}: {qps:7.0f} QPS, recall@{options.top} {recall:.3f}"
+            )
+        del ann
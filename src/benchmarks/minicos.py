@@ -0,0 +1,81 @@
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from utilities.minicos import VectorStore, cosine_similarity
+
+
+class LegacyVectorStore:
+    """
+    The list-of-entries store that VectorStore replaced, kept here as the baseline: every search loops over entries in Python and fully sorts the similarities.
+    """
+
+    def __init__(self) -> None:
+        self.entries = []
+
+    def add_entry(self, key: np.ndarray, value: str) -> None:
+        self.entries.append((key, value))
+
+    def search(self, vec: np.ndarray, n: int) -> List[str]:
+        similarities = [
+            (value, cosine_similarity(vec, key)) for key, value in self.entries
+        ]
+        similarities.sort(key=lambda x: x[1], reverse=True)
+        return [similarity[0] for similarity in similarities[:n]]
+
+
+def time_searches(store, queries: np.ndarray, n: int) -> float:
+    """Return the mean seconds per query of running each query through store.search.
+
+    Args:
+            store: A VectorStore or LegacyVectorStore.
+            queries (np.ndarray): One query vector per row.
+            n (int): The number of results requested per query.
+
+    Returns:
+            float: Mean seconds per query.
+    """
+    start = time.perf_counter()
+    for query in queries:
+        store.search(query, n)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(args: List[str]) -> None:
+    """Compare per-query search latency of the legacy store with the matrix-backed VectorStore, single and batched, at several store sizes.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="minicos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10)
+    options = parser.parse_args(args)
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((options.queries, options.dimensions), np.float32)
+    for size in options.sizes:
+        keys = rng.standard_normal((size, options.dimensions), np.float32)
+        values = [str(i) for i in range(size)]
+        legacy = LegacyVectorStore()
+        for key, value in zip(keys, values):
+            legacy.add_entry(key, value)
+        store = VectorStore()
+        store.add_entries(keys, values)
+        assert legacy.search(queries[0], options.top) == store.search(
+            queries[0], options.top
+        )
+        legacy_time = time_searches(legacy, queries[:3], options.top)
+        single_time = time_searches(store, queries, options.top)
+        start = time.perf_counter()
+        store.search_many(queries, options.top)
+        batch_time = (time.perf_counter() - start) / len(queries)
+        print(
+            f"{size} x {options.dimensions}: legacy {legacy_time * 1000:.2f} ms, "
+            f"search {single_time * 1000:.2f} ms ({legacy_time / single_time:.0f}x), "
+            f"search_many {batch_time * 1000:.2f} ms/query ({legacy_time / batch_time:.0f}x)"
+        )
+        del legacy, store, keys
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Optional, Set
+
+
+class MockOpenAIServer:
+    """
+    A local stand-in for the OpenAI HTTP API that answers chat completion and embedding requests after a fixed delay, used to benchmark request paths without spending tokens.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        port: int = 0,
+        reply: str = "ok",
+        token_delay: float = 0.0,
+    ) -> None:
+        """Prepare the server without starting it; it listens on its own event loop thread while used as a context manager.
+
+        Args:
+                latency (float): Seconds each request waits before responding, standing in for model latency.
+                port (int): The port to listen on, where 0 picks a free port.
+                reply (str): The assistant message content returned by chat completions.
+                token_delay (float): Seconds between streamed chunks when a request asks for stream=True.
+        """
+        self.latency = latency
+        self.reply = reply
+        self.token_delay = token_delay
+        self.port = port
+        self.requests = 0
+        self.loop = asyncio.new_event_loop()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.writers: Set[asyncio.StreamWriter] = set()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The OpenAI style base URL clients should be pointed at.
+
+        Returns:
+                str: The base URL of the running server.
+        """
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def respond(self, path: str, request: dict) -> dict:
+        """Build the JSON body answering a request to the given API path.
+
+        Args:
+                path (str): The request path, e.g. /v1/chat/completions.
+                request (dict): The decoded JSON request body.
+
+        Returns:
+                dict: The JSON response body.
+        """
+        if path.endswith("/embeddings"):
+            inputs = request.get("input", "")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            return {
+                "object": "list",
+                "model": request.get("model", "mock"),
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [0.0] * 8}
+                    for i in range(len(inputs))
+                ],
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+        }
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                path = request_line.decode("latin-1").split(" ")[1]
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                body = await reader.readexactly(length) if length else b"{}"
+                request = json.loads(body)
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                if request.get("stream"):
+                    await self._stream(request, writer)
+                    continue
+                payload = json.dumps(self.respond(path, request)).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def _stream(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        pieces = [self.reply[i : i + 4] for i in range(0, len(self.reply), 4)]
+        for index, piece in enumerate(pieces + [None]):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": piece} if piece is not None else {},
+                        "finish_reason": None if piece is not None else "stop",
+                    }
+                ],
+            }
+            self._write_chunk(writer, f"data: {json.dumps(chunk)}\n\n".encode())
+            await writer.drain()
+            if piece is not None and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def __enter__(self) -> "MockOpenAIServer":
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", self.port, backlog=1024)
+        )
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        async def shutdown() -> None:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            handlers = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            await asyncio.gather(*handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
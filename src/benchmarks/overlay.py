@@ -0,0 +1,138 @@
+import argparse
+import copy
+import multiprocessing
+import os
+import random
+import string
+import tempfile
+from typing import Dict, List
+
+from commands.state import State
+from tools.move_file import move_file
+from utils import read_file, synchronize_files_read
+
+
+class LegacyState:
+    """The State file handling before the copy-on-write overlay, deep copying the file map for files and original_files."""
+
+    def __init__(self, files_dict: Dict[str, str], target_dir: str = None):
+        self.files = copy.deepcopy(files_dict)
+        self.original_files = copy.deepcopy(files_dict)
+        self.target_dir = target_dir
+
+
+def legacy_synchronize_files_read(target_dir: str, updated_files: dict) -> None:
+    """Re-read every tracked file from disk into the file map, as synchronize_files_read did before it skipped unchanged files.
+
+    Args:
+            target_dir (str): The directory the files live in.
+            updated_files (dict): The file map to refresh.
+    """
+    for file in list(updated_files):
+        updated_files[file] = read_file(os.path.join(target_dir, file))
+
+
+def legacy_move_file(files: dict, old_path: str, new_path: str) -> dict:
+    """Move a file the way move_file did before, deep copying the whole map first.
+
+    Args:
+            files (dict): The file map.
+            old_path (str): The file to move.
+            new_path (str): Its new path.
+
+    Returns:
+            dict: The new file map.
+    """
+    files = copy.deepcopy(files)
+    files[new_path] = files.pop(old_path)
+    return files
+
+
+def write_repository(directory: str, files: int, size: int) -> None:
+    """Write a synthetic repository of random text files.
+
+    Args:
+            directory (str): The directory to fill.
+            files (int): The number of files.
+            size (int): The size of each file in characters.
+    """
+    rng = random.Random(0)
+    line = "".join(rng.choice(string.ascii_letters) for _ in range(79)) + "\n"
+    for i in range(files):
+        path = os.path.join(directory, "src", f"package{i % 50}", f"module{i}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(f"# module {i}\n" + line * (size // 80))
+
+
+def rss_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_issues(directory: str, issues: int, legacy: bool, results) -> None:
+    """Replay the file handling of concurrent issues: load the repository, create a generation State, edit files, sync after a terminal command, move a file and create a check State.
+
+    Args:
+            directory (str): The synthetic repository.
+            issues (int): The number of issues held in memory at once.
+            legacy (bool): Whether to use the deep copying file handling.
+            results: A queue receiving the starting and peak RSS in KB.
+    """
+    start = rss_kb("VmRSS")
+    names = sorted(
+        os.path.relpath(os.path.join(path, name), directory)
+        for path, _, file_names in os.walk(directory)
+        for name in file_names
+    )
+    held: List[object] = []
+    for issue in range(issues):
+        files = {name: read_file(os.path.join(directory, name)) for name in names}
+        state = LegacyState(files, directory) if legacy else State(files, directory)
+        for name in names[issue : issue + 5]:
+            state.files[name] = state.files[name] + "# edited\n"
+        if legacy:
+            legacy_synchronize_files_read(directory, state.files)
+            state.files = legacy_move_file(state.files, names[-1], "moved.py")
+            check = LegacyState(state.files, directory)
+        else:
+            synchronize_files_read(directory, state.original_files, state.files)
+            state.files = move_file(state.files, names[-1], "moved.py", [])
+            check = State(state.files, directory)
+        held.append((files, state, check))
+    results.put((start, rss_kb("VmHWM")))
+
+
+def run(args: List[str]) -> None:
+    """Report the peak RSS added by the file maps of concurrent issues with the deep copying and the copy-on-write State.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="overlay")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=8000)
+    parser.add_argument("--issues", type=int, default=10)
+    options = parser.parse_args(args)
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as directory:
+        write_repository(directory, options.files, options.size)
+        repository_mb = options.files * options.size / 2**20
+        print(
+            f"{options.files} files, {repository_mb:.0f} MB repository, "
+            f"{options.issues} issues"
+        )
+        for legacy in (True, False):
+            results = context.Queue()
+            process = context.Process(
+                target=run_issues,
+                args=(directory, options.issues, legacy, results),
+            )
+            process.start()
+            start, peak = results.get()
+            process.join()
+            label = "deepcopy" if legacy else "overlay"
+            print(f"{label:>8}: peak RSS +{(peak - start) / 1024:.0f} MB")
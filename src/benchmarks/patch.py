@@ -0,0 +1,114 @@
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from tools.patch import apply_edits, parse_edits
+from utilities.rate_limit import estimate_tokens
+from utils import replace_spaces_with_tabs
+
+THINKING_TOKENS = 250
+"""The typical size of the plan modify_file asks for before regenerating a file in full mode."""
+
+
+def make_file(rng: random.Random, lines: int) -> str:
+    """Build a Python module of roughly the given number of lines, made of small functions.
+
+    Args:
+            rng (random.Random): The source of names and values.
+            lines (int): The approximate line count.
+
+    Returns:
+            str: The module.
+    """
+    functions = []
+    for i in range(lines // 5):
+        value = rng.randint(0, 1000)
+        functions.append(
+            f"def function_{i}(value):\n"
+            f"    result = value * {value}\n"
+            f"    return result + {i}\n\n"
+        )
+    return "\n".join(functions)
+
+
+def make_edit(rng: random.Random, content: str) -> Tuple[str, str]:
+    """Change one function the way a typical ReplaceFile instruction would, returning the edited file and the SEARCH/REPLACE response that makes the change, as the model writes it with tabs.
+
+    Args:
+            rng (random.Random): Chooses the function.
+            content (str): The file.
+
+    Returns:
+            Tuple[str, str]: The edited file and the response.
+    """
+    index = rng.randrange(content.count("def function_"))
+    start = content.index(f"def function_{index}(")
+    end = content.index("\n\n", start)
+    original = content[start:end]
+    updated = original.replace("return result", "return abs(result)")
+    updated = updated.replace("(value):", "(value: int) -> int:")
+    response = (
+        "<<<<<<< SEARCH\n"
+        f"{replace_spaces_with_tabs(original)}\n"
+        "=======\n"
+        f"{replace_spaces_with_tabs(updated)}\n"
+        ">>>>>>> REPLACE"
+    )
+    return content[:start] + updated + content[end:], response
+
+
+def run(args: List[str]) -> None:
+    """Compare output tokens and modelled wall time per edit of full file regeneration and SEARCH/REPLACE edits on files of several sizes, timing the local application of the edits.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="patch")
+    parser.add_argument("--lines", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=40.0,
+        help="Output speed of the model, used to turn output tokens into generation time",
+    )
+    parser.add_argument(
+        "--round-trip",
+        type=float,
+        default=1.0,
+        help="Seconds each query takes before its first token",
+    )
+    options = parser.parse_args(args)
+    rng = random.Random(0)
+    print(
+        f"{options.edits} edits per size, {options.tokens_per_second:.0f} tokens/s, "
+        f"{options.round_trip:.1f} s per query"
+    )
+    for lines in options.lines:
+        content = make_file(rng, lines)
+        full_tokens, edit_tokens, apply_seconds = 0, 0, 0.0
+        for _ in range(options.edits):
+            expected, response = make_edit(rng, content)
+            full_tokens += THINKING_TOKENS + estimate_tokens(
+                replace_spaces_with_tabs(expected)
+            )
+            edit_tokens += estimate_tokens(response)
+            start = time.perf_counter()
+            edited = apply_edits(content, parse_edits(response))
+            apply_seconds += time.perf_counter() - start
+            assert edited == expected
+        full_time = (
+            2 * options.round_trip
+            + full_tokens / options.edits / options.tokens_per_second
+        )
+        edit_time = (
+            options.round_trip
+            + edit_tokens / options.edits / options.tokens_per_second
+            + apply_seconds / options.edits
+        )
+        print(
+            f"{lines:>5} lines: full {full_tokens // options.edits:6d} tokens "
+            f"{full_time:6.1f} s, edits {edit_tokens // options.edits:4d} tokens "
+            f"{edit_time:5.1f} s (applied in {apply_seconds / options.edits * 1000:.2f} ms)"
+        )
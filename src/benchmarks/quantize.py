@@ -0,0 +1,85 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from utilities.minicos import VectorStore
+
+MODES = [
+    ("float32", False),
+    ("float16", False),
+    ("float16", True),
+    ("int8", False),
+    ("int8", True),
+]
+
+
+def clustered_vectors(
+    rng: np.random.Generator, rows: int, dimensions: int, clusters: int
+) -> np.ndarray:
+    """Generate vectors scattered around random cluster centres, which resemble embedding neighbourhoods more than isotropic noise does.
+
+    Args:
+            rng (np.random.Generator): The random generator.
+            rows (int): The number of vectors.
+            dimensions (int): The length of each vector.
+            clusters (int): The number of cluster centres.
+
+    Returns:
+            np.ndarray: A float32 matrix with one vector per row.
+    """
+    centres = rng.standard_normal((clusters, dimensions), np.float32)
+    assignment = rng.integers(0, clusters, rows)
+    noise = rng.standard_normal((rows, dimensions), np.float32)
+    return centres[assignment] + noise
+
+
+def run(args: List[str]) -> None:
+    """Report heap memory, recall@k against the float32 store, and query latency for each storage mode of VectorStore, with and without exact re-ranking.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="quantize")
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=10)
+    options = parser.parse_args(args)
+    rng = np.random.default_rng(0)
+    keys = clustered_vectors(rng, options.size, options.dimensions, options.clusters)
+    queries = keys[rng.integers(0, options.size, options.queries)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape, np.float32)
+    values = [str(i) for i in range(options.size)]
+    legacy_bytes = options.size * options.dimensions * 8
+    print(
+        f"{options.size} x {options.dimensions}, recall@{options.top}; "
+        f"float64 list-of-arrays store: {legacy_bytes / 2**20:.0f} MB"
+    )
+    expected = None
+    with tempfile.TemporaryDirectory() as directory:
+        for storage, rerank in MODES:
+            exact_path = os.path.join(directory, f"{storage}.exact") if rerank else None
+            store = VectorStore(storage=storage, exact_path=exact_path)
+            store.add_entries(keys, values)
+            start = time.perf_counter()
+            results = store.search_many(queries, options.top)
+            elapsed = (time.perf_counter() - start) / options.queries
+            if expected is None:
+                expected = results
+            recall = np.mean(
+                [
+                    len(set(found) & set(wanted)) / options.top
+                    for found, wanted in zip(results, expected)
+                ]
+            )
+            label = storage + (" + rerank" if rerank else "")
+            print(
+                f"{label:>16}: {store.nbytes / 2**20:7.1f} MB heap, "
+                f"recall {recall:.3f}, {elapsed * 1000:.2f} ms/query"
+            )
+            del store
@@ -0,0 +1,94 @@
+import argparse
+import random
+import string
+import time
+from typing import Callable, List
+
+from commands.state import State
+from utils import annotate_with_line_numbers, replace_spaces_with_tabs
+
+
+def legacy_render_information(state: State) -> str:
+    """Render the information block the way State did before caching, processing every context file on every call.
+
+    Args:
+            state (State): The state to render.
+
+    Returns:
+            str: The rendered block.
+    """
+    files_list = ", ".join(state.context_files)
+    rendered_info = [
+        f"### REQUESTED FILES ###\nYou have requested and have access to the following files: {files_list}"
+    ]
+    for filename in state.context_files:
+        contents = state.files.get(filename, "")
+        processed_contents = replace_spaces_with_tabs(contents)
+        processed_contents = annotate_with_line_numbers(processed_contents)
+        rendered_info.append(f"*** {filename} ***\n{processed_contents}")
+    for key, value in state.information.items():
+        rendered_info.append(f"*** {key} ***\n{value}")
+    return "\n\n".join(rendered_info)
+
+
+def time_loop(
+    state: State, render: Callable[[State], str], iterations: int, edit: bool
+) -> float:
+    """Render once per simulated loop iteration, optionally editing one context file between renders.
+
+    Args:
+            state (State): The state to render.
+            render (Callable[[State], str]): The rendering function.
+            iterations (int): The number of loop iterations.
+            edit (bool): Whether to rewrite one context file per iteration.
+
+    Returns:
+            float: The total seconds spent rendering.
+    """
+    elapsed = 0.0
+    for i in range(iterations):
+        if edit:
+            filename = state.context_files[i % len(state.context_files)]
+            state.files[filename] = state.files[filename] + f"# edit {i}\n"
+        start = time.perf_counter()
+        render(state)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def run(args: List[str]) -> None:
+    """Compare the legacy and cached information rendering over a command loop, with an unchanged context and with one file edited per iteration.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="render")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=15)
+    options = parser.parse_args(args)
+    rng = random.Random(0)
+    files = {
+        f"src/module{i}.py": "".join(
+            "    " * rng.randint(0, 3)
+            + "".join(rng.choice(string.ascii_lowercase) for _ in range(40))
+            + "\n"
+            for _ in range(options.lines)
+        )
+        for i in range(options.files)
+    }
+    print(
+        f"{options.files} context files of {options.lines} lines, "
+        f"{options.iterations} iterations"
+    )
+    for edit in (False, True):
+        for label, render in (
+            ("legacy", legacy_render_information),
+            ("cached", State.render_information),
+        ):
+            state = State(files)
+            for filename in files:
+                state.add_file(filename)
+            elapsed = time_loop(state, render, options.iterations, edit)
+            context = "one edit per iteration" if edit else "unchanged context"
+            print(f"{context:>22}, {label}: {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,97 @@
+import argparse
+import random
+from typing import List, Optional
+
+from commands.scratch import Scratch
+from utilities.rate_limit import estimate_tokens
+
+
+def pytest_log(rng: random.Random, failures: int, tests: int) -> str:
+    """Build a pytest log of the size and shape the Terminal command returns.
+
+    Args:
+            rng (random.Random): The source of the log's filler.
+            failures (int): The number of failing tests.
+            tests (int): The number of tests run.
+
+    Returns:
+            str: The log.
+    """
+    lines = [
+        "============================= test session starts =============================="
+    ]
+    lines += [
+        f"src/test_module{i}.py {'.' * rng.randint(5, 40)}" for i in range(tests // 10)
+    ]
+    for i in range(failures):
+        lines.append(
+            f"___________________________ test_case_{i} ___________________________"
+        )
+        lines += [
+            f"    assert value_{j} == expected_{j}" for j in range(rng.randint(20, 60))
+        ]
+        lines.append(f"E   AssertionError: {rng.random()} != {rng.random()}")
+    lines += [f"FAILED src/test_module{i}.py::test_case_{i}" for i in range(failures)]
+    summary = (
+        f"{failures} failed, {tests - failures} passed"
+        if failures
+        else f"{tests} passed"
+    )
+    lines.append(f"=================== {summary} in 1.23s ===================")
+    return "\n".join(lines)
+
+
+def loop_prompt_tokens(
+    prompt: str, turns: List[tuple], token_budget: Optional[int], keep_turns: int
+) -> int:
+    """Replay a command loop, summing the estimated tokens of the scratch sent on every iteration.
+
+    Args:
+            prompt (str): The loop's prompt.
+            turns (List[tuple]): The (command, output) pairs the loop produces, one per iteration.
+            token_budget (Optional[int]): The scratch budget, or None for the unbounded scratch.
+            keep_turns (int): The turns kept verbatim.
+
+    Returns:
+            int: The prompt tokens sent over the loop.
+    """
+    scratch = Scratch(prompt, token_budget, keep_turns)
+    total = 0
+    for command, output in turns:
+        total += estimate_tokens(scratch.render())
+        scratch.add_turn(command, output)
+    return total
+
+
+def run(args: List[str]) -> None:
+    """Compare the prompt tokens of an unbounded and a budgeted scratch over a synthetic command loop that alternates code edits with pytest runs.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="scratch")
+    parser.add_argument("--iterations", type=int, default=15)
+    parser.add_argument("--budget", type=int, default=6000)
+    parser.add_argument("--keep-turns", type=int, default=3)
+    options = parser.parse_args(args)
+    rng = random.Random(0)
+    prompt = "Fix the failing tests in src/module.py.\n" * 20
+    turns = []
+    for i in range(options.iterations):
+        if i % 2:
+            failures = max(0, 5 - i // 2)
+            turns.append(
+                ("Function Called: Terminal pytest", pytest_log(rng, failures, 300))
+            )
+        else:
+            turns.append(
+                (
+                    f"Function Called: ReplaceFile src/module.py edit {i}",
+                    "File replaced successfully.",
+                )
+            )
+    legacy = loop_prompt_tokens(prompt, turns, None, options.keep_turns)
+    managed = loop_prompt_tokens(prompt, turns, options.budget, options.keep_turns)
+    print(f"{options.iterations} iterations, budget {options.budget} tokens")
+    print(f"unbounded scratch: {legacy:8d} prompt tokens")
+    print(f" managed scratch: {managed:8d} prompt tokens")
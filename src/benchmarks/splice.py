@@ -0,0 +1,94 @@
+import argparse
+import ast
+import random
+import time
+from typing import List
+
+import astor
+from tools.code import splice_lines
+from tools.symbols import parse_symbols
+from utils import format_python_code
+
+
+def legacy_replace_node(src_code: str, target_node: str, new_code: str) -> str:
+    """Replace a top level function the way tools.code.replace_node did before splicing: mutate the AST and regenerate the whole file with astor.
+
+    Args:
+            src_code (str): The source code to search.
+            target_node (str): The name of the function to replace.
+            new_code (str): The new function.
+
+    Returns:
+            str: The regenerated source code.
+    """
+    tree = ast.parse(src_code)
+    new_node = ast.parse(new_code).body[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name == target_node:
+            node.args = new_node.args
+            node.body = new_node.body
+            node.decorator_list = new_node.decorator_list
+            node.returns = new_node.returns
+    return astor.to_source(tree)
+
+
+def make_file(rng: random.Random, lines: int) -> str:
+    """Build a commented Python module of roughly the given number of lines.
+
+    Args:
+            rng (random.Random): The source of values.
+            lines (int): The approximate line count.
+
+    Returns:
+            str: The module.
+    """
+    return "\n\n".join(
+        f"# Scale the value by {i}.\n"
+        f"def function_{i}(value):\n"
+        f"    result = value * {rng.randint(0, 1000)}  # scale\n"
+        f"    return result + {i}\n"
+        for i in range(lines // 6)
+    )
+
+
+def run(args: List[str]) -> None:
+    """Compare regenerating and formatting the whole file with splicing the node's span, on files of several sizes.
+
+    Args:
+            args (List[str]): Command line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="splice")
+    parser.add_argument("--lines", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--edits", type=int, default=10)
+    options = parser.parse_args(args)
+    rng = random.Random(0)
+    for lines in options.lines:
+        content = make_file(rng, lines)
+        symbols = parse_symbols("module.py", content)
+        targets = [
+            f"function_{rng.randrange(lines // 6)}" for _ in range(options.edits)
+        ]
+        new_code = "def {}(value):\n    return abs(value)\n"
+        start = time.perf_counter()
+        for target in targets:
+            legacy = format_python_code(
+                legacy_replace_node(content, target, new_code.format(target))
+            )
+        legacy_time = (time.perf_counter() - start) / options.edits
+        start = time.perf_counter()
+        for target in targets:
+            definition = symbols.definitions[target]
+            spliced = splice_lines(
+                content,
+                definition.start_line,
+                definition.end_line,
+                new_code.format(target),
+                reformat=True,
+            )
+        splice_time = (time.perf_counter() - start) / options.edits
+        comments = content.count("#")
+        print(
+            f"{lines:>5} lines: astor + black {legacy_time * 1000:7.1f} ms "
+            f"({legacy.count('#')}/{comments} comments kept), splice "
+            f"{splice_time * 1000:5.2f} ms ({spliced.count('#')}/{comments} kept)"
+        )
@@ -1,4 +1,6 @@
 import json
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional
 from tools.replace_file import modify_file
 from commands.state import State
 from utils import annotate_with_line_numbers, format_python_code
@@ -23,6 +25,38 @@ Example Command schema:
 }
 """
 
+ALL_FILES = "*"
+"""A footprint entry standing for every file in the state."""
+CONTEXT = "<context>"
+"""A footprint entry standing for what prompts are rendered from: the scratch, the context files and the information. A command writes it when its output or its changes to the context should be seen by later commands; those changes are made in prepare or added to the scratch after the batch, both in request order."""
+
+
+@dataclass(frozen=True)
+class Footprint:
+    """The files a command reads and writes when it executes, which decides what it may run alongside."""
+
+    reads: FrozenSet[str] = field(default_factory=frozenset)
+    writes: FrozenSet[str] = field(default_factory=frozenset)
+
+    def conflicts(self, earlier: "Footprint") -> bool:
+        """Whether this command could see a different state if it ran concurrently with a command requested before it, rather than after it.
+
+        Args:
+                earlier (Footprint): The footprint of the earlier command.
+
+        Returns:
+                bool: True if this command reads something the earlier one writes, or writes a file the earlier one reads or writes.
+        """
+        return _overlaps(earlier.writes, self.reads) or _overlaps(
+            self.writes - {CONTEXT}, earlier.reads | earlier.writes
+        )
+
+
+def _overlaps(writes: FrozenSet[str], touched: FrozenSet[str]) -> bool:
+    if ALL_FILES in touched and any(entry != CONTEXT for entry in writes):
+        return True
+    return bool(writes & touched)
+
 
 class Command:
     """
@@ -61,6 +95,19 @@ class Command:
         """
         pass
 
+    def footprint(self) -> Optional[Footprint]:
+        """
+        Returns the files the command reads and writes, letting the executor run it concurrently with commands it does not conflict with.
+        None, the default, makes the command run on its own.
+        """
+        return None
+
+    def prepare(self, state: State) -> None:
+        """
+        Captures what the command needs from the state before its batch starts, so commands running concurrently all see the state as it was when the batch began.
+        """
+        pass
+
     def execute(self, state: State):
         """
         Executes the command.
@@ -1,5 +1,7 @@
-from commands.command import Command
+from typing import Optional
+from commands.command import CONTEXT, Command, Footprint
 from commands.state import State
+from tools.chunk import parse_location
 from utils import annotate_with_line_numbers
 
 
@@ -37,6 +39,7 @@ class Files(Command):
         self.files: list = [
             (file[2:] if file.startswith("./") else file) for file in files
         ]
+        self._output: Optional[str] = None
 
     @staticmethod
     def schema() -> dict:
@@ -51,7 +54,7 @@ class Files(Command):
                 "properties": {
                     "files": {
                         "type": "array",
-                        "description": "List of files to retrieve",
+                        "description": "List of files to retrieve, each either a path or path:start-end to retrieve only those lines",
                         "items": {"type": "string"},
                     }
                 },
@@ -72,10 +75,48 @@ class Files(Command):
         """
         return f"Function Called: Files files={self.files}"
 
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint reading the requested files and writing the context.
+        """
+        return Footprint(
+            reads=frozenset(parse_location(file)[0] for file in self.files),
+            writes=frozenset([CONTEXT]),
+        )
+
+    def prepare(self, state: State) -> None:
+        """
+        Adds the files to the state's context before the batch runs, so the context changes in request order.
+        Calls add_file on the state object for each file, or adds just the requested lines as information for a path:start-end reference.
+
+        Args:
+                state (State): The current state object.
+        """
+        messages = []
+        for file in self.files:
+            path, span = parse_location(file)
+            if span is None or file in state.files:
+                if file in state.files:
+                    state.add_file(file)
+                    messages.append(f"File {file} has been added to context")
+                else:
+                    messages.append(f"File {file} does not exist.")
+            elif path in state.files:
+                start, end = span
+                lines = state.files[path].splitlines()[start - 1 : end]
+                state.information[file] = annotate_with_line_numbers(
+                    replace_spaces_with_tabs("\n".join(lines)), start
+                )
+                messages.append(
+                    f"Lines {start}-{end} of {path} have been added to context"
+                )
+            else:
+                messages.append(f"File {path} does not exist.")
+        self._output = "\n".join(messages)
+
     def execute(self, state: State) -> str:
         """
-        Executes the Files command.
-        Calls add_file on the state object for each file.
+        Executes the Files command, preparing it first unless the executor already has.
 
         Args:
                 state (State): The current state object.
@@ -83,11 +124,7 @@ class Files(Command):
         Returns:
                 str: Messages indicating the status of each file.
         """
-        messages = []
-        for file in self.files:
-            if file in state.files:
-                state.add_file(file)
-                messages.append(f"File {file} has been added to context")
-            else:
-                messages.append(f"File {file} does not exist.")
-        return "\n".join(messages)
+        if self._output is None:
+            self.prepare(state)
+        output, self._output = self._output, None
+        return output
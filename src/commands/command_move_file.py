@@ -1,6 +1,7 @@
 from commands.command import Command
 from commands.state import State
 from tools.move_file import move_file
+from tools.imports import module_name
 
 
 class MoveFile(Command):
@@ -57,8 +58,10 @@ class MoveFile(Command):
         """
         if self.old_filename in state.files:
             try:
+                state.symbol_index.sync(state.files)
+                importers = state.symbol_index.importers(module_name(self.old_filename))
                 state.files = move_file(
-                    state.files, self.old_filename, self.new_filename
+                    state.files, self.old_filename, self.new_filename, importers
                 )
                 return (
                     f"File {self.old_filename} has been moved to {self.new_filename}."
@@ -0,0 +1,71 @@
+from commands.command import CONTEXT, Command, Footprint
+from commands.state import State
+
+
+class Recall(Command):
+    """
+    Class representing a Recall command.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "Recall"
+
+    @property
+    def terminal(self):
+        return False
+
+    def __init__(self, key: str, start_line: int = 1):
+        self.key: str = key
+        self.start_line: int = start_line
+
+    @staticmethod
+    def schema() -> dict:
+        """
+        Returns the schema for the Recall command.
+        """
+        return {
+            "name": "Recall",
+            "description": "Read back lines of a long command output that was stored under a key such as output-1 instead of being repeated in full",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "key": {
+                        "type": "string",
+                        "description": "The key the output was stored under",
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "The first line to read, starting at 1",
+                    },
+                },
+                "required": ["key"],
+            },
+        }
+
+    @staticmethod
+    def load_from_json(json_data: dict) -> "Recall":
+        """
+        Loads the Recall command from the provided json_data.
+        """
+        return Recall(json_data["key"], json_data.get("start_line", 1))
+
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint writing only the context, since the command reads outputs already stored in the scratch and adds a page of one to it.
+        """
+        return Footprint(writes=frozenset([CONTEXT]))
+
+    def execute(self, state: State) -> str:
+        """
+        Executes the Recall command.
+        Returns a page of the stored output from the state's scratch.
+        """
+        try:
+            return state.scratch.recall(self.key, self.start_line)
+        except KeyError:
+            keys = ", ".join(state.scratch.spilled) or "none"
+            return f"No stored output {self.key}. Stored outputs: {keys}"
+
+    def __str__(self):
+        return f"Function Called: Recall key={self.key} start_line={self.start_line}"
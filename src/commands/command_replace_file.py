@@ -1,4 +1,5 @@
-from commands.command import Command
+from typing import Optional, Tuple
+from commands.command import CONTEXT, Command, Footprint
 from commands.state import State
 from utils import format_python_code
 from tools.replace_file import modify_file
@@ -20,6 +21,7 @@ class ReplaceFile(Command):
     def __init__(self, filename: str, instructions: str):
         self.filename: str = filename
         self.instructions: str = instructions
+        self._prepared: Optional[Tuple[str, str]] = None
 
     @staticmethod
     def schema() -> dict:
@@ -52,13 +54,32 @@ class ReplaceFile(Command):
         """
         return ReplaceFile(json_data["filename"], json_data["instructions"])
 
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint reading the context and writing the one file.
+        Its output only confirms the edit, so it is not counted as writing the context, which lets edits to different files run together.
+        """
+        return Footprint(
+            reads=frozenset([self.filename, CONTEXT]), writes=frozenset([self.filename])
+        )
+
+    def prepare(self, state: State) -> None:
+        """
+        Renders the context and reads the original file, so edits running alongside this one do not leak into its prompt.
+        """
+        temp_scratch = state.scratch.render() + "\n\n" + state.render_information()
+        self._prepared = (state.files.get(self.filename, ""), temp_scratch)
+
     def execute(self, state: State):
         """
         Executes the ReplaceFile command.
         """
-        temp_scratch = state.scratch + "\n\n" + state.render_information()
+        if self._prepared is None:
+            self.prepare(state)
+        original, temp_scratch = self._prepared
+        self._prepared = None
         new_content = modify_file(
-            state.files.get(self.filename, ""),
+            original,
             self.instructions,
             temp_scratch,
             self.filename,
@@ -1,9 +1,6 @@
-import ast
-import astor
 from commands.command import Command
 from commands.state import State
-from utils import format_python_code
-from tools.code import replace_node
+from tools.code import splice_node, splice_span
 
 
 class ReplaceNode(Command):
@@ -41,7 +38,7 @@ class ReplaceNode(Command):
                     },
                     "node_name": {
                         "type": "string",
-                        "description": "Name of the node (class or function) to be replaced",
+                        "description": "Name of the node (class, function or assignment) to be replaced, qualified like Class.method for a method",
                     },
                     "new_source_code": {
                         "type": "string",
@@ -66,14 +63,36 @@ class ReplaceNode(Command):
         Executes the ReplaceNode command.
         """
         source_code = state.files[self.filename]
+        state.symbol_index.sync(state.files)
+        symbols = state.symbol_index.symbols(self.filename)
+        definition = state.symbol_index.definition(self.filename, self.node_name)
+        if (
+            self.filename.endswith(".py")
+            and symbols.error is None
+            and definition is None
+        ):
+            raise ValueError(
+                f"Node '{self.node_name}' is not defined in {self.filename}. "
+                f"Defined names: {', '.join(symbols.definitions)}"
+            )
 
-        # Update the source code using the replace_node tool
-        modified_code = replace_node(source_code, self.node_name, self.new_source_code)
+        # Splice the new code over the node, formatting only the new code
+        if definition is not None:
+            modified_code = splice_span(
+                source_code,
+                definition.start_line,
+                definition.start_col,
+                definition.end_line,
+                definition.end_col,
+                self.new_source_code,
+                reformat=True,
+            )
+        else:
+            modified_code = splice_node(
+                source_code, self.node_name, self.new_source_code, reformat=True
+            )
 
-        # Format the modified code
-        formatted_code = format_python_code(modified_code)
-
-        state.files[self.filename] = formatted_code
+        state.files[self.filename] = modified_code
 
         return f"Node {self.node_name} in file {self.filename} has been replaced."
 
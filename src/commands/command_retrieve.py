@@ -0,0 +1,96 @@
+from typing import Optional
+from commands.command import ALL_FILES, CONTEXT, Command, Footprint
+from commands.state import State
+from tracing.tags import EXCEPTION
+from tracing.trace import trace
+
+
+class Retrieve(Command):
+    """
+    Class representing a Retrieve command.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "Retrieve"
+
+    @property
+    def terminal(self):
+        return False
+
+    def __init__(self, query: str):
+        self.query: str = query
+        self._error: Optional[str] = None
+
+    @staticmethod
+    def schema() -> dict:
+        """
+        Returns the schema for the Retrieve command.
+        """
+        return {
+            "name": "Retrieve",
+            "description": "Find the functions, classes and file sections most relevant to a description or identifiers, ranked by keyword and semantic similarity. Returns each as file:start-end symbol with a numbered snippet; pass the file:start-end to Files to read the full span",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "What the code you are looking for does, or names it uses",
+                    },
+                },
+                "required": ["query"],
+            },
+        }
+
+    @staticmethod
+    def load_from_json(json_data: dict) -> "Retrieve":
+        """
+        Loads the Retrieve command from the provided json_data.
+        """
+        return Retrieve(json_data["query"])
+
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint reading every file and writing the context with its matches.
+        """
+        return Footprint(reads=frozenset([ALL_FILES]), writes=frozenset([CONTEXT]))
+
+    def prepare(self, state: State) -> None:
+        """
+        Builds the state's retriever if no command has yet, tracing a failure such as a rate limited embedding request instead of raising it so the loop can carry on without Retrieve.
+        """
+        from tools.retrieve import load_retriever
+
+        if state.retriever is not None:
+            return
+        try:
+            state.retriever = load_retriever(state.original_files)
+        except Exception as e:
+            trace(EXCEPTION, f"Retrieve could not index the files: {e}")
+            self._error = str(e)
+
+    def execute(self, state: State) -> str:
+        """
+        Executes the Retrieve command.
+        Queries the retriever of the files the loop started from, built once per tree, and leaves out hits in files edited since.
+        """
+        self.prepare(state)
+        if state.retriever is None:
+            error, self._error = self._error, None
+            return f"Retrieve is unavailable: {error}. Use Search instead."
+        hits, changed = [], set()
+        for hit in state.retriever.search(self.query):
+            file = hit.chunk.file
+            if state.files.get(file) != state.original_files.get(file):
+                changed.add(file)
+            else:
+                hits.append(hit)
+        output = "\n\n".join(str(hit) for hit in hits)
+        if not hits:
+            output = f"No code found for {self.query}"
+        if changed:
+            output += f"\nAlso matched files edited since the loop started, not shown: {', '.join(sorted(changed))}. Use Search to find lines in them."
+        return output
+
+    def __str__(self):
+        return f"Function Called: Retrieve query={self.query}"
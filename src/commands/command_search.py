@@ -1,6 +1,8 @@
 # command_search.py
-from commands.command import Command
+import re
+from commands.command import ALL_FILES, CONTEXT, Command, Footprint
 from commands.state import State
+from tools.search import MAX_MATCHES
 
 
 class Search(Command):
@@ -16,8 +18,10 @@ class Search(Command):
     def terminal(self):
         return False
 
-    def __init__(self, search_string: str):
+    def __init__(self, search_string: str, regex: bool = False):
         self.search_string: str = search_string
+        self.regex: bool = regex
+        self._synced: bool = False
 
     @staticmethod
     def schema() -> dict:
@@ -26,14 +30,18 @@ class Search(Command):
         """
         return {
             "name": "Search",
-            "description": "Search for a specific string in the state's files",
+            "description": "Search the state's files for a case-insensitive string or regular expression, returning matching lines as file:line: snippet",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "search_string": {
                         "type": "string",
-                        "description": "The string to search for in the state's files",
-                    }
+                        "description": "The string to search for in the state's files; a string or regular expression may span several lines",
+                    },
+                    "regex": {
+                        "type": "boolean",
+                        "description": "Whether search_string is a regular expression",
+                    },
                 },
                 "required": ["search_string"],
             },
@@ -44,16 +52,39 @@ class Search(Command):
         """
         Loads the Search command from the provided json_data.
         """
-        return Search(json_data["search_string"])
+        return Search(json_data["search_string"], json_data.get("regex", False))
+
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint reading every file and writing the context with its matches.
+        """
+        return Footprint(reads=frozenset([ALL_FILES]), writes=frozenset([CONTEXT]))
+
+    def prepare(self, state: State) -> None:
+        """
+        Brings the state's trigram index up to date with its files, leaving execute only reading it.
+        """
+        state.search_index.sync(state.files)
+        self._synced = True
 
     def execute(self, state: State) -> str:
         """
         Executes the Search command.
+        Brings the state's trigram index up to date with its files unless prepare already has, then lists each matching line.
         """
-        from tools.search import search_tool
-
-        results = search_tool(state.files, self.search_string)
-        return str(results)
+        if not self._synced:
+            self.prepare(state)
+        self._synced = False
+        try:
+            matches = state.search_index.search(self.search_string, self.regex)
+        except re.error as e:
+            return f"Invalid regular expression: {e}"
+        if not matches:
+            return f"No matches for {self.search_string}"
+        output = "\n".join(str(match) for match in matches)
+        if len(matches) >= MAX_MATCHES:
+            output += f"\nShowing the first {MAX_MATCHES} matches; refine the search to see more."
+        return output
 
     def __str__(self):
-        return f"Function Called: Search search_string={self.search_string}"
+        return f"Function Called: Search search_string={self.search_string} regex={self.regex}"
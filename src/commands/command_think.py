@@ -1,4 +1,4 @@
-from commands.command import Command
+from commands.command import CONTEXT, Command, Footprint
 from commands.state import State
 
 
@@ -58,6 +58,12 @@ class Think(Command):
         """
         return Think(json_data["thought"], json_data["questions"])
 
+    def footprint(self) -> Footprint:
+        """
+        Returns a footprint writing only the context, since the thought is added to the scratch.
+        """
+        return Footprint(writes=frozenset([CONTEXT]))
+
     def execute(self, state: State) -> str:
         """
         Executes the Think command.
@@ -5,6 +5,8 @@ from .command_move_file import MoveFile
 from .command_replace_file import ReplaceFile
 from .command_replace_node import ReplaceNode
 from .command_search import Search
+from .command_retrieve import Retrieve
+from .command_recall import Recall
 from .command_delete_file import DeleteFile
 from .command_terminal import Terminal
 from .command_think import Think
@@ -18,6 +20,8 @@ COMMANDS_GENERATE = [
     Files,
     ReplaceFile,
     Search,
+    Retrieve,
+    Recall,
     DeleteFile,
     MoveFile,
     InstallPackage,
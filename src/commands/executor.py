@@ -0,0 +1,85 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from commands.command import Command
+from commands.state import State
+from settings import bind_task_settings, get_settings
+from tracing.trace import bind_task_trace, get_trace
+
+
+def plan_batches(commands: List[Command]) -> List[List[Command]]:
+    """Split commands, in order, into consecutive batches whose members can run concurrently: every command in a batch declares a footprint that does not conflict with any earlier command in the batch.
+
+    Args:
+            commands (List[Command]): The commands, in the order they were requested.
+
+    Returns:
+            List[List[Command]]: The batches, in order; a command without a footprint is alone in its batch.
+    """
+    batches: List[List[Command]] = []
+    current: List[Command] = []
+    for command in commands:
+        footprint = command.footprint()
+        fits = footprint is not None and not any(
+            footprint.conflicts(other.footprint()) for other in current
+        )
+        if not fits and current:
+            batches.append(current)
+            current = []
+        current.append(command)
+        if footprint is None:
+            batches.append(current)
+            current = []
+    if current:
+        batches.append(current)
+    return batches
+
+
+def execute_commands(state: State, commands: List[Command]) -> None:
+    """Execute commands against the state, running each batch from plan_batches on worker threads and adding the outputs to the scratch in the original order.
+
+    Every command of a batch is prepared before any of them executes, so they all see the state as it was when the batch began. Workers report into the caller's trace and settings.
+
+    Args:
+            state (State): The state the commands act on.
+            commands (List[Command]): The non-terminal commands, in the order they were requested.
+
+    Raises:
+            Exception: The first exception raised by a command, in request order, after the outputs of the batch's other commands have been recorded. Later batches do not run.
+    """
+    max_workers = get_settings().max_parallel_commands
+    for batch in plan_batches(commands):
+        if len(batch) == 1 or max_workers <= 1:
+            for command in batch:
+                output = command.execute(state)
+                state.scratch.add_turn(str(command), output)
+                state.last_command = command
+            continue
+        for command in batch:
+            command.prepare(state)
+        trace_instance, settings_instance = get_trace(), get_settings()
+
+        def run(command: Command) -> tuple:
+            bind_task_trace(trace_instance)
+            bind_task_settings(settings_instance)
+            try:
+                return command.execute(state), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batch))) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, run, command)
+                for command in batch
+            ]
+            results = [future.result() for future in futures]
+        error: Optional[Exception] = None
+        for command, (output, exception) in zip(batch, results):
+            if exception is not None:
+                error = error or exception
+                continue
+            state.scratch.add_turn(str(command), output)
+            state.last_command = command
+        if error is not None:
+            raise error
@@ -1,4 +1,6 @@
 import json
+from commands.executor import execute_commands
+from commands.scratch import Scratch
 from commands.state import State
 from gpt import gpt_query, gpt_query_tools
 from settings import get_settings
@@ -34,18 +36,21 @@ def parse_gpt_response(command_classes: list, gpt_response: "GPTResponse") -> "C
     raise ValueError(f"Unrecognized command name: {gpt_response.name}")
 
 
-def command_loop_iterate(state: State, system: str, command_classes: list) -> tuple:
+def command_loop_iterate(
+    state: State, system: str, command_classes: list, cache: bool = False
+) -> tuple:
     """
     Processes a command loop iteration.
 
     This function processes a single iteration of the command loop, handling the execution
     of a command based on the GPT-generated responses and updates the state accordingly.
-    The function supports processing multiple results, but currently, GPT queries return a single result.
+    Several tool calls in one response are executed by execute_commands, which runs those that do not conflict concurrently.
 
     Args:
                     state (State): The current state of the command loop.
                     system (str): The GPT-3 system being used.
                     command_classes (list): A list of available command classes.
+                    cache (bool): Whether GPT responses may be answered from the response cache.
     Returns:
                     tuple: A tuple containing execution results and the updated state.
     """
@@ -61,31 +66,37 @@ def command_loop_iterate(state: State, system: str, command_classes: list) -> tu
             for cmd_cls in command_classes
             if cmd_cls != state.last_command.__class__
         ]
-    temp_scratch = state.scratch + "\n\n" + state.render_information()
+    temp_scratch = state.scratch.render() + "\n\n" + state.render_information()
     try:
         if get_settings().use_tools:
             cprint("Using experimental tools feature", "red")
             results = gpt_query_tools(
-                temp_scratch + "\n", system, extract_schemas(command_classes)
+                temp_scratch + "\n",
+                system,
+                extract_schemas(command_classes),
+                cache=cache,
             )
         else:
             result = gpt_query(
-                temp_scratch + "\n", system, extract_schemas(command_classes)
+                temp_scratch + "\n",
+                system,
+                extract_schemas(command_classes),
+                cache=cache,
             )
             if isinstance(result, str):
                 return result, state
             results = [result]
+        commands = []
         for result in results:
             command = parse_gpt_response(command_classes, result)
             if command.terminal:
+                execute_commands(state, commands)
                 return command, state
-            output = command.execute(state)
-            state.scratch += "\n" + str(command)
-            state.scratch += "\n" + output
-            state.last_command = command
+            commands.append(command)
+        execute_commands(state, commands)
         return None, state
     except Exception as e:
-        state.scratch += "\nException thrown calling command! " + str(e)
+        state.scratch.add_turn("Exception thrown calling command! " + str(e))
         raise
 
 
@@ -95,6 +106,7 @@ def command_loop(
     command_classes: list,
     files: dict = {},
     target_dir: str = None,
+    cache: bool = False,
 ) -> (str, State):
     """
     Initiates a command loop where GPT can iteratively execute a series of commands based on user prompts.
@@ -105,11 +117,15 @@ def command_loop(
             command_classes: A list of Command classes available for execution.
             files: An optional dictionary of file names to file contents.
             target_dir: An optional target directory for file operations.
+            cache: Whether GPT responses may be answered from the response cache, so replaying an identical loop costs no API calls.
     Returns:
             A tuple containing any terminal output as a string and the final state.
     """
     state = State(files, target_dir=target_dir)
-    state.scratch = prompt
+    settings = get_settings()
+    state.scratch = Scratch(
+        prompt, settings.scratch_token_budget, settings.scratch_keep_turns
+    )
     state.last_command_instance = None
     exception_count = 0
     max_loop_length = get_settings().max_loop_length
@@ -120,7 +136,7 @@ def command_loop(
         ):
             break
         try:
-            result, state = command_loop_iterate(state, system, command_classes)
+            result, state = command_loop_iterate(state, system, command_classes, cache)
             if result is not None:
                 return result, state
         except Exception as e:
@@ -0,0 +1,147 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from utilities.rate_limit import estimate_tokens
+
+SPILL_CHARS = 4000
+SPILL_CONTEXT_LINES = 15
+RECALL_LINES = 100
+PYTEST_SUMMARY = re.compile(r"^=+ (.*\b(?:passed|failed|error|errors|skipped)\b.*) =+$")
+PYTEST_FAILURE = re.compile(r"^FAILED (\S+)")
+
+
+@dataclass
+class Turn:
+    """One command of the loop and what it returned, with the key its full output is stored under when it was too long to keep inline."""
+
+    command: str
+    output: str
+    spill_key: Optional[str] = None
+
+
+def digest_output(command: str, output: str) -> str:
+    """Summarize a turn in one line, recognising pytest runs so failures stay visible after compaction.
+
+    Args:
+            command (str): The command's description, as written to the scratch.
+            output (str): What the command returned.
+
+    Returns:
+            str: The digest.
+    """
+    lines = [line for line in output.splitlines() if line.strip()]
+    summary = next(
+        (m.group(1) for m in map(PYTEST_SUMMARY.match, reversed(lines)) if m), None
+    )
+    if summary is not None:
+        failures = [m.group(1) for m in map(PYTEST_FAILURE.match, lines) if m]
+        summary = f"ran pytest: {summary}"
+        if failures:
+            summary += f" ({', '.join(failures[:5])})"
+    elif not lines:
+        summary = "no output"
+    elif len(lines) == 1:
+        summary = lines[0][:200]
+    else:
+        summary = f"{lines[0][:200]} ... ({len(lines)} lines)"
+    return f"{command} -> {summary}"
+
+
+class Scratch:
+    """
+    The running transcript of a command loop held within a token budget: the prompt and the most recent turns stay verbatim, older turns shrink to one-line digests, and long outputs spill to a side store the model reads back with Recall.
+    """
+
+    def __init__(
+        self, prompt: str = "", token_budget: Optional[int] = None, keep_turns: int = 3
+    ):
+        """Start a transcript.
+
+        Args:
+                prompt (str): The loop's prompt, always kept verbatim.
+                token_budget (Optional[int]): The estimated tokens the rendered transcript should fit in, or None to keep every turn verbatim.
+                keep_turns (int): The most recent turns kept verbatim while the budget allows.
+        """
+        self.prompt = prompt
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.turns: List[Turn] = []
+        self.spilled: Dict[str, str] = {}
+
+    def add_turn(self, command: str, output: str = "") -> None:
+        """Record a command and its output, spilling the output when it is too long to repeat every iteration.
+
+        Args:
+                command (str): The command's description.
+                output (str): What the command returned.
+
+        Returns:
+                None
+        """
+        turn = Turn(command, output)
+        if self.token_budget is not None and len(output) > SPILL_CHARS:
+            turn.spill_key = f"output-{len(self.spilled) + 1}"
+            self.spilled[turn.spill_key] = output
+        self.turns.append(turn)
+
+    def recall(self, key: str, start_line: int = 1) -> str:
+        """Read back part of a spilled output.
+
+        Args:
+                key (str): The key named in the transcript.
+                start_line (int): The first line to return, 1-based.
+
+        Returns:
+                str: Up to RECALL_LINES numbered lines, with a hint where to continue.
+
+        Raises:
+                KeyError: If nothing was spilled under key.
+        """
+        lines = self.spilled[key].splitlines()
+        start = max(start_line, 1)
+        page = lines[start - 1 : start - 1 + RECALL_LINES]
+        text = "\n".join(f"{start + i}: {line}" for i, line in enumerate(page))
+        if start - 1 + RECALL_LINES < len(lines):
+            text += f"\n... continue with start_line={start + RECALL_LINES} of {len(lines)} lines"
+        return text
+
+    def _verbatim(self, turn: Turn) -> str:
+        if turn.spill_key is None:
+            return f"{turn.command}\n{turn.output}" if turn.output else turn.command
+        lines = turn.output.splitlines()
+        marker = f"call Recall with key {turn.spill_key} to read them ...]"
+        if len(lines) > 2 * SPILL_CONTEXT_LINES:
+            head = "\n".join(lines[:SPILL_CONTEXT_LINES])
+            tail = "\n".join(lines[-SPILL_CONTEXT_LINES:])
+            hidden = len(lines) - 2 * SPILL_CONTEXT_LINES
+            marker = f"[... {hidden} lines stored as {turn.spill_key}; {marker}"
+            return f"{turn.command}\n{head}\n{marker}\n{tail}"
+        head = turn.output[: SPILL_CHARS // 2]
+        return f"{turn.command}\n{head}\n[... output truncated and stored as {turn.spill_key}; {marker}"
+
+    def render(self) -> str:
+        """Render the transcript, keeping as many recent turns verbatim as the budget allows and digesting the rest.
+
+        Returns:
+                str: The prompt followed by the turns.
+        """
+        if self.token_budget is None:
+            return "\n".join([self.prompt] + [self._verbatim(t) for t in self.turns])
+        digests = [digest_output(t.command, t.output) for t in self.turns]
+        verbatim = [self._verbatim(t) for t in self.turns]
+        keep = min(self.keep_turns, len(self.turns))
+        while True:
+            split = len(self.turns) - keep
+            parts = [self.prompt]
+            if split:
+                parts.append("### EARLIER COMMANDS (summarized) ###")
+                parts.extend(digests[:split])
+            parts.extend(verbatim[split:])
+            rendered = "\n".join(parts)
+            if keep <= 1 or estimate_tokens(rendered) <= self.token_budget:
+                return rendered
+            keep -= 1
+
+    def __str__(self) -> str:
+        return self.render()
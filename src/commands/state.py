@@ -1,40 +1,104 @@
-from typing import Dict, List
-import copy
+from typing import Dict, List, Mapping, Optional, Tuple
+from commands.scratch import Scratch
+from tools.search import TrigramIndex
+from tools.symbols import SymbolIndex
+from utilities.overlay import FileOverlay
 from utils import replace_spaces_with_tabs, annotate_with_line_numbers
 
 
 class State:
-    def __init__(self, files_dict: Dict[str, str], target_dir: str = None):
-        self.files: Dict[str, str] = copy.deepcopy(files_dict)
-        self.original_files: Dict[str, str] = copy.deepcopy(files_dict)
-        self.scratch: str = ""
+    def __init__(self, files_dict: Mapping[str, str], target_dir: str = None):
+        self.original_files: Mapping[str, str] = FileOverlay.freeze(files_dict)
+        self._files = FileOverlay(self.original_files)
+        self.scratch = Scratch()
         self.target_dir: str = target_dir
         self.last_command = None
         self.information: Dict[str, str] = {}
         self.context_files: List[str] = []
+        self.search_index = TrigramIndex()
+        self.symbol_index = SymbolIndex()
+        self.retriever = None
+        self._rendered_files: Dict[str, Tuple[int, str]] = {}
+        self._rendered: Optional[Tuple[tuple, str]] = None
+
+    @property
+    def files(self) -> FileOverlay:
+        """
+        The current file map, a copy-on-write overlay over original_files holding only the files commands changed.
+        """
+        return self._files
+
+    @files.setter
+    def files(self, files: Mapping[str, str]) -> None:
+        self._files.replace_all(files)
+
+    def changed_files(self) -> List[str]:
+        """
+        Lists the files added, modified or deleted since the state was created.
+
+        Returns:
+                List[str]: The changed paths, sorted.
+        """
+        return self._files.changed_files()
+
+    def diff(self) -> str:
+        """
+        Renders the changes since the state was created as a unified diff.
+
+        Returns:
+                str: The diff, empty when nothing changed.
+        """
+        return self._files.diff()
+
+    def render_file(self, filename: str) -> str:
+        """
+        Renders one context file with its header, tabs and line numbers, reusing the previous rendering until the file's version changes.
+
+        Arguments:
+                filename (str): The file to render.
+
+        Returns:
+                str: The rendered block.
+        """
+        version = self._files.version(filename)
+        cached = self._rendered_files.get(filename)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        contents = self.files.get(filename, "")
+        processed_contents = replace_spaces_with_tabs(contents)
+        processed_contents = annotate_with_line_numbers(processed_contents)
+        rendered = f"*** {filename} ***\n{processed_contents}"
+        self._rendered_files[filename] = (version, rendered)
+        return rendered
 
     def render_information(self) -> str:
         """
         Renders information including files as a string with a REQUESTED FILES header, filenames, and
         processed contents with replace_spaces_with_tabs and annotate_with_line_numbers from utils.py.
+        Each file is rendered once per version, and the whole block is reused while neither the context files, their versions nor the information change.
 
         Returns:
                 str: The formatted string containing keys with values and the specified header indicating requested files.
         """
+        key = (
+            tuple(self.context_files),
+            tuple(self._files.version(filename) for filename in self.context_files),
+            tuple(self.information.items()),
+        )
+        if self._rendered is not None and self._rendered[0] == key:
+            return self._rendered[1]
         files_list = ", ".join(self.context_files)
         rendered_info = [
             f"### REQUESTED FILES ###\nYou have requested and have access to the following files: {files_list}"
         ]
         for filename in self.context_files:
-            contents = self.files.get(filename, "")
-            processed_contents = replace_spaces_with_tabs(contents)
-            processed_contents = annotate_with_line_numbers(processed_contents)
-            file_header = f"*** {filename} ***"
-            rendered_info.append(f"{file_header}\n{processed_contents}")
-
-        for key, value in self.information.items():
-            rendered_info.append(f"*** {key} ***\n{value}")
-        return "\n\n".join(rendered_info)
+            rendered_info.append(self.render_file(filename))
+
+        for key_name, value in self.information.items():
+            rendered_info.append(f"*** {key_name} ***\n{value}")
+        rendered = "\n\n".join(rendered_info)
+        self._rendered = (key, rendered)
+        return rendered
 
     def add_file(self, filename: str) -> None:
         """
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from commands import command_replace_file
+from commands.command_files import Files
+from commands.command_replace_file import ReplaceFile
+from commands.command_search import Search
+from commands.command_terminal import Terminal
+from commands.command_think import Think
+from commands.executor import execute_commands, plan_batches
+from commands.state import State
+
+
+def test_plan_batches_keeps_conflicting_commands_apart():
+    a, b = ReplaceFile("a.py", "edit"), ReplaceFile("b.py", "edit")
+    a_again = ReplaceFile("a.py", "again")
+    think, search = Think("plan", ""), Search("foo")
+    files, terminal = Files(["c.py"]), Terminal("ls")
+    assert plan_batches([think, a, b, a_again]) == [[think], [a, b], [a_again]]
+    assert plan_batches([a, b, think]) == [[a, b, think]]
+    assert plan_batches([search, think, a]) == [[search, think], [a]]
+    assert plan_batches([a, terminal, b]) == [[a], [terminal], [b]]
+    more_files, read_a = Files(["d.py"]), Files(["a.py"])
+    assert plan_batches([files, search, a, more_files, read_a]) == [
+        [files, search],
+        [a, more_files],
+        [read_a],
+    ]
+
+
+def test_edits_to_different_files_run_concurrently(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)
+    prompts = {}
+
+    def modify_file(original, instructions, context="", file_name=None):
+        prompts[file_name] = context
+        barrier.wait()
+        return original + instructions
+
+    monkeypatch.setattr(command_replace_file, "modify_file", modify_file)
+    state = State({"a.txt": "a", "b.txt": "b", "c.txt": "c"})
+    state.add_file("a.txt")
+    commands = [ReplaceFile(name, "!") for name in ("a.txt", "b.txt", "c.txt")]
+    execute_commands(state, [Think("plan", "")] + commands)
+    assert dict(state.files) == {"a.txt": "a!", "b.txt": "b!", "c.txt": "c!"}
+    assert [turn.command for turn in state.scratch.turns] == [
+        "Function Called: Think"
+    ] + [str(command) for command in commands]
+    for prompt in prompts.values():
+        assert "Function Called: Think\nplan" in prompt
+        assert prompt.endswith("*** a.txt ***\n1: a")
+    assert state.last_command is commands[-1]
+
+
+def test_failures_are_raised_after_the_batch_is_recorded(monkeypatch):
+    def modify_file(original, instructions, context="", file_name=None):
+        if file_name == "a.txt":
+            raise ValueError("no")
+        return "new"
+
+    monkeypatch.setattr(command_replace_file, "modify_file", modify_file)
+    state = State({"a.txt": "a", "b.txt": "b"})
+    later = Think("later", "")
+    with pytest.raises(ValueError):
+        execute_commands(
+            state,
+            [ReplaceFile("a.txt", "x"), ReplaceFile("b.txt", "x"), Search("b"), later],
+        )
+    assert state.files["b.txt"] == "new"
+    assert [turn.command for turn in state.scratch.turns] == [
+        str(ReplaceFile("b.txt", "x"))
+    ]
@@ -0,0 +1,53 @@
+from commands.command_recall import Recall
+from commands.scratch import SPILL_CHARS, Scratch, digest_output
+from commands.state import State
+from utilities.rate_limit import estimate_tokens
+
+PYTEST_LOG = "\n".join(
+    ["============ test session starts ============"]
+    + [f"    line {i} of the traceback" for i in range(400)]
+    + [
+        "FAILED src/test_x.py::test_a - AssertionError",
+        "FAILED src/test_x.py::test_b - KeyError",
+        "========= 2 failed, 10 passed in 0.50s =========",
+    ]
+)
+
+
+def test_digest_recognises_pytest_runs():
+    assert digest_output("Terminal pytest", PYTEST_LOG) == (
+        "Terminal pytest -> ran pytest: 2 failed, 10 passed in 0.50s "
+        "(src/test_x.py::test_a, src/test_x.py::test_b)"
+    )
+    assert digest_output("Search foo", "a.py:1\nb.py:2") == (
+        "Search foo -> a.py:1 ... (2 lines)"
+    )
+    assert digest_output("DeleteFile a.py", "") == "DeleteFile a.py -> no output"
+
+
+def test_unbounded_scratch_keeps_everything():
+    scratch = Scratch("prompt")
+    scratch.add_turn("Terminal pytest", PYTEST_LOG)
+    assert scratch.render() == "prompt\nTerminal pytest\n" + PYTEST_LOG
+    assert not scratch.spilled
+
+
+def test_budget_compacts_old_turns_and_spills_long_outputs():
+    scratch = Scratch("prompt", token_budget=500, keep_turns=2)
+    for i in range(5):
+        scratch.add_turn(f"Think {i}", f"thought {i}")
+    scratch.add_turn("Terminal pytest", PYTEST_LOG)
+    assert len(PYTEST_LOG) > SPILL_CHARS
+    rendered = scratch.render()
+    assert estimate_tokens(rendered) <= 500
+    assert rendered.startswith("prompt\n### EARLIER COMMANDS (summarized) ###\n")
+    assert "Think 3 -> thought 3\nThink 4\nthought 4" in rendered
+    assert "line 200 of" not in rendered
+    assert "stored as output-1" in rendered
+    assert rendered.endswith("========= 2 failed, 10 passed in 0.50s =========")
+    state = State({})
+    state.scratch = scratch
+    page = Recall("output-1", 200).execute(state)
+    assert page.startswith("200:     line 198 of the traceback")
+    assert "continue with start_line=300" in page
+    assert "Stored outputs: output-1" in Recall("output-9").execute(state)
@@ -0,0 +1,4 @@
+# Tests sit next to the files they cover, so pytest puts src/commands on
+# sys.path when it collects src/commands/test_*.py, where commands.py would
+# shadow the commands package. Import the package first so it wins.
+import commands  # noqa: F401
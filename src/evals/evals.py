@@ -1,8 +1,16 @@
+import copy
+import shutil
+import tempfile
 from dataclasses import dataclass
-from typing import List
+from typing import Any, List, Optional
 import yaml
+import settings
 from tools.pytest import run_pytest
 from pipeline.issue import apply_prompt_to_directory
+from pipeline.project import Project
+from tracing.trace import create_trace, bind_trace
+from tracing.tags import GPT_INPUT
+from utilities.rate_limit import estimate_tokens
 
 
 @dataclass
@@ -11,20 +19,119 @@ class Eval:
     tests: List[str]
 
 
-def run_eval(eval: Eval, directory: str):
-    apply_prompt_to_directory(eval.prompt, directory)
-    test_names = " ".join(eval.tests)
-    result = run_pytest(f"{directory}/src", test_names)
-    if result is not None:
-        raise Exception(f"Pytest failed for tests: {test_names}\n{result}")
+@dataclass
+class EvalResult:
+    """The outcome of one eval run: whether its tests passed, how many GPT round trips it took and the estimated prompt tokens it sent."""
+
+    name: str
+    passed: bool
+    gpt_calls: int
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+
+
+def run_eval(name: str, eval: Eval, directory: str) -> EvalResult:
+    """Apply an eval's prompt to a scratch copy of its directory and run its tests, counting the GPT queries and prompt tokens recorded in the eval's trace.
+
+    Args:
+            name (str): The key of the eval in prompts.yaml.
+            eval (Eval): The eval.
+            directory (str): The eval directory, left untouched.
+
+    Returns:
+            EvalResult: The outcome.
+    """
+    trace_instance = create_trace(f"eval_{name}")
+    bind_trace(trace_instance)
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copytree(directory, workdir, dirs_exist_ok=True)
+        error = None
+        try:
+            apply_prompt_to_directory(eval.prompt, Project(workdir))
+            test_names = " ".join(eval.tests)
+            result = run_pytest(f"{workdir}/src", test_names)
+            if result is not None:
+                error = f"Pytest failed for tests: {test_names}\n{result}"
+        except Exception as e:
+            error = str(e)
+    inputs = [data.trace for data in trace_instance.trace_data if data.tag == GPT_INPUT]
+    prompt_tokens = sum(estimate_tokens(str(message)) for message in inputs)
+    return EvalResult(name, error is None, len(inputs), error, prompt_tokens)
+
+
+def run_suite(evals: dict, directory: str, **overrides: Any) -> List[EvalResult]:
+    """Run every eval with some settings overridden for the duration of the suite.
+
+    Args:
+            evals (dict): The evals keyed by name.
+            directory (str): The eval directory.
+            **overrides (Any): Settings attributes to replace, such as use_retrieval=False.
+
+    Returns:
+            List[EvalResult]: The outcome of each eval, in order.
+    """
+    instance = copy.copy(settings.get_settings())
+    for key, value in overrides.items():
+        setattr(instance, key, value)
+    token = settings.bind_task_settings(instance)
+    try:
+        return [run_eval(name, eval, directory) for name, eval in evals.items()]
+    finally:
+        settings.reset_task_settings(token)
+
+
+def process_evals(
+    directory: str, compare_retrieval: bool = False, compare_scratch: bool = False
+) -> None:
+    """Run the evals of a directory and report their GPT round trips and prompt tokens, optionally again without Retrieve or with an unbounded scratch to measure what each saves.
 
+    Args:
+            directory (str): The eval directory, holding prompts.yaml and the project the prompts apply to.
+            compare_retrieval (bool): Whether to also run every eval without the Retrieve command.
+            compare_scratch (bool): Whether to also run every eval with the command loop's scratch kept verbatim.
 
-def process_evals(directory: str):
+    Raises:
+            Exception: If any eval failed.
+    """
     with open(f"{directory}/prompts.yaml", "r") as file:
         data = yaml.safe_load(file)
-        evals = [
-            Eval(prompt=value["prompt"], tests=value["tests"])
+        evals = {
+            key: Eval(prompt=value["prompt"], tests=value["tests"])
             for key, value in data.items()
-        ]
-    for eval in evals:
-        run_eval(eval, directory)
+        }
+    results = run_suite(evals, directory)
+    for result in results:
+        print(
+            f"{result.name}: passed={result.passed} gpt_calls={result.gpt_calls} "
+            f"prompt_tokens={result.prompt_tokens}"
+        )
+    baselines = []
+    if compare_retrieval:
+        baseline = run_suite(evals, directory, use_retrieval=False)
+        for result, without in zip(results, baseline):
+            print(
+                f"{result.name}: {without.gpt_calls} GPT calls without Retrieve, "
+                f"{result.gpt_calls} with, {without.gpt_calls - result.gpt_calls} saved"
+            )
+        saved = sum(b.gpt_calls for b in baseline) - sum(r.gpt_calls for r in results)
+        print(f"Retrieve saved {saved} GPT calls over {len(results)} evals")
+        baselines += baseline
+    if compare_scratch:
+        baseline = run_suite(evals, directory, scratch_token_budget=None)
+        for result, unbounded in zip(results, baseline):
+            print(
+                f"{result.name}: {unbounded.prompt_tokens} prompt tokens with an "
+                f"unbounded scratch, {result.prompt_tokens} with compaction"
+            )
+        before = sum(b.prompt_tokens for b in baseline)
+        after = sum(r.prompt_tokens for r in results)
+        print(
+            f"Scratch compaction: {before} prompt tokens before, {after} after "
+            f"over {len(results)} evals"
+        )
+        baselines += baseline
+    failed = [result for result in results + baselines if not result.passed]
+    if failed:
+        raise Exception(
+            "\n".join(f"Eval {result.name} failed: {result.error}" for result in failed)
+        )
@@ -1,26 +1,230 @@
-import os
-from openai import OpenAI
+import asyncio
+import json
 import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from openai import RateLimitError
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
+)
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message import FunctionCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+from openai.types.completion_usage import CompletionUsage
 from termcolor import cprint
 from tracing.trace import trace
-from tracing.tags import GPT_INPUT, GPT_OUTPUT
-from utilities.cache import memoize
+from tracing.tags import GPT_INPUT, GPT_OUTPUT, METRIC
+from utilities.engine import get_engine
 from utilities.prompts import load_prompt
+from utilities.rate_limit import estimate_tokens, get_rate_limiter
+from utilities.response_cache import canonical_key, get_response_cache
 from settings import get_settings
 
 GPT_3_5 = "gpt-3.5-turbo-1106"
 GPT_4 = "gpt-4o-2024-05-13"
 SYSTEM_CHECK_FUNC = load_prompt("check")
 SYSTEM_COMMAND_FUNC = load_prompt("command")
-client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSIONS = 1536
+EMBEDDING_MAX_TOKENS = 8191
+EMBEDDING_BATCH_MAX_INPUTS = 2048
+EMBEDDING_BATCH_MAX_TOKENS = 32768
+ESTIMATED_COMPLETION_TOKENS = 1024
 
+TokenCallback = Callable[[str, str], bool]
+"""Streaming callback receiving each new text or argument fragment and everything accumulated so far for that output; returning False aborts the stream."""
 
-def gpt_query(
+
+class StreamAborted(Exception):
+    """Raised when a streaming callback rejects a completion before it finishes."""
+
+    def __init__(self, partial: str):
+        super().__init__(f"Stream aborted after {len(partial)} characters")
+        self.partial = partial
+
+
+def response_cache_key(
+    model: str,
+    system: str,
+    messages: list,
+    tools: Optional[list] = None,
+    temperature: Optional[float] = None,
+) -> str:
+    """
+    Build the content-addressed response cache key for a chat request from everything that determines the model's answer.
+
+    Arguments:
+    model: A str naming the model.
+    system: A str holding the system prompt.
+    messages: A list of the non-system chat messages.
+    tools: Optional; A list of the function or tool schemas offered to the model.
+    temperature: Optional; A float sampling temperature, or None for the API default.
+
+    Returns:
+    A str SHA-256 hex digest identifying the request.
+    """
+    return canonical_key(
+        {
+            "model": model,
+            "system": system,
+            "messages": messages,
+            "tools": tools,
+            "temperature": temperature,
+        }
+    )
+
+
+async def rate_limited_request(
+    model: str,
+    estimated_tokens: int,
+    request: Callable[[], Awaitable[Any]],
+    record_usage: bool = True,
+) -> Any:
+    """
+    Send a raw-response API request through the shared rate limiter for the model, queueing until the request fits the budget and waiting out 429 responses instead of failing.
+
+    Arguments:
+    model: A str naming the model whose rate limiter paces the request.
+    estimated_tokens: An int estimate of the prompt plus completion tokens the request will use.
+    request: A callable returning an awaitable raw API response (a with_raw_response create call).
+    record_usage: A bool indicating whether to reconcile the estimate with the response's usage; streams have none and reconcile themselves.
+
+    Returns:
+    The parsed API response object.
+    """
+    limiter = get_rate_limiter(model)
+    while True:
+        await limiter.acquire(estimated_tokens)
+        try:
+            response = await request()
+        except RateLimitError as e:
+            limiter.record_usage(estimated_tokens, 0)
+            if e.code == "insufficient_quota":
+                raise
+            delay = limiter.back_off(e.response.headers)
+            cprint(f"Rate limited on {model}, queueing for {delay:.1f}s", "yellow")
+            continue
+        limiter.update_from_headers(response.headers)
+        result = response.parse()
+        if record_usage:
+            limiter.record_usage(estimated_tokens, result.usage.total_tokens)
+        return result
+
+
+async def stream_chat_completion(
+    request_args: dict, on_token: TokenCallback
+) -> ChatCompletion:
+    """
+    Stream a chat completion, passing each content, function call or tool call argument fragment to on_token as it arrives, and assemble the fragments into a regular ChatCompletion.
+
+    Arguments:
+    request_args: A dict of chat completion arguments (model, messages and optionally functions or tools).
+    on_token: A TokenCallback invoked on the engine loop for every fragment; returning False aborts the stream with StreamAborted.
+
+    Returns:
+    A ChatCompletion equivalent to the non-streaming response, with estimated usage.
+    """
+    client = get_engine().client
+    model = request_args["model"]
+    prompt_tokens = estimate_tokens(json.dumps(request_args))
+    estimated_tokens = prompt_tokens + ESTIMATED_COMPLETION_TOKENS
+    start_time = time.time()
+    stream = await rate_limited_request(
+        model,
+        estimated_tokens,
+        lambda: client.chat.completions.with_raw_response.create(
+            stream=True, **request_args
+        ),
+        record_usage=False,
+    )
+    content = ""
+    function_call: Optional[Dict[str, str]] = None
+    tool_calls: Dict[int, Dict[str, str]] = {}
+    finish_reason = "stop"
+    first_token_time = None
+    chunks = 0
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
+            finish_reason = choice.finish_reason or finish_reason
+            fragment, accumulated = "", ""
+            if delta.content:
+                content += delta.content
+                fragment, accumulated = delta.content, content
+            if delta.function_call:
+                function_call = function_call or {"name": "", "arguments": ""}
+                function_call["name"] += delta.function_call.name or ""
+                fragment = delta.function_call.arguments or ""
+                function_call["arguments"] += fragment
+                accumulated = function_call["arguments"]
+            for tool_delta in delta.tool_calls or []:
+                call = tool_calls.setdefault(
+                    tool_delta.index, {"id": "", "name": "", "arguments": ""}
+                )
+                call["id"] = tool_delta.id or call["id"]
+                if tool_delta.function:
+                    call["name"] += tool_delta.function.name or ""
+                    fragment = tool_delta.function.arguments or ""
+                    call["arguments"] += fragment
+                    accumulated = call["arguments"]
+            if not fragment:
+                continue
+            chunks += 1
+            if first_token_time is None:
+                first_token_time = time.time()
+            if on_token(fragment, accumulated) is False:
+                raise StreamAborted(accumulated)
+    finally:
+        await stream.response.aclose()
+        get_rate_limiter(model).record_usage(estimated_tokens, prompt_tokens + chunks)
+        if first_token_time is not None:
+            generation_time = max(time.time() - first_token_time, 1e-6)
+            trace(
+                METRIC,
+                f"time to first token: {first_token_time - start_time:.2f}s, "
+                f"{chunks / generation_time:.1f} tokens/s over {chunks} tokens",
+            )
+    message = ChatCompletionMessage(
+        role="assistant",
+        content=content or None,
+        function_call=FunctionCall(**function_call) if function_call else None,
+        tool_calls=[
+            ChatCompletionMessageToolCall(
+                id=call["id"],
+                type="function",
+                function=Function(name=call["name"], arguments=call["arguments"]),
+            )
+            for _, call in sorted(tool_calls.items())
+        ]
+        or None,
+    )
+    return ChatCompletion(
+        id="stream",
+        object="chat.completion",
+        created=int(start_time),
+        model=model,
+        choices=[Choice(finish_reason=finish_reason, index=0, message=message)],
+        usage=CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=chunks,
+            total_tokens=prompt_tokens + chunks,
+        ),
+    )
+
+
+async def gpt_query_async(
     message: str,
     system: str,
     functions=None,
     model: str = GPT_4,
     require_function: bool = True,
+    on_token: Optional[TokenCallback] = None,
+    temperature: Optional[float] = None,
+    cache: bool = False,
 ) -> str:
     """
     Get a response from the GPT model based on the input message and system state.
@@ -31,6 +235,9 @@ def gpt_query(
     functions: Optional; A list of dict representing the functions that can be used within the GPT model.
     model: A str representing the model to be used. Defaults to GPT_4.
     require_function: A bool indicating whether a function response is required. Defaults to True.
+    on_token: Optional; A TokenCallback that switches to a streaming request and receives fragments as they arrive, returning False to abort.
+    temperature: Optional; A float sampling temperature, or None for the API default.
+    cache: A bool opting in to the shared response cache, so identical requests are answered without an API call. Defaults to False.
 
     Returns:
     str: A string representing the GPT model's output or function call result.
@@ -40,60 +247,135 @@ def gpt_query(
         raise ValueError("Input exceeds maximum allowed character count")
     if model not in [GPT_4, GPT_3_5]:
         raise ValueError("Invalid model specified. Must be 'gpt-4' or 'gpt-3.5-turbo'.")
+    client = get_engine().client
     trace(GPT_INPUT, message)
-    retries = 2
-    backoff = 1
-    for i in range(retries):
-        try:
-            start_time = time.time()
-            cprint(f"GPT Input: {message}", "blue")
-            messages = [
-                {"role": "system", "content": system},
-                {"role": "user", "content": message},
-            ]
-            if functions is not None:
-                completion = client.chat.completions.create(
-                    model=model, messages=messages, functions=functions
-                )
-            else:
-                completion = client.chat.completions.create(
-                    model=model, messages=messages
-                )
-            function_call = completion.choices[0].message.function_call
-            if functions is not None and function_call is None and require_function:
+    cache_key = None
+    if cache:
+        cache_key = response_cache_key(
+            model,
+            system,
+            [{"role": "user", "content": message}],
+            functions,
+            temperature,
+        )
+
+    async def request() -> str:
+        retries = 2
+        backoff = 1
+        for i in range(retries):
+            try:
+                start_time = time.time()
+                cprint(f"GPT Input: {message}", "blue")
+                messages = [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": message},
+                ]
+                request_args = {"model": model, "messages": messages}
+                if functions is not None:
+                    request_args["functions"] = functions
+                if temperature is not None:
+                    request_args["temperature"] = temperature
+                if on_token is not None:
+                    completion = await stream_chat_completion(request_args, on_token)
+                else:
+                    completion = await rate_limited_request(
+                        model,
+                        estimate_tokens(json.dumps(request_args))
+                        + ESTIMATED_COMPLETION_TOKENS,
+                        lambda: client.chat.completions.with_raw_response.create(
+                            **request_args
+                        ),
+                    )
+                function_call = completion.choices[0].message.function_call
+                if functions is not None and function_call is None and require_function:
+                    cprint(
+                        f"No functions returned. Message received: {completion.choices[0].message.content}",
+                        "red",
+                    )
+                    raise Exception("No functions returned")
+                end_time = time.time()
+                call_duration = end_time - start_time
+                tokens_in = completion.usage.prompt_tokens
+                tokens_out = completion.usage.completion_tokens
                 cprint(
-                    f"No functions returned. Message received: {completion.choices[0].message.content}",
-                    "red",
+                    f"Call took {call_duration:.1f}s, {tokens_in} tokens in, {tokens_out} tokens out",
+                    "yellow",
                 )
-                raise Exception("No functions returned")
-            end_time = time.time()
-            call_duration = end_time - start_time
-            tokens_in = completion.usage.prompt_tokens
-            tokens_out = completion.usage.completion_tokens
-            cprint(
-                f"Call took {call_duration:.1f}s, {tokens_in} tokens in, {tokens_out} tokens out",
-                "yellow",
-            )
-            break
-        except Exception as e:
-            if i == retries - 1:
-                raise e
-            time.sleep(backoff)
-            backoff *= 2
-    if function_call is not None:
-        function_result = function_call
-        trace(GPT_OUTPUT, function_result, (tokens_in, tokens_out))
-        cprint(f"Function call result: {function_result}", "cyan")
-        return function_result
-    else:
-        content = completion.choices[0].message.content
-        trace(GPT_OUTPUT, content, (tokens_in, tokens_out))
-        cprint(f"GPT Output: {content}", "cyan")
-        return content
+                break
+            except StreamAborted:
+                raise
+            except Exception as e:
+                if i == retries - 1:
+                    raise e
+                await asyncio.sleep(backoff)
+                backoff *= 2
+        if function_call is not None:
+            result = function_call
+            trace(GPT_OUTPUT, result, (tokens_in, tokens_out))
+            cprint(f"Function call result: {result}", "cyan")
+        else:
+            result = completion.choices[0].message.content
+            trace(GPT_OUTPUT, result, (tokens_in, tokens_out))
+            cprint(f"GPT Output: {result}", "cyan")
+        return result
 
+    if cache_key is None:
+        return await request()
+    hit, result = await get_response_cache().get_or_compute(cache_key, request)
+    if hit:
+        trace(GPT_OUTPUT, result)
+        cprint(f"Cached GPT Output: {result}", "cyan")
+    return result
 
-def gpt_query_tools(
-    message: str, system: str, functions: list, model: str = GPT_4
+
+def gpt_query(
+    message: str,
+    system: str,
+    functions=None,
+    model: str = GPT_4,
+    require_function: bool = True,
+    on_token: Optional[TokenCallback] = None,
+    temperature: Optional[float] = None,
+    cache: bool = False,
+) -> str:
+    """
+    Synchronous wrapper around gpt_query_async that runs the request on the shared request engine and blocks until it completes.
+
+    Arguments:
+    message: A str representing the input message for the GPT model.
+    system: A str representing the system state input for the GPT model.
+    functions: Optional; A list of dict representing the functions that can be used within the GPT model.
+    model: A str representing the model to be used. Defaults to GPT_4.
+    require_function: A bool indicating whether a function response is required. Defaults to True.
+    on_token: Optional; A TokenCallback that switches to a streaming request and receives fragments as they arrive, returning False to abort.
+    temperature: Optional; A float sampling temperature, or None for the API default.
+    cache: A bool opting in to the shared response cache, so identical requests are answered without an API call. Defaults to False.
+
+    Returns:
+    str: A string representing the GPT model's output or function call result.
+    """
+    return get_engine().run(
+        gpt_query_async(
+            message,
+            system,
+            functions,
+            model,
+            require_function,
+            on_token,
+            temperature,
+            cache,
+        )
+    )
+
+
+async def gpt_query_tools_async(
+    message: str,
+    system: str,
+    functions: list,
+    model: str = GPT_4,
+    on_token: Optional[TokenCallback] = None,
+    temperature: Optional[float] = None,
+    cache: bool = False,
 ) -> list:
     """
     This function makes a query to the GPT model with specific system messages and function calls, then returns the function calls made by the model.
@@ -103,6 +385,9 @@ def gpt_query_tools(
     system: A str representing the system's part of the conversation.
     functions: A list of functions to be sent to the GPT model.
     model: A str representing the GPT model to be used. Defaults to 'gpt-4'.
+    on_token: Optional; A TokenCallback that switches to a streaming request and receives tool call argument fragments as they arrive, returning False to abort.
+    temperature: Optional; A float sampling temperature, or None for the API default.
+    cache: A bool opting in to the shared response cache, so identical requests are answered without an API call. Defaults to False.
 
     Returns:
     A list of function calls made by the GPT model.
@@ -113,50 +398,206 @@ def gpt_query_tools(
         raise ValueError("Input exceeds maximum allowed character count")
     if model not in [GPT_4, GPT_3_5]:
         raise ValueError("Invalid model specified. Must be 'gpt-4' or 'gpt-3.5-turbo'.")
+    client = get_engine().client
     trace(GPT_INPUT, message)
-    retries = 2
-    backoff = 1
-    for i in range(retries):
-        try:
-            start_time = time.time()
-            cprint(f"GPT Input: {message}", "blue")
-            messages = [
-                {"role": "system", "content": system},
-                {"role": "user", "content": message},
-            ]
-            completion = client.chat.completions.create(
-                model=model, messages=messages, tools=tools
-            )
-            tool_calls = completion.choices[0].message.tool_calls
-            if tool_calls is None:
+    cache_key = None
+    if cache:
+        cache_key = response_cache_key(
+            model, system, [{"role": "user", "content": message}], tools, temperature
+        )
+
+    async def request() -> list:
+        retries = 2
+        backoff = 1
+        for i in range(retries):
+            try:
+                start_time = time.time()
+                cprint(f"GPT Input: {message}", "blue")
+                messages = [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": message},
+                ]
+                request_args = {"model": model, "messages": messages, "tools": tools}
+                if temperature is not None:
+                    request_args["temperature"] = temperature
+                if on_token is not None:
+                    completion = await stream_chat_completion(request_args, on_token)
+                else:
+                    completion = await rate_limited_request(
+                        model,
+                        estimate_tokens(json.dumps(request_args))
+                        + ESTIMATED_COMPLETION_TOKENS,
+                        lambda: client.chat.completions.with_raw_response.create(
+                            **request_args
+                        ),
+                    )
+                tool_calls = completion.choices[0].message.tool_calls
+                if tool_calls is None:
+                    cprint(
+                        f"No tool calls returned. Message received: {completion.choices[0].message.content}",
+                        "red",
+                    )
+                    raise Exception("No tool calls returned")
+                end_time = time.time()
+                call_duration = end_time - start_time
+                tokens_in = completion.usage.prompt_tokens
+                tokens_out = completion.usage.completion_tokens
                 cprint(
-                    f"No tool calls returned. Message received: {completion.choices[0].message.content}",
-                    "red",
+                    f"Call took {call_duration:.1f}s, {tokens_in} tokens in, {tokens_out} tokens out",
+                    "yellow",
                 )
-                raise Exception("No tool calls returned")
-            end_time = time.time()
-            call_duration = end_time - start_time
-            tokens_in = completion.usage.prompt_tokens
-            tokens_out = completion.usage.completion_tokens
-            cprint(
-                f"Call took {call_duration:.1f}s, {tokens_in} tokens in, {tokens_out} tokens out",
-                "yellow",
-            )
-            break
-        except Exception as e:
-            if i == retries - 1:
-                raise e
-            time.sleep(backoff)
-            backoff *= 2
-    function_calls = [call.function for call in tool_calls]
-    trace(GPT_OUTPUT, function_calls, (tokens_in, tokens_out))
-    cprint(f"Function calls result: {function_calls}", "cyan")
+                break
+            except StreamAborted:
+                raise
+            except Exception as e:
+                if i == retries - 1:
+                    raise e
+                await asyncio.sleep(backoff)
+                backoff *= 2
+        function_calls = [call.function for call in tool_calls]
+        trace(GPT_OUTPUT, function_calls, (tokens_in, tokens_out))
+        cprint(f"Function calls result: {function_calls}", "cyan")
+        return function_calls
+
+    if cache_key is None:
+        return await request()
+    hit, function_calls = await get_response_cache().get_or_compute(cache_key, request)
+    if hit:
+        trace(GPT_OUTPUT, function_calls)
+        cprint(f"Cached function calls result: {function_calls}", "cyan")
     return function_calls
 
 
-@memoize
+def gpt_query_tools(
+    message: str,
+    system: str,
+    functions: list,
+    model: str = GPT_4,
+    on_token: Optional[TokenCallback] = None,
+    temperature: Optional[float] = None,
+    cache: bool = False,
+) -> list:
+    """
+    Synchronous wrapper around gpt_query_tools_async that runs the request on the shared request engine and blocks until it completes.
+
+    Arguments:
+    message: A str representing the user message to be sent to the GPT model.
+    system: A str representing the system's part of the conversation.
+    functions: A list of functions to be sent to the GPT model.
+    model: A str representing the GPT model to be used. Defaults to 'gpt-4'.
+    on_token: Optional; A TokenCallback that switches to a streaming request and receives tool call argument fragments as they arrive, returning False to abort.
+    temperature: Optional; A float sampling temperature, or None for the API default.
+    cache: A bool opting in to the shared response cache, so identical requests are answered without an API call. Defaults to False.
+
+    Returns:
+    A list of function calls made by the GPT model.
+    """
+    return get_engine().run(
+        gpt_query_tools_async(
+            message, system, functions, model, on_token, temperature, cache
+        )
+    )
+
+
+def embedding_batches(texts: List[str]) -> List[List[str]]:
+    """Group texts, in order, into batches that fit in one embeddings request by input count and estimated token total.
+
+    Arguments:
+    texts: A list of str inputs to group.
+
+    Returns:
+    A list of batches, each a list of str inputs.
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (
+            len(batch) >= EMBEDDING_BATCH_MAX_INPUTS
+            or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def calculate_text_embeddings_async(
+    texts: List[str], max_concurrency: int = 4
+) -> List[list]:
+    """Calculate embeddings for many texts, answering cached texts from the response cache, waiting on texts another caller is already embedding, and sending only the remaining misses in token-bounded batches, at most max_concurrency batches at a time.
+
+    Arguments:
+    texts: A list of str inputs to embed; duplicates are embedded once.
+    max_concurrency: An int limit on embeddings requests in flight. Defaults to 4.
+
+    Returns:
+    A list with the embedding of each input text, in input order.
+    """
+    cache = get_response_cache()
+    embeddings: Dict[str, list] = {}
+    misses: List[str] = []
+    in_flight: Dict[str, asyncio.Future] = {}
+    for text in dict.fromkeys(texts):
+        key = canonical_key({"model": EMBEDDING_MODEL, "input": text})
+        hit, cached = cache.get(key)
+        if hit:
+            embeddings[text] = cached
+            continue
+        leader, future = cache.join(key)
+        if leader:
+            misses.append(text)
+        else:
+            in_flight[text] = future
+    client = get_engine().client
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed(batch: List[str]) -> None:
+        keys = [canonical_key({"model": EMBEDDING_MODEL, "input": t}) for t in batch]
+        try:
+            async with semaphore:
+                result = await rate_limited_request(
+                    EMBEDDING_MODEL,
+                    sum(estimate_tokens(text) for text in batch),
+                    lambda: client.embeddings.with_raw_response.create(
+                        model=EMBEDDING_MODEL, input=batch
+                    ),
+                )
+        except BaseException as e:
+            for key in keys:
+                cache.finish(key, error=e)
+            raise
+        for item in result.data:
+            embedding = list(item.embedding)
+            embeddings[batch[item.index]] = embedding
+            cache.finish(keys[item.index], embedding)
+
+    await asyncio.gather(*[embed(batch) for batch in embedding_batches(misses)])
+    for text, future in in_flight.items():
+        embeddings[text] = await asyncio.shield(future)
+    return [embeddings[text] for text in texts]
+
+
+def calculate_text_embeddings(texts: List[str], max_concurrency: int = 4) -> List[list]:
+    """Calculate embeddings for many texts in batched, concurrent requests, blocking until all are done.
+
+    Arguments:
+    texts: A list of str inputs to embed.
+    max_concurrency: An int limit on embeddings requests in flight. Defaults to 4.
+
+    Returns:
+    A list with the embedding of each input text, in input order.
+    """
+    if not texts:
+        return []
+    return get_engine().run(calculate_text_embeddings_async(texts, max_concurrency))
+
+
 def calculate_text_embedding(text: str) -> list:
-    """Calculate text embedding using OpenAI embedding model for the input text.
+    """Calculate text embedding using OpenAI embedding model for the input text, answering repeated texts from the response cache.
 
     Arguments:
     text: A str representing the input text to calculate embeddings for.
@@ -164,13 +605,9 @@ def calculate_text_embedding(text: str) -> list:
     Returns:
     list: A list representing the numerical embedding of the input text.
     """
-    embedding_result = client.embeddings.create(
-        model="text-embedding-ada-002", input=text
-    )
-    return list(embedding_result.data[0].embedding)
+    return calculate_text_embeddings([text])[0]
 
 
-@memoize
 def cached_gpt_query(
     message: str,
     system: str,
@@ -178,4 +615,4 @@ def cached_gpt_query(
     model: str = GPT_4,
     require_function: bool = True,
 ) -> str:
-    return gpt_query(message, system, functions, model, require_function)
+    return gpt_query(message, system, functions, model, require_function, cache=True)
@@ -9,8 +9,11 @@ import repo
 from evals.evals import process_evals
 from tracing.trace import create_trace, bind_trace, trace
 from website.analysis import print_analysis
+from utilities.cache import SQLiteKeyValueStore, migrate_directory
+from utilities.mapped_vectors import MappedVectorStore
 from tracing.tags import EXCEPTION
 import os
+import importlib
 import settings
 
 
@@ -117,8 +120,10 @@ def process_repository(
         pass
 
 
-def evals(directory: str) -> None:
-    process_evals(directory)
+def evals(
+    directory: str, compare_retrieval: bool = False, compare_scratch: bool = False
+) -> None:
+    process_evals(directory, compare_retrieval, compare_scratch)
 
 
 def main() -> None:
@@ -139,6 +144,16 @@ def main() -> None:
         required=False,
         default=None,
     )
+    parser.add_argument(
+        "--compare-retrieval",
+        action="store_true",
+        help="Run the evals a second time without the Retrieve command and report the GPT calls it saves",
+    )
+    parser.add_argument(
+        "--compare-scratch",
+        action="store_true",
+        help="Run the evals a second time with an unbounded command loop scratch and report the prompt tokens compaction saves",
+    )
     parser.add_argument(
         "--analysis", action="store_true", help="Activate analysis mode"
     )
@@ -155,13 +170,49 @@ def main() -> None:
         action="store_true",
         help="Enable the use of the new OpenAI tools API",
     )
+    parser.add_argument(
+        "--benchmark",
+        type=str,
+        help="Run the named benchmark from src/benchmarks, passing any remaining arguments to it",
+        required=False,
+        default=None,
+    )
+    parser.add_argument(
+        "--migrate-cache",
+        type=str,
+        nargs="?",
+        const=".cache/",
+        help="Import the pickle files of a file backed cache directory into the SQLite cache",
+        required=False,
+        default=None,
+    )
+    parser.add_argument(
+        "--compact-index",
+        type=str,
+        help="Drop stale entries from the on-disk vector index in the given directory",
+        required=False,
+        default=None,
+    )
     parser.add_argument(
         "--squash-merge",
         action="store_true",
         help="Enable squash merging for pull requests when processing repositories.",
     )
-    args = parser.parse_args()
+    args, extra_args = parser.parse_known_args()
     settings.PARSED_ARGS = vars(args)
+    if args.benchmark:
+        importlib.import_module(f"benchmarks.{args.benchmark}").run(extra_args)
+        sys.exit(0)
+    if extra_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    if args.migrate_cache:
+        count = migrate_directory(SQLiteKeyValueStore(), args.migrate_cache)
+        print(f"Migrated {count} cache entries from {args.migrate_cache}")
+        sys.exit(0)
+    if args.compact_index:
+        removed = MappedVectorStore(args.compact_index).compact()
+        print(f"Removed {removed} stale entries from {args.compact_index}")
+        sys.exit(0)
     if args.analysis:
         repo_dir = os.getcwd()
         print_analysis(repo_dir)
@@ -172,7 +223,7 @@ def main() -> None:
         repl()
         sys.exit(0)
     if args.evals:
-        evals(args.evals)
+        evals(args.evals, args.compare_retrieval, args.compare_scratch)
     else:
         for repository in settings.REPOSITORY_PATH:
             process_repository(
@@ -3,11 +3,11 @@ import uuid
 import subprocess
 import gpt
 from utils import (
-    read_file,
     write_file,
     add_line_numbers,
     list_files,
     synchronize_files_write,
+    changed_files,
 )
 from commands import command
 from commands.commands import (
@@ -16,6 +16,7 @@ from commands.commands import (
     Files,
     ReplaceFile,
     Search,
+    Retrieve,
     DeleteFile,
     COMMANDS_CHECK,
     COMMANDS_GENERATE,
@@ -33,6 +34,7 @@ from tools.pytest import run_pytest
 from tools.advice import generate_advice
 from utilities.prompts import load_prompt
 from pipeline.issue_state import IssueState
+from utilities.lazy_files import LazyFileMap
 
 
 class QualityException(Exception):
@@ -40,16 +42,9 @@ class QualityException(Exception):
 
 
 def check_result(old_files, new_files, prompt) -> bool:
-    old_files_filtered = {
-        k: v
-        for k, v in old_files.items()
-        if k in new_files and v != new_files[k] or k not in new_files
-    }
-    new_files_filtered = {
-        k: v
-        for k, v in new_files.items()
-        if k in old_files and v != old_files[k] or k not in old_files
-    }
+    changed = changed_files(old_files, new_files)
+    old_files_filtered = {k: old_files[k] for k in changed if k in old_files}
+    new_files_filtered = {k: new_files[k] for k in changed if k in new_files}
     command, state = command_loop(
         f"""ORIGINAL:
 {list_files(old_files_filtered)}
@@ -60,6 +55,7 @@ OBJECTIVE:
         gpt.SYSTEM_CHECK_FUNC,
         COMMANDS_CHECK,
         new_files,
+        cache=True,
     )
     if not command.verdict:
         raise Exception("NEGATIVE VERDICT: " + command.reasoning)
@@ -79,10 +75,15 @@ def apply_prompt_to_files(prompt: str, files: dict, project: Project = None) ->
         "style": style,
     }
     prompt = load_prompt("issue", context)
+    commands = [
+        command_class
+        for command_class in COMMANDS_GENERATE
+        if command_class is not Retrieve or settings.get_settings().use_retrieval
+    ]
     command, state = command_loop(
         prompt,
         gpt.SYSTEM_COMMAND_FUNC,
-        COMMANDS_GENERATE,
+        commands,
         files,
         target_dir=project.path if project else None,
     )
@@ -91,11 +92,11 @@ def apply_prompt_to_files(prompt: str, files: dict, project: Project = None) ->
 
 
 def apply_prompt_to_directory(prompt: str, project: Project) -> None:
-    files = {
-        f: read_file(os.path.join(project.path, f))
-        for f in repo.list_files(project.path, settings.GITIGNORE_PATH)
-        if os.path.isfile(os.path.join(project.path, f))
-    }
+    files = LazyFileMap(
+        project.path,
+        repo.list_files(project.path, settings.GITIGNORE_PATH),
+        settings.get_settings().max_file_bytes,
+    )
     updated_files = apply_prompt_to_files(prompt, files, project=project)
     synchronize_files_write(project.path, files, updated_files)
 
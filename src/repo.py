@@ -1,6 +1,6 @@
 import re
 import shutil
-from git import Repo
+from git import Blob, Repo
 from github import Github
 import os
 import pathspec
@@ -8,7 +8,7 @@ from dataclasses import dataclass
 import time
 import subprocess
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -186,6 +186,19 @@ def get_all_checked_in_files(target_dir: str = os.getcwd()) -> List[str]:
     return file_list
 
 
+def get_checked_in_blobs(target_dir: str = os.getcwd()) -> Dict[str, Blob]:
+    """Map every file in the HEAD tree to its git blob, whose hexsha identifies the file's content.
+
+    Args:
+            target_dir (str): The repository directory.
+
+    Returns:
+            Dict[str, Blob]: The blob of each checked in file, keyed by path.
+    """
+    repo = Repo(target_dir)
+    return {obj.path: obj for obj in repo.tree().traverse() if obj.type == "blob"}
+
+
 def fetch_new_changes(target_dir: str = os.getcwd()) -> None:
     repo = Repo(target_dir)
     repo.git.fetch()
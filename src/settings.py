@@ -1,5 +1,6 @@
 import yaml
 import threading
+from contextvars import ContextVar, Token
 from typing import Optional, Any, List
 
 PARSED_ARGS: Optional[Any] = None
@@ -8,6 +9,9 @@ PARSED_ARGS: Optional[Any] = None
 This constant is intended to be set in main.py with the actual parsed arguments from the command line after argparse processing. It is initialized as None and should be of type Optional[dict] to allow for type checking and to indicate that it may not yet be set at the time of module import.
 """
 _thread_local_settings = threading.local()
+_task_settings: ContextVar[Optional["Settings"]] = ContextVar(
+    "task_settings", default=None
+)
 
 
 class Settings:
@@ -22,11 +26,42 @@ class Settings:
         """
         self.reviewers: List[str] = []
         self.max_workers: int = 10
+        self.max_connections_per_worker: int = 4
+        """The number of pooled OpenAI connections reserved per worker; the request engine pool holds max_workers times this many sockets."""
         self.max_input_chars: int = 48000
+        self.requests_per_minute: int = 500
+        self.tokens_per_minute: int = 30000
+        """Initial per-model OpenAI budgets for the shared rate limiter, refined at runtime from the x-ratelimit response headers."""
         self.use_tools: bool = True
+        self.response_cache_max_bytes: int = 512 * 1024 * 1024
+        self.response_cache_ttl: Optional[float] = None
+        """Size cap and optional expiry in seconds of the content-addressed LLM response cache used by callers that opt in with cache=True."""
+        self.cache_backend: str = "sqlite"
+        """The KeyValueStore backend behind read, write and memoize: 'sqlite' for one WAL database file, or 'files' for the legacy pickle file per key."""
+        self.memoize_max_entries: int = 1024
+        self.memoize_max_bytes: int = 64 * 1024 * 1024
+        """Bounds of the in-memory LRU tier each @memoize function keeps in front of the KeyValueStore."""
+        self.max_file_bytes: Optional[int] = 1024 * 1024
+        """The largest file loaded into an issue's file map; larger files and binary files are left out, or None to include every text file."""
+        self.format_cache_max_bytes: int = 32 * 1024 * 1024
+        self.format_worker: bool = False
+        """The characters of black output kept per content hash, and whether black runs in a persistent worker process so formatting concurrent edits is not serialized on this process's GIL."""
+        self.use_retrieval: bool = True
+        """Whether the generation loop offers the Retrieve command, which ranks code by BM25 and embedding similarity."""
+        self.retrieval_index_path: str = ".cache/embeddings/"
+        self.retriever_cache_max_entries: int = 4
+        self.retriever_cache_max_bytes: int = 256 * 1024 * 1024
+        """The on-disk index holding chunk embeddings by blob SHA for every tree retrieved from, and the bounds of the in-memory LRU of built retrievers."""
         self.quality_checks: bool = True
         self.max_issue_retries: int = 2
         self.max_loop_length: int = 15
+        self.scratch_token_budget: Optional[int] = 6000
+        self.scratch_keep_turns: int = 3
+        """The estimated tokens a command loop's transcript is held to, keeping the prompt and the last scratch_keep_turns commands verbatim and digesting older ones; None keeps every command and output verbatim."""
+        self.edit_mode: str = "edits"
+        """How ReplaceFile asks for changes to an existing file: 'edits' for SEARCH/REPLACE blocks applied locally, regenerating the file only when they do not apply, or 'full' to always regenerate the whole file."""
+        self.max_parallel_commands: int = 4
+        """The most tool calls of one response run concurrently, when they declare footprints that do not conflict, such as edits to different files; 1 runs them one at a time."""
         self.check_open_pr: bool = True
         """A boolean indicating if the system should check for open pull requests.
 
@@ -89,11 +124,35 @@ def get_settings() -> Settings:
     This function fetches the Settings object associated with the thread-local storage.
     If it does not exist, it returns the global Settings instance.
     """
+    task_settings = _task_settings.get()
+    if task_settings is not None:
+        return task_settings
     if hasattr(_thread_local_settings, "settings"):
         return _thread_local_settings.settings
     return settings
 
 
+def bind_task_settings(instance: Settings) -> Token:
+    """Bind a Settings instance to the current asyncio task context so coroutines on the shared request engine see the settings of the thread that scheduled them.
+
+    Args:
+        instance (Settings): The Settings instance to bind to the current context.
+
+    Returns:
+        Token: The token that reset_task_settings takes to restore the previous binding.
+    """
+    return _task_settings.set(instance)
+
+
+def reset_task_settings(token: Token) -> None:
+    """Restore the task context binding that was in place before the bind_task_settings call that returned token.
+
+    Args:
+        token (Token): The token returned by bind_task_settings.
+    """
+    _task_settings.reset(token)
+
+
 def apply_settings(yaml_path: str) -> None:
     """Create a new Settings instance from a YAML file and store it in thread-local storage.
 
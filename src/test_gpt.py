@@ -1,7 +1,17 @@
 """
 This file 'test_gpt.py' provides a JSON schema for a test 'add' function that adds two integers together.
 It is used to demonstrate and validate the structure of test function schemas within this project.
+The tests below exercise gpt.py's streaming mode and response cache against a local mock endpoint.
 """
+
+import threading
+import pytest
+import gpt
+import utilities.engine
+from benchmarks.mock_openai import MockOpenAIServer
+from utilities.engine import RequestEngine
+from utilities.response_cache import ResponseCache
+
 ADD: dict = {
     "name": "add",
     "description": "Adds two integers together and returns the sum.",
@@ -15,3 +25,85 @@ ADD: dict = {
     },
     "returns": {"type": "integer", "description": "The sum of the two input integers."},
 }
+
+
+@pytest.fixture
+def mock_server():
+    with MockOpenAIServer(latency=0.0, reply="def f():\n\treturn 1\n" * 4) as server:
+        yield server
+
+
+@pytest.fixture
+def mock_engine(monkeypatch, mock_server):
+    engine = RequestEngine(4, api_key="test", base_url=mock_server.base_url)
+    monkeypatch.setattr(utilities.engine, "_engine", engine)
+    yield engine
+    engine.close()
+
+
+def test_gpt_query_streams_fragments(mock_engine):
+    fragments = []
+    result = gpt.gpt_query(
+        "hi", "system", on_token=lambda fragment, _: fragments.append(fragment)
+    )
+    assert result == "def f():\n\treturn 1\n" * 4
+    assert "".join(fragments) == result
+    assert len(fragments) > 1
+
+
+def test_gpt_query_stream_can_abort(mock_engine):
+    with pytest.raises(gpt.StreamAborted) as aborted:
+        gpt.gpt_query("hi", "system", on_token=lambda _, text: len(text) < 10)
+    assert 10 <= len(aborted.value.partial) < 20
+
+
+def test_gpt_query_cache_skips_repeated_requests(mock_engine, monkeypatch, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    monkeypatch.setattr(gpt, "get_response_cache", lambda: cache)
+    first = gpt.gpt_query("hi", "system", cache=True)
+    second = gpt.gpt_query("hi", "system", cache=True)
+    assert first == second
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    gpt.gpt_query("hi", "system", temperature=0.5, cache=True)
+    assert cache.stats()["misses"] == 2
+
+
+def test_calculate_text_embeddings_batches_misses(
+    mock_engine, mock_server, monkeypatch, tmp_path
+):
+    cache = ResponseCache(str(tmp_path))
+    monkeypatch.setattr(gpt, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(gpt, "EMBEDDING_BATCH_MAX_INPUTS", 3)
+    assert gpt.calculate_text_embedding("cached") == [0.0] * 8
+    assert mock_server.requests == 1
+    texts = ["cached"] + [f"text {i}" for i in range(7)] + ["text 0"]
+    embeddings = gpt.calculate_text_embeddings(texts)
+    assert len(embeddings) == len(texts)
+    assert mock_server.requests == 1 + 3
+    assert cache.stats()["entries"] == 8
+
+
+def test_concurrent_identical_misses_make_one_request(monkeypatch, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    monkeypatch.setattr(gpt, "get_response_cache", lambda: cache)
+    with MockOpenAIServer(latency=0.2, reply="answer") as server:
+        engine = RequestEngine(4, api_key="test", base_url=server.base_url)
+        monkeypatch.setattr(utilities.engine, "_engine", engine)
+        try:
+            for call in (
+                lambda: gpt.calculate_text_embedding("same"),
+                lambda: gpt.gpt_query("hi", "system", cache=True),
+            ):
+                results = []
+                threads = [
+                    threading.Thread(target=lambda: results.append(call()))
+                    for _ in range(2)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                assert results[0] == results[1]
+            assert server.requests == 2
+        finally:
+            engine.close()
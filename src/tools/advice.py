@@ -8,5 +8,6 @@ def generate_advice(goal: str) -> str:
     response = gpt_query(
         message=prompt,
         system="Given the stated goal, return a list of the advice that is relevant. Do not add new advice. Just return a list of the supplied advice verbatim that is relevant to the stated goal.",
+        cache=True,
     )
     return response
@@ -0,0 +1,194 @@
+import ast
+import json
+import re
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+MAX_CHUNK_CHARS = 6000
+WINDOW_LINES = 60
+WINDOW_OVERLAP = 10
+MODULE_SYMBOL = "<module>"
+LOCATION_PATTERN = re.compile(r"^(.*):(\d+)-(\d+)$")
+
+
+@dataclass
+class Chunk:
+    """A span of a source file embedded as one vector, with the qualified name of the symbol it covers and its 1-based inclusive line span."""
+
+    file: str
+    symbol: str
+    start_line: int
+    end_line: int
+    text: str
+
+    @property
+    def location(self) -> str:
+        """The file:start-end reference the Files command accepts.
+
+        Returns:
+                str: The location of the chunk.
+        """
+        return f"{self.file}:{self.start_line}-{self.end_line}"
+
+    def to_json(self) -> str:
+        """Serialize the chunk for storage as a vector store value.
+
+        Returns:
+                str: The chunk as a JSON object.
+        """
+        return json.dumps(asdict(self))
+
+    @staticmethod
+    def from_json(data: str) -> "Chunk":
+        """Load a chunk serialized by to_json.
+
+        Args:
+                data (str): The JSON object.
+
+        Returns:
+                Chunk: The chunk.
+        """
+        return Chunk(**json.loads(data))
+
+
+def parse_location(reference: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """Split a file reference of the form path or path:start-end into the path and an optional line span.
+
+    Args:
+            reference (str): The file reference.
+
+    Returns:
+            Tuple[str, Optional[Tuple[int, int]]]: The path, and the 1-based inclusive line span if one was given.
+    """
+    match = LOCATION_PATTERN.match(reference)
+    if match is None:
+        return reference, None
+    return match.group(1), (int(match.group(2)), int(match.group(3)))
+
+
+def chunk_windows(
+    file: str,
+    source: str,
+    symbol: str = "",
+    first_line: int = 1,
+    window_lines: int = WINDOW_LINES,
+    overlap: int = WINDOW_OVERLAP,
+    max_chars: int = MAX_CHUNK_CHARS,
+) -> List[Chunk]:
+    """Split text into overlapping windows of lines, shrinking windows whose text would exceed max_chars.
+
+    Args:
+            file (str): The file the text comes from.
+            source (str): The text to split.
+            symbol (str): The symbol recorded on every window, empty for non-Python files.
+            first_line (int): The line number of the first line of source within the file.
+            window_lines (int): The number of lines per window.
+            overlap (int): The number of lines consecutive windows share.
+            max_chars (int): The most characters a window may hold.
+
+    Returns:
+            List[Chunk]: The windows, in file order.
+    """
+    lines = source.splitlines()
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = min(start + window_lines, len(lines))
+        while end - start > 1 and len("\n".join(lines[start:end])) > max_chars:
+            end = start + max(1, (end - start) // 2)
+        text = "\n".join(lines[start:end])
+        if text.strip():
+            chunks.append(
+                Chunk(file, symbol, first_line + start, first_line + end - 1, text)
+            )
+        if end == len(lines):
+            break
+        start = max(start + 1, end - overlap)
+    return chunks
+
+
+def _span(node: ast.AST) -> Tuple[int, int]:
+    decorators = getattr(node, "decorator_list", [])
+    start = min([node.lineno] + [decorator.lineno for decorator in decorators])
+    return start, node.end_lineno
+
+
+def _chunk_body(
+    file: str,
+    lines: List[str],
+    body: List[ast.stmt],
+    prefix: str,
+    first_line: int,
+    last_line: int,
+    max_chars: int,
+) -> List[Chunk]:
+    chunks = []
+    loose_start = first_line
+
+    def flush_loose(end: int) -> None:
+        text = "\n".join(lines[loose_start - 1 : end])
+        if text.strip():
+            symbol = prefix.rstrip(".") or MODULE_SYMBOL
+            chunks.extend(
+                chunk_windows(file, text, symbol, loose_start, max_chars=max_chars)
+                if len(text) > max_chars
+                else [Chunk(file, symbol, loose_start, end, text)]
+            )
+
+    for node in body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start, end = _span(node)
+        flush_loose(start - 1)
+        symbol = prefix + node.name
+        text = "\n".join(lines[start - 1 : end])
+        if len(text) <= max_chars:
+            chunks.append(Chunk(file, symbol, start, end, text))
+        elif isinstance(node, ast.ClassDef):
+            chunks.extend(
+                _chunk_body(file, lines, node.body, symbol + ".", start, end, max_chars)
+            )
+        else:
+            chunks.extend(chunk_windows(file, text, symbol, start, max_chars=max_chars))
+        loose_start = end + 1
+    flush_loose(last_line)
+    return chunks
+
+
+def chunk_python(
+    file: str, source: str, max_chars: int = MAX_CHUNK_CHARS
+) -> List[Chunk]:
+    """Split Python source into one chunk per top-level function and class, with module-level code between them grouped into <module> chunks.
+
+    Classes too large for one chunk are split into their methods, with the remaining class body chunked under the class name, and anything still too large falls back to windows. Source that does not parse is chunked as plain text.
+
+    Args:
+            file (str): The path of the file.
+            source (str): The Python source.
+            max_chars (int): The most characters a chunk may hold.
+
+    Returns:
+            List[Chunk]: The chunks, in file order.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return chunk_windows(file, source, max_chars=max_chars)
+    lines = source.splitlines()
+    return _chunk_body(file, lines, tree.body, "", 1, len(lines), max_chars)
+
+
+def chunk_file(file: str, source: str, max_chars: int = MAX_CHUNK_CHARS) -> List[Chunk]:
+    """Split a file into chunks for embedding, by syntax for Python files and by sliding windows of lines otherwise.
+
+    Args:
+            file (str): The path of the file.
+            source (str): The contents of the file.
+            max_chars (int): The most characters a chunk may hold.
+
+    Returns:
+            List[Chunk]: The chunks, in file order.
+    """
+    if file.endswith(".py"):
+        return chunk_python(file, source, max_chars)
+    return chunk_windows(file, source, max_chars=max_chars)
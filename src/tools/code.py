@@ -1,12 +1,204 @@
 import ast
-import astor
+import re
+import textwrap
+from typing import List, Optional, Tuple
+
+from black import FileMode
+from tools.patch import convert_indent, indent_unit
+from tools.symbols import collect_symbols, node_position, resolve
+from utilities.formatter import get_formatter
+
+LINE_BREAK = re.compile(r"\r\n|\r|\n")
+NODE_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+BLACK_LINE_LENGTH = 88
+
+
+def _node_names(node: ast.AST) -> List[str]:
+    if isinstance(node, NODE_TYPES):
+        return [node.name]
+    if isinstance(node, ast.Assign):
+        return [t.id for t in node.targets if isinstance(t, ast.Name)]
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return [node.target.id]
+    return []
+
+
+def find_node(tree: ast.Module, target_node: str) -> Optional[ast.stmt]:
+    """Find a class, function or assignment by qualified name such as 'Class.method', or else by plain name, taking the first definition in file order, exactly as SymbolIndex.definition resolves it.
+
+    Args:
+            tree (ast.Module): The parsed module.
+            target_node (str): The name to look up.
+
+    Returns:
+            Optional[ast.stmt]: The definition, or None if there is none.
+    """
+    definition = resolve(collect_symbols("", tree), target_node)
+    if definition is None:
+        return None
+    position = (
+        definition.start_line,
+        definition.start_col,
+        definition.end_line,
+        definition.end_col,
+    )
+    for node in ast.walk(tree):
+        if definition.name in _node_names(node) and node_position(node) == position:
+            return node
+    return None
+
+
+def node_span(src_code: str, target_node: str) -> Tuple[int, int, int, int]:
+    """Return the 1-based inclusive line span of a node, decorators included, and the columns it starts and ends at.
+
+    Args:
+            src_code (str): The source code to search.
+            target_node (str): A qualified or plain name, as for find_node.
+
+    Returns:
+            Tuple[int, int, int, int]: The first line, start column, last line and end column of the node, as node_position reports them.
+
+    Raises:
+            ValueError: If the node does not exist.
+    """
+    node = find_node(ast.parse(src_code), target_node)
+    if node is None:
+        raise ValueError(
+            f"Node '{target_node}' does not exist in the supplied source code."
+        )
+    return node_position(node)
+
+
+def _line_starts(src_code: str, count: int) -> List[int]:
+    """The offsets at which the first count + 1 lines start, splitting lines as the parser does."""
+    starts = [0]
+    for match in LINE_BREAK.finditer(src_code):
+        if len(starts) > count:
+            break
+        starts.append(match.end())
+    while len(starts) <= count:
+        starts.append(len(src_code))
+    return starts
+
+
+def splice_lines(
+    src_code: str, start_line: int, end_line: int, new_code: str, reformat: bool = False
+) -> str:
+    """Replace whole lines of the source with new code indented like the first of them, leaving every other byte of the file untouched.
+
+    Args:
+            src_code (str): The source code to edit.
+            start_line (int): The first line replaced, 1-based.
+            end_line (int): The last line replaced, inclusive.
+            new_code (str): The code to insert, at any indentation.
+            reformat (bool): Whether to format the new code with black, at a line length reduced by its indentation.
+
+    Returns:
+            str: The source code after the splice.
+
+    Raises:
+            ValueError: If the new code does not parse.
+    """
+    starts = _line_starts(src_code, end_line)
+    begin, end = starts[start_line - 1], starts[end_line]
+    old = src_code[begin:end]
+    indent = old[: len(old) - len(old.lstrip(" \t"))]
+    snippet = textwrap.dedent(convert_indent(new_code, "    ")).strip("\r\n")
+    try:
+        ast.parse(snippet)
+    except SyntaxError as e:
+        raise ValueError(f"The new code does not parse: {e}")
+    if reformat:
+        width = len(indent.expandtabs(4))
+        mode = FileMode(line_length=max(BLACK_LINE_LENGTH - width, 40))
+        snippet = get_formatter().format(snippet, mode).rstrip("\n")
+    snippet = convert_indent(snippet, indent_unit(old))
+    ending = old[len(old.rstrip("\r\n")) :]
+    newline = "\r\n" if "\r\n" in old else "\n"
+    lines = [indent + line if line.strip() else "" for line in snippet.splitlines()]
+    return src_code[:begin] + newline.join(lines) + ending + src_code[end:]
+
+
+def _column(line: str, byte_offset: int) -> int:
+    """Convert a column reported by ast, a UTF-8 byte offset, to a character offset into line."""
+    return len(line.encode("utf-8")[:byte_offset].decode("utf-8", errors="ignore"))
+
+
+def splice_span(
+    src_code: str,
+    start_line: int,
+    start_col: int,
+    end_line: int,
+    end_col: int,
+    new_code: str,
+    reformat: bool = False,
+) -> str:
+    """Replace a node given by its lines and columns with new code; a node that fills its lines, apart from indentation and a trailing comment, is replaced with splice_lines, while a node sharing a line with other code, as in 'a = 1; b = 2' or a one-line 'if x: return y', is replaced within its columns only.
+
+    Args:
+            src_code (str): The source code to edit.
+            start_line (int): The first line of the node, 1-based.
+            start_col (int): The column the node starts at, as ast reports it.
+            end_line (int): The last line of the node, inclusive.
+            end_col (int): The column the node ends at, as ast reports it.
+            new_code (str): The code to insert, at any indentation.
+            reformat (bool): Whether to format the new code with black, which only applies when the node fills its lines.
+
+    Returns:
+            str: The source code after the splice.
+
+    Raises:
+            ValueError: If the new code does not parse, or spans several lines where the node shares a line.
+    """
+    starts = _line_starts(src_code, end_line)
+    first = src_code[starts[start_line - 1] : starts[start_line]]
+    last = src_code[starts[end_line - 1] : starts[end_line]].rstrip("\r\n")
+    begin = starts[start_line - 1] + _column(first, start_col)
+    end = starts[end_line - 1] + _column(last, end_col)
+    before = src_code[starts[start_line - 1] : begin]
+    after = src_code[end : starts[end_line - 1] + len(last)].strip()
+    if not before.strip() and (not after or after.startswith("#")):
+        return splice_lines(src_code, start_line, end_line, new_code, reformat)
+    snippet = textwrap.dedent(convert_indent(new_code, "    ")).strip()
+    try:
+        ast.parse(snippet)
+    except SyntaxError as e:
+        raise ValueError(f"The new code does not parse: {e}")
+    if len(snippet.splitlines()) > 1:
+        raise ValueError(
+            "The node shares its line with other code, so the new code must be a single line"
+        )
+    return src_code[:begin] + snippet + src_code[end:]
+
+
+def splice_node(
+    src_code: str, target_node: str, new_code: str, reformat: bool = False
+) -> str:
+    """Replace the text of one class, function or assignment with new code, keeping the rest of the file byte-identical, including code sharing a line with the node.
+
+    Args:
+            src_code (str): The source code to edit.
+            target_node (str): A qualified name such as 'Class.method', or a plain name.
+            new_code (str): The code to insert in place of the node.
+            reformat (bool): Whether to format the new code with black.
+
+    Returns:
+            str: The source code after the replacement.
+
+    Raises:
+            ValueError: If the node does not exist or the new code does not parse.
+    """
+    start_line, start_col, end_line, end_col = node_span(src_code, target_node)
+    return splice_span(
+        src_code, start_line, start_col, end_line, end_col, new_code, reformat
+    )
 
 
 def replace_node(src_code: str, target_node: str, new_code: str) -> str:
     """
     Replace the specified node in the source code with new code.
 
-    The function searches the Abstract Syntax Tree (AST) for the target node. If found, it is replaced with the parsed contents of new_code.
+    The function looks the target node up by qualified or plain name and splices new_code over its lines, leaving comments and formatting elsewhere in the file as they were.
 
     Args:
             src_code (str): The source code to search.
@@ -16,37 +208,4 @@ def replace_node(src_code: str, target_node: str, new_code: str) -> str:
     Returns:
             str: The source code after the replacement has been made.
     """
-    node_found = False
-    tree = ast.parse(src_code)
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Assign)) and (
-            hasattr(node, "name")
-            and node.name == target_node
-            or isinstance(node, ast.Assign)
-            and isinstance(node.targets[0], ast.Name)
-            and node.targets[0].id == target_node
-        ):
-            node_found = True
-            new_tree = ast.parse(new_code)
-            new_node = new_tree.body[0]
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                node.name = new_node.name
-                if isinstance(new_node, ast.FunctionDef):
-                    node.args = new_node.args
-                    node.body = new_node.body
-                    node.decorator_list = new_node.decorator_list
-                    node.returns = new_node.returns
-                elif isinstance(new_node, ast.ClassDef):
-                    node.bases = new_node.bases
-                    node.keywords = new_node.keywords
-                    node.body = new_node.body
-                    node.decorator_list = new_node.decorator_list
-            elif isinstance(node, ast.Assign):
-                if isinstance(new_node, ast.Assign):
-                    node.targets[0].id = new_node.targets[0].id
-                    node.value = new_node.value
-    if not node_found:
-        raise ValueError(
-            f"Node '{target_node}' does not exist in the supplied source code."
-        )
-    return astor.to_source(tree)
+    return splice_node(src_code, target_node, new_code)
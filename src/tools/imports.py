@@ -1,10 +1,248 @@
-from gpt import gpt_query, GPT_3_5
+import ast
+import io
+import tokenize
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-SYSTEM_IMPORTS = """
-Extract any imports from the following source code, returning only the lines that import other files.
-"""
+from tools.move_file import path_to_namespace
+
+
+@dataclass(frozen=True)
+class ImportStatement:
+    """One import statement, with its module resolved to an absolute dotted name and its 1-based line span."""
+
+    module: str
+    names: Tuple[str, ...]
+    level: int
+    line: int
+    end_line: int
+    conditional: bool
+    text: str
+
+    def modules(self) -> Set[str]:
+        """The modules the statement may load: the module itself and, for from imports, each imported name as a submodule.
+
+        Returns:
+                Set[str]: The dotted module names.
+        """
+        found = {self.module} if self.module else set()
+        for name in self.names:
+            if name != "*":
+                found.add(f"{self.module}.{name}".lstrip("."))
+        return found
+
+
+def module_name(file: str) -> str:
+    """Return the dotted module name of a Python file, relative to settings.CODE_PATH when it lies inside it.
+
+    Args:
+            file (str): The path of the file.
+
+    Returns:
+            str: The module name.
+    """
+    namespace = path_to_namespace(file)
+    return namespace[:-3] if namespace.endswith(".py") else namespace
+
+
+def resolve_relative(module: Optional[str], level: int, package: str) -> str:
+    """Turn a possibly relative import into an absolute module name.
+
+    Args:
+            module (Optional[str]): The module named by the statement, None for 'from . import x'.
+            level (int): The number of leading dots.
+            package (str): The module name of the importing file.
+
+    Returns:
+            str: The absolute module name, empty when the import climbs above the code path.
+    """
+    parts = package.split(".")[:-level] if level else []
+    return ".".join(parts + ([module] if module else []))
+
+
+def _line_offsets(source: str) -> List[int]:
+    offsets = [0]
+    for line in source.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def _segment(lines: List[str], node: ast.AST) -> str:
+    segment = [
+        line.encode("utf-8") for line in lines[node.lineno - 1 : node.end_lineno]
+    ]
+    segment[-1] = segment[-1][: node.end_col_offset]
+    segment[0] = segment[0][node.col_offset :]
+    return b"".join(segment).decode("utf-8")
+
+
+def _statement(node: ast.AST, lines: List[str], package: str) -> List[ImportStatement]:
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        text = _segment(lines, node)
+    if isinstance(node, ast.Import):
+        return [
+            ImportStatement(
+                alias.name,
+                (),
+                0,
+                node.lineno,
+                node.end_lineno,
+                node.col_offset > 0,
+                text,
+            )
+            for alias in node.names
+        ]
+    if isinstance(node, ast.ImportFrom):
+        return [
+            ImportStatement(
+                resolve_relative(node.module, node.level, package),
+                tuple(alias.name for alias in node.names),
+                node.level,
+                node.lineno,
+                node.end_lineno,
+                node.col_offset > 0,
+                text,
+            )
+        ]
+    return []
+
+
+def _walk_statements(nodes: List[ast.AST]) -> Iterator[ast.AST]:
+    for node in nodes:
+        yield node
+        for field in ("body", "orelse", "finalbody", "handlers", "cases"):
+            yield from _walk_statements(getattr(node, field, []))
+
+
+def statements_from_tree(
+    tree: ast.Module, source: str, package: str
+) -> List[ImportStatement]:
+    """Collect the import statements of a parsed module, at any nesting depth.
+
+    Args:
+            tree (ast.Module): The parsed module.
+            source (str): The source the tree was parsed from.
+            package (str): The module name of the file, used to resolve relative imports.
+
+    Returns:
+            List[ImportStatement]: The statements in source order, one per module for 'import a, b'.
+    """
+    lines = source.splitlines(keepends=True)
+    statements = [
+        statement
+        for node in _walk_statements(tree.body)
+        for statement in _statement(node, lines, package)
+    ]
+    return sorted(statements, key=lambda statement: statement.line)
+
+
+def _tokenized_statements(source: str, package: str) -> List[ImportStatement]:
+    offsets = _line_offsets(source)
+    statements: List[ImportStatement] = []
+    logical: List[tokenize.TokenInfo] = []
+
+    def end_statement() -> None:
+        if logical and logical[0].string in ("import", "from"):
+            start, end = logical[0].start, logical[-1].end
+            text = source[
+                offsets[start[0] - 1] + start[1] : offsets[end[0] - 1] + end[1]
+            ]
+            try:
+                node = ast.parse(text).body[0]
+            except SyntaxError:
+                node = None
+            for statement in _statement(node, text.splitlines(keepends=True), package):
+                statements.append(
+                    replace(
+                        statement,
+                        line=statement.line + start[0] - 1,
+                        end_line=statement.end_line + start[0] - 1,
+                        conditional=start[1] > 0,
+                    )
+                )
+        logical.clear()
+
+    skipped = (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT)
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER) or (
+                token.type == tokenize.OP and token.string == ";"
+            ):
+                end_statement()
+            elif token.type not in skipped:
+                logical.append(token)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return statements
+
+
+def extract_imports(source: str, file: str = "") -> List[ImportStatement]:
+    """Extract the import statements of Python source, including relative imports, parenthesized from imports and imports inside if, try or function bodies.
+
+    Sources that do not parse, such as a file caught mid-edit, fall back to scanning the token stream for logical lines starting with import or from.
+
+    Args:
+            source (str): The Python source.
+            file (str): The path of the file, used to resolve relative imports.
+
+    Returns:
+            List[ImportStatement]: The statements in source order.
+    """
+    package = module_name(file) if file else ""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return _tokenized_statements(source, package)
+    return statements_from_tree(tree, source, package)
 
 
 def imports(source_code: str) -> str:
-    result = gpt_query(source_code, system=SYSTEM_IMPORTS, model=GPT_3_5)
-    return result
+    """Return the import statements of a source file, one per line, in source order.
+
+    Args:
+            source_code (str): The Python source.
+
+    Returns:
+            str: The text of each distinct import statement, indentation removed.
+    """
+    texts = []
+    for statement in extract_imports(source_code):
+        if statement.text not in texts:
+            texts.append(statement.text)
+    return "\n".join(texts)
+
+
+def resolve_module(module: str, modules: Dict[str, str]) -> Optional[str]:
+    """Find the project file providing a module.
+
+    Args:
+            module (str): The dotted module name.
+            modules (Dict[str, str]): Project files keyed by module name, packages under both their own name and name.__init__.
+
+    Returns:
+            Optional[str]: The file, or None for modules outside the project.
+    """
+    return modules.get(module) or modules.get(f"{module}.__init__")
+
+
+def dependency_graph(files: Dict[str, str]) -> Dict[str, List[str]]:
+    """Build the import graph of the Python files of a project, resolving modules against settings.CODE_PATH.
+
+    Args:
+            files (Dict[str, str]): The file map.
+
+    Returns:
+            Dict[str, List[str]]: For every Python file, the sorted project files it imports.
+    """
+    modules = {module_name(file): file for file in files if file.endswith(".py")}
+    graph = {}
+    for file in sorted(modules.values()):
+        dependencies = {
+            resolve_module(module, modules)
+            for statement in extract_imports(files[file], file)
+            for module in statement.modules()
+        }
+        dependencies.discard(None)
+        dependencies.discard(file)
+        graph[file] = sorted(dependencies)
+    return graph
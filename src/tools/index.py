@@ -1,19 +1,274 @@
-from utilities.minicos import VectorStore
-from gpt import calculate_text_embedding
+from typing import Any, Dict, List, Optional, Tuple
+from tools.chunk import Chunk, chunk_file
+from utilities.ivf import IVFVectorStore
+from utilities.minicos import VectorStore, blocked_scores, normalize
+from utilities.mapped_vectors import MappedVectorStore, content_hash
+from utilities.rate_limit import estimate_tokens
+from gpt import (
+    calculate_text_embedding,
+    calculate_text_embeddings,
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MAX_TOKENS,
+)
 import numpy as np
+import repo
+
+
+def file_key(sha: str, path: str) -> str:
+    """Build the key an on-disk index stores a file's chunks under, so a file is dropped only when its path is gone even if another path holds the same blob.
+
+    Args:
+            sha (str): The git blob SHA of the file's contents.
+            path (str): The path of the file.
+
+    Returns:
+            str: The key "<blob sha>:<path>".
+    """
+    return f"{sha}:{path}"
 
 
 class VectorIndex:
-    def __init__(self):
-        self.store = VectorStore()
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        ann: Optional[Dict[str, Any]] = None,
+    ):
+        """Create an index held in memory, or persisted in a MappedVectorStore under path so it survives restarts and is shared between processes.
+
+        Args:
+                path (Optional[str]): The directory of the on-disk index, or None for an in-memory index.
+                dtype (str): The element type of a new on-disk index, 'float32' or 'float16'.
+                ann (Optional[Dict[str, Any]]): IVFVectorStore parameters such as n_lists and n_probe to search an in-memory index approximately, or None for exact search.
+        """
+        if path is None and ann is not None:
+            self.store = IVFVectorStore(**ann)
+        elif path is None:
+            self.store = VectorStore()
+        else:
+            self.store = MappedVectorStore(path, EMBEDDING_DIMENSIONS, dtype)
 
     def ingest(self, source_code):
+        if isinstance(self.store, MappedVectorStore) and self.store.contains(
+            content_hash(source_code)
+        ):
+            return
         embedding = calculate_text_embedding(source_code)
         embedding = np.array(embedding)
         self.store.add_entry(embedding, source_code)
 
+    def ingest_file(self, file: str, source: str) -> int:
+        """Chunk a file by symbol and embed each chunk, so retrieval can point at the function or class that matches rather than the whole file.
+
+        An on-disk index stores the chunks under the same "<blob sha>:<path>" key sync uses, skips a file it already holds, and marks a file without chunks so sync does not read it again.
+
+        Args:
+                file (str): The path of the file.
+                source (str): The contents of the file.
+
+        Returns:
+                int: The number of chunks embedded.
+        """
+        key = None
+        if isinstance(self.store, MappedVectorStore):
+            key = file_key(content_hash(source), file)
+            if self.store.contains(key):
+                return 0
+        chunks = chunk_file(file, source)
+        if not chunks:
+            if key is not None:
+                self.store.mark_empty([key])
+            return 0
+        self.ingest_chunks(chunks, None if key is None else [key] * len(chunks))
+        return len(chunks)
+
+    def ingest_chunks(
+        self, chunks: List[Chunk], key_hashes: Optional[List[str]] = None
+    ) -> None:
+        """Embed chunks in batched requests and store them in order, so row i of an in-memory store holds chunks[i].
+
+        Args:
+                chunks (List[Chunk]): The chunks to embed.
+                key_hashes (Optional[List[str]]): The content hash each chunk is stored under in an on-disk index.
+
+        Returns:
+                None
+        """
+        if not chunks:
+            return
+        embeddings = np.array(
+            calculate_text_embeddings([chunk.text for chunk in chunks])
+        )
+        values = [chunk.to_json() for chunk in chunks]
+        if isinstance(self.store, MappedVectorStore):
+            self.store.add_entries(embeddings, values, key_hashes)
+        else:
+            self.store.add_entries(embeddings, values)
+
+    def chunk_embeddings(
+        self, files: Dict[str, str], chunks: List[Chunk]
+    ) -> np.ndarray:
+        """Return the embedding of each chunk of a file map from an on-disk index, embedding only chunk texts it holds under no path for their file's blob, and storing the chunks of files it does not hold under the "<blob sha>:<path>" key sync uses, so trees that share files share embeddings.
+
+        Args:
+                files (Dict[str, str]): The file map the chunks were cut from.
+                chunks (List[Chunk]): The chunks to embed.
+
+        Returns:
+                np.ndarray: A matrix with one embedding per chunk, in order.
+
+        Raises:
+                ValueError: If the index is held in memory, since nothing persists there.
+        """
+        if not isinstance(self.store, MappedVectorStore):
+            raise ValueError(
+                "chunk_embeddings requires a VectorIndex created with a path"
+            )
+        shas = [content_hash(files[chunk.file]) for chunk in chunks]
+        keys = [file_key(sha, chunk.file) for sha, chunk in zip(shas, chunks)]
+        vectors: Dict[Tuple[str, str], np.ndarray] = {}
+        for sha in set(shas):
+            rows, values = self.store.entries(f"{sha}:", prefix=True)
+            for row, value in zip(rows, values):
+                vectors[(sha, Chunk.from_json(value).text)] = row
+        held = {key for key in set(keys) if self.store.contains(key)}
+        missing = [i for i, key in enumerate(keys) if key not in held]
+        texts = list(
+            dict.fromkeys(
+                chunks[i].text
+                for i in missing
+                if (shas[i], chunks[i].text) not in vectors
+            )
+        )
+        if texts:
+            fresh = dict(zip(texts, calculate_text_embeddings(texts)))
+            for i in missing:
+                if (shas[i], chunks[i].text) not in vectors:
+                    vectors[(shas[i], chunks[i].text)] = fresh[chunks[i].text]
+        if missing:
+            self.store.add_entries(
+                np.array([vectors[(shas[i], chunks[i].text)] for i in missing]),
+                [chunks[i].to_json() for i in missing],
+                [keys[i] for i in missing],
+            )
+        return np.array(
+            [vectors[(sha, chunk.text)] for sha, chunk in zip(shas, chunks)]
+        )
+
+    def similarities(self, search_text: str) -> np.ndarray:
+        """Score the search text against every entry of an exact in-memory index, in insertion order, for callers that fuse vector scores with other rankings.
+
+        Args:
+                search_text (str): The text to score.
+
+        Returns:
+                np.ndarray: The cosine similarity of each entry.
+
+        Raises:
+                ValueError: If the index is on disk or approximate, where entries are not scored in insertion order.
+        """
+        if not isinstance(self.store, VectorStore):
+            raise ValueError("similarities requires an exact in-memory VectorIndex")
+        if not len(self.store):
+            return np.zeros(0, dtype=np.float32)
+        query = normalize(np.array(calculate_text_embedding(search_text)))
+        scales = self.store.scales
+        if scales is not None:
+            scales = scales[: len(self.store)]
+        return blocked_scores(self.store.keys, query[np.newaxis, :], scales)[0]
+
     def retrieve(self, search_text, num_items):
         embedding = calculate_text_embedding(search_text)
         embedding = np.array(embedding)
         entries = self.store.search(embedding, num_items)
         return entries
+
+    def retrieve_chunks(self, search_text: str, num_items: int) -> List[Chunk]:
+        """Retrieve the chunks most similar to the search text from an index filled by ingest_file or sync.
+
+        Args:
+                search_text (str): The text to search for.
+                num_items (int): The number of chunks to return.
+
+        Returns:
+                List[Chunk]: The best matching chunks, whose location can be passed to the Files command.
+        """
+        return [
+            Chunk.from_json(value) for value in self.retrieve(search_text, num_items)
+        ]
+
+    def sync(self, repo_path: str, batch_size: int = 64) -> Dict[str, int]:
+        """Bring an on-disk index up to date with the HEAD tree of a git repository, embedding only content it does not hold yet and dropping files no longer checked in.
+
+        Files are split with chunk_file and every chunk is stored under the key "<blob sha>:<path>", so a file is dropped only when that path is gone even if another path holds the same content. Each distinct chunk text is embedded at most once: copies and renames reuse the vectors already stored for their blob, and unchanged files cost nothing. Binary files and files without chunks are marked empty, so later syncs do not read them again, and are not counted as added.
+
+        Args:
+                repo_path (str): The repository directory.
+                batch_size (int): The number of new blobs whose chunks are embedded and appended per store transaction.
+
+        Returns:
+                Dict[str, int]: The number of files added, removed and left unchanged.
+
+        Raises:
+                ValueError: If the index is held in memory, since there is nothing to sync against.
+        """
+        if not isinstance(self.store, MappedVectorStore):
+            raise ValueError("sync requires a VectorIndex created with a path")
+        files = {
+            file_key(blob.hexsha, path): (path, blob)
+            for path, blob in repo.get_checked_in_blobs(repo_path).items()
+        }
+        indexed = set(self.store.hashes())
+        pending: Dict[str, List[str]] = {}
+        for key in files:
+            if key not in indexed:
+                pending.setdefault(key.split(":", 1)[0], []).append(key)
+        shas = list(pending)
+        added = 0
+        for start in range(0, len(shas), batch_size):
+            chunks, keys, empty = [], [], []
+            vectors: Dict[str, np.ndarray] = {}
+            for sha in shas[start : start + batch_size]:
+                try:
+                    source = (
+                        files[pending[sha][0]][1].data_stream.read().decode("utf-8")
+                    )
+                except UnicodeDecodeError:
+                    empty.extend(pending[sha])
+                    continue
+                rows, values = self.store.entries(f"{sha}:", prefix=True)
+                for row, value in zip(rows, values):
+                    vectors[Chunk.from_json(value).text] = row
+                for key in pending[sha]:
+                    file_chunks = [
+                        chunk
+                        for chunk in chunk_file(files[key][0], source)
+                        if estimate_tokens(chunk.text) <= EMBEDDING_MAX_TOKENS
+                    ]
+                    if not file_chunks:
+                        empty.append(key)
+                        continue
+                    chunks.extend(file_chunks)
+                    keys.extend([key] * len(file_chunks))
+                    added += 1
+            texts = list(
+                dict.fromkeys(
+                    chunk.text for chunk in chunks if chunk.text not in vectors
+                )
+            )
+            if texts:
+                vectors.update(zip(texts, calculate_text_embeddings(texts)))
+            if chunks:
+                self.store.add_entries(
+                    np.array([vectors[chunk.text] for chunk in chunks]),
+                    [chunk.to_json() for chunk in chunks],
+                    keys,
+                )
+            self.store.mark_empty(empty)
+        removed = indexed - files.keys()
+        self.store.remove(sorted(removed))
+        return {
+            "added": added,
+            "removed": len(removed),
+            "unchanged": len(indexed & files.keys()),
+        }
@@ -1,12 +1,22 @@
-import copy
 import settings
 from rope.base import project as rope_project
 from rope.refactor.rename import Rename
 
 
-def move_file(file_mapping, old_path, new_path):
-    # Creating a copy of the dictionary
-    file_mapping_copy = copy.deepcopy(file_mapping)
+def move_file(file_mapping, old_path, new_path, importers=None):
+    """
+    Move a file within a file mapping and fix the import statements that referred to its old namespace.
+
+    Arguments:
+    file_mapping: The file mapping to copy and update.
+    old_path: The current path of the file.
+    new_path: The path to move the file to.
+    importers: The files known to import the old namespace, for example from a SymbolIndex, or None to scan every file.
+    Returns:
+    The updated copy of the file mapping.
+    """
+    # Creating a copy of the dictionary; the contents are immutable strings and are shared
+    file_mapping_copy = dict(file_mapping)
 
     if old_path in file_mapping_copy:
         # Moving the file to the new path
@@ -17,10 +27,15 @@ def move_file(file_mapping, old_path, new_path):
         new_namespace = path_to_namespace(new_path)
 
         # Iterating over each file and fix broken import paths if any
-        for file_path, file_content in file_mapping_copy.items():
-            file_mapping_copy[file_path] = fix_imports(
-                file_content, old_namespace, new_namespace
-            )
+        if importers is None:
+            importers = list(file_mapping_copy)
+        for file_path in importers:
+            if file_path == old_path:
+                file_path = new_path
+            if file_path in file_mapping_copy:
+                file_mapping_copy[file_path] = fix_imports(
+                    file_mapping_copy[file_path], old_namespace, new_namespace
+                )
     else:
         raise Exception(f"No such file: '{old_path}'")
 
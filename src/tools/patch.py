@@ -0,0 +1,261 @@
+import difflib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+SEARCH_MARKER = re.compile(r"^<{5,9} ?SEARCH\s*$")
+DIVIDER_MARKER = re.compile(r"^={5,9}\s*$")
+REPLACE_MARKER = re.compile(r"^>{5,9} ?REPLACE\s*$")
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+FUZZY_THRESHOLD = 0.85
+"""The lowest difflib similarity at which a block's search text is matched to a window of the file it does not appear in verbatim."""
+FUZZY_MARGIN = 0.05
+"""How far a similar match must lead any other non-overlapping window to be trusted."""
+
+
+class PatchError(ValueError):
+    """Raised when an edit cannot be parsed, or its search text cannot be located in the file unambiguously."""
+
+
+@dataclass
+class EditBlock:
+    """One edit: lines to find in the file and the lines to put in their place."""
+
+    search: str
+    replace: str
+
+
+def parse_search_replace(text: str) -> List[EditBlock]:
+    """Parse SEARCH/REPLACE blocks, ignoring anything outside them such as markdown fences or file names.
+
+    Args:
+            text (str): The model's response.
+
+    Returns:
+            List[EditBlock]: The blocks, in order.
+
+    Raises:
+            PatchError: If a block is not terminated.
+    """
+    blocks = []
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        if not SEARCH_MARKER.match(lines[i]):
+            i += 1
+            continue
+        search: List[str] = []
+        replace: List[str] = []
+        target = search
+        i += 1
+        while i < len(lines) and not REPLACE_MARKER.match(lines[i]):
+            if target is search and DIVIDER_MARKER.match(lines[i]):
+                target = replace
+            else:
+                target.append(lines[i])
+            i += 1
+        if i == len(lines) or target is search:
+            raise PatchError("Unterminated SEARCH/REPLACE block")
+        blocks.append(EditBlock("\n".join(search), "\n".join(replace)))
+        i += 1
+    return blocks
+
+
+def parse_unified_diff(text: str) -> List[EditBlock]:
+    """Parse the hunks of a unified diff into blocks, matching them by content rather than by their line numbers.
+
+    Args:
+            text (str): The diff.
+
+    Returns:
+            List[EditBlock]: One block per hunk, in order.
+    """
+    blocks = []
+    search: Optional[List[str]] = None
+    replace: List[str] = []
+    for line in text.split("\n") + ["@@ -0 +0 @@"]:
+        if HUNK_HEADER.match(line):
+            if search is not None and (search or replace):
+                blocks.append(EditBlock("\n".join(search), "\n".join(replace)))
+            search, replace = [], []
+        elif search is None or line.startswith(("--- ", "+++ ", "\\")):
+            continue
+        elif line.startswith("-"):
+            search.append(line[1:])
+        elif line.startswith("+"):
+            replace.append(line[1:])
+        elif line.startswith(" ") or line == "":
+            search.append(line[1:])
+            replace.append(line[1:])
+    return blocks
+
+
+def parse_edits(text: str) -> List[EditBlock]:
+    """Parse a response holding either SEARCH/REPLACE blocks or a unified diff.
+
+    Args:
+            text (str): The model's response.
+
+    Returns:
+            List[EditBlock]: The edits, in order.
+
+    Raises:
+            PatchError: If the response holds no edits or a malformed block.
+    """
+    blocks = parse_search_replace(text)
+    if not blocks:
+        blocks = parse_unified_diff(text)
+    if not blocks:
+        raise PatchError("The response contains no SEARCH/REPLACE blocks or diff hunks")
+    return blocks
+
+
+def indent_unit(content: str) -> str:
+    """Guess a file's indentation, a tab or four spaces, from how its lines start.
+
+    Args:
+            content (str): The file.
+
+    Returns:
+            str: The unit of one indentation level.
+    """
+    tabs = len(re.findall(r"^\t", content, flags=re.MULTILINE))
+    spaces = len(re.findall(r"^ ", content, flags=re.MULTILINE))
+    return "\t" if tabs > spaces else "    "
+
+
+def convert_indent(text: str, unit: str) -> str:
+    """Rewrite leading tabs, or leading groups of four spaces, as unit, since the model sees files with tab indentation.
+
+    Args:
+            text (str): The code to convert.
+            unit (str): The unit of one indentation level to use.
+
+    Returns:
+            str: The converted code.
+    """
+    if unit == "\t":
+        return re.sub(
+            r"^(?: {4})+", lambda m: "\t" * (len(m.group(0)) // 4), text, flags=re.M
+        )
+    return re.sub(r"^\t+", lambda m: unit * len(m.group(0)), text, flags=re.M)
+
+
+def _leading(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _reindent(lines: List[str], found: List[str], wanted: List[str]) -> List[str]:
+    """Shift replacement lines by the indentation difference between the lines matched in the file and the search lines."""
+    first_found = next((line for line in found if line.strip()), "")
+    first_wanted = next((line for line in wanted if line.strip()), "")
+    have, want = _leading(first_found), _leading(first_wanted)
+    if have == want:
+        return lines
+    result = []
+    for line in lines:
+        if line.strip() and line.startswith(want):
+            line = have + line[len(want) :]
+        result.append(line)
+    return result
+
+
+def _find_lines(lines: List[str], search: List[str]) -> Optional[Tuple[int, int]]:
+    """Locate search in lines ignoring whitespace, then by similarity, returning the matched line range."""
+    size = len(search)
+    stripped = [line.strip() for line in lines]
+    wanted = [line.strip() for line in search]
+    starts = [
+        start
+        for start in range(len(lines) - size + 1)
+        if stripped[start : start + size] == wanted
+    ]
+    if len(starts) > 1:
+        raise PatchError(
+            f"Search text matches {len(starts)} places:\n" + "\n".join(search)
+        )
+    if starts:
+        return starts[0], starts[0] + size
+    target = "\n".join(wanted)
+    floor = FUZZY_THRESHOLD - FUZZY_MARGIN
+    scores = []
+    for start in range(len(lines) - size + 1):
+        matcher = difflib.SequenceMatcher(
+            None, "\n".join(stripped[start : start + size]), target, autojunk=False
+        )
+        if matcher.real_quick_ratio() >= floor and matcher.quick_ratio() >= floor:
+            scores.append((matcher.ratio(), start))
+    if not scores:
+        return None
+    ratio, best = max(scores)
+    rivals = [r for r, start in scores if abs(start - best) >= size]
+    if ratio < FUZZY_THRESHOLD or (rivals and max(rivals) > ratio - FUZZY_MARGIN):
+        return None
+    return best, best + size
+
+
+def _exact_matches(content: str, search: str) -> List[Tuple[int, int]]:
+    """Find the spans where search occurs verbatim starting at the start of a line and ending at the end of one, so it never matches inside a longer line."""
+    start = "" if search.startswith("\n") else "^"
+    end = "" if search.endswith("\n") else "$"
+    pattern = re.compile(start + re.escape(search) + end, flags=re.M)
+    return [match.span() for match in pattern.finditer(content)]
+
+
+def apply_edit(content: str, block: EditBlock) -> str:
+    """Apply one edit, matching its search text exactly as whole lines, then ignoring whitespace, then by similarity.
+
+    Args:
+            content (str): The file.
+            block (EditBlock): The edit.
+
+    Returns:
+            str: The edited file.
+
+    Raises:
+            PatchError: If the search text is missing or matches several places.
+    """
+    if not block.search.strip():
+        if not content.strip():
+            return block.replace + "\n"
+        return content.rstrip("\n") + "\n" + block.replace + "\n"
+    matches = _exact_matches(content, block.search)
+    if not block.replace and not block.search.endswith("\n"):
+        whole_lines = _exact_matches(content, block.search + "\n")
+        if whole_lines:
+            matches = whole_lines
+    if len(matches) == 1:
+        return content[: matches[0][0]] + block.replace + content[matches[0][1] :]
+    if len(matches) > 1:
+        raise PatchError(f"Search text matches {len(matches)} places:\n{block.search}")
+    lines = content.split("\n")
+    search = block.search.strip("\n").split("\n")
+    span = _find_lines(lines, search)
+    if span is None:
+        raise PatchError(f"Search text not found:\n{block.search}")
+    start, end = span
+    replace = block.replace.strip("\n").split("\n") if block.replace.strip() else []
+    replace = _reindent(replace, lines[start:end], search)
+    return "\n".join(lines[:start] + replace + lines[end:])
+
+
+def apply_edits(content: str, blocks: List[EditBlock]) -> str:
+    """Apply edits in order, converting their indentation to the file's first.
+
+    Args:
+            content (str): The file.
+            blocks (List[EditBlock]): The edits.
+
+    Returns:
+            str: The edited file.
+
+    Raises:
+            PatchError: If any edit cannot be applied; the file is then left to be regenerated whole.
+    """
+    unit = indent_unit(content)
+    for block in blocks:
+        block = EditBlock(
+            convert_indent(block.search, unit), convert_indent(block.replace, unit)
+        )
+        content = apply_edit(content, block)
+    return content
@@ -1,12 +1,113 @@
-from gpt import gpt_query
+import ast
+import codeop
+import warnings
+from typing import Optional
+from gpt import gpt_query, StreamAborted, TokenCallback
+from settings import get_settings
+from termcolor import cprint
+from tools.patch import PatchError, apply_edits, parse_edits
+from tracing.tags import METRIC
+from tracing.trace import trace
 from utilities.prompts import load_prompt
 import re
 
 SYSTEM_REPLACE_THINK = load_prompt("replace_think")
 SYSTEM_REPLACE = load_prompt("replace")
+SYSTEM_REPLACE_EDIT = load_prompt("replace_edit")
+PARSE_CHECK_INTERVAL = 20
+
+
+def python_prefix_is_invalid(source: str) -> bool:
+    """Check whether a partially generated Python file already contains a syntax error, as opposed to merely being incomplete, using the interactive interpreter's incomplete input detection.
+
+    Args:
+            source (str): The generated text so far, ending on a line boundary, optionally starting with a markdown fence and ending with a closing fence and prose, which are left out of the check.
+
+    Returns:
+            bool: True if no continuation of the source could be valid Python.
+    """
+    source = re.sub("^```[\\w]*\\n", "", source)
+    source = re.split("^```", source, maxsplit=1, flags=re.MULTILINE)[0]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            codeop.compile_command(source, symbol="exec")
+    except (SyntaxError, ValueError, OverflowError):
+        return True
+    return False
+
+
+def stream_guard(file_name: str, max_chars: int) -> TokenCallback:
+    """Build a streaming callback for full file generation that aborts once the output grows past max_chars or, for Python files, once the completed lines can no longer parse.
+
+    Args:
+            file_name (str): The name of the file being generated, used to decide whether to syntax check it.
+            max_chars (int): The largest output accepted before aborting.
+
+    Returns:
+            TokenCallback: A callback suitable for gpt_query's on_token argument.
+    """
+    check_python = bool(file_name) and file_name.endswith(".py")
+    lines_seen = 0
+    lines_checked = 0
+
+    def on_token(fragment: str, accumulated: str) -> bool:
+        nonlocal lines_seen, lines_checked
+        if len(accumulated) > max_chars:
+            cprint(f"Aborting {file_name}: output exceeds {max_chars} chars", "red")
+            return False
+        lines_seen += fragment.count("\n")
+        if check_python and lines_seen - lines_checked >= PARSE_CHECK_INTERVAL:
+            lines_checked = lines_seen
+            if python_prefix_is_invalid(accumulated[: accumulated.rfind("\n") + 1]):
+                cprint(f"Aborting {file_name}: output is not valid Python", "red")
+                return False
+        return True
+
+    return on_token
+
+
+def edit_file(
+    original_file: str, instructions: str, context: str = "", file_name: str = None
+) -> Optional[str]:
+    """Ask for the change as SEARCH/REPLACE blocks or a unified diff in one query and apply it locally, so the output grows with the size of the edit rather than the file.
+
+    Args:
+            original_file (str): The file to modify.
+            instructions (str): How to modify it.
+            context (str): The scratch and context files of the command loop.
+            file_name (str): The file's name, used to validate Python files.
+
+    Returns:
+            Optional[str]: The edited file, or None if the edits could not be applied or left a Python file unparsable.
+    """
+    prompt = f"""### CONTEXT ###
+{context}
+### INSTRUCTIONS ###
+{instructions}
+### ORIGINAL FILE ###
+{original_file}
+### EDITS FOR {file_name or "FILE"} ###"""
+    response = gpt_query(prompt, SYSTEM_REPLACE_EDIT)
+    try:
+        edited = apply_edits(original_file, parse_edits(response))
+        if file_name and file_name.endswith(".py"):
+            try:
+                ast.parse(edited)
+            except SyntaxError as e:
+                raise PatchError(f"Edited file does not parse: {e}")
+    except PatchError as e:
+        cprint(f"Could not apply edits to {file_name}, regenerating it: {e}", "red")
+        trace(METRIC, f"edit fallback for {file_name}: {e}")
+        return None
+    return edited.strip()
 
 
 def modify_file(original_file, instructions, context="", file_name=None):
+    if get_settings().edit_mode == "edits" and original_file.strip():
+        edited = edit_file(original_file, instructions, context, file_name)
+        if edited is not None:
+            return edited
     thinking_text = (
         f"### THINKING FOR {file_name} ###" if file_name else "### THINKING ###"
     )
@@ -20,7 +121,16 @@ def modify_file(original_file, instructions, context="", file_name=None):
 {thinking_text}"""
     thinking = gpt_query(instructions, SYSTEM_REPLACE_THINK)
     instructions = f"{instructions}\n{thinking}\n{new_file_text}"
-    new_file = gpt_query(instructions, SYSTEM_REPLACE)
+    try:
+        new_file = gpt_query(
+            instructions,
+            SYSTEM_REPLACE,
+            on_token=stream_guard(file_name, get_settings().max_input_chars),
+        )
+    except StreamAborted:
+        cprint(f"Retrying {file_name} without the stream guard", "red")
+        trace(METRIC, f"stream guard aborted {file_name}, retrying unguarded")
+        new_file = gpt_query(instructions, SYSTEM_REPLACE)
     new_file = re.sub("```[\\w]*\\n(.*?)\\n```", "\\1", new_file, flags=re.DOTALL)
     new_file = new_file.strip()
     return new_file
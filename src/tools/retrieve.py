@@ -0,0 +1,251 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.chunk import Chunk, chunk_file
+from tools.index import VectorIndex
+from utilities.cache import MemoryLRU, SingleFlight
+from utilities.mapped_vectors import content_hash
+from utilities.minicos import top_k
+from utilities.rate_limit import estimate_tokens
+from utils import annotate_with_line_numbers
+from gpt import EMBEDDING_MAX_TOKENS
+from settings import get_settings
+
+MAX_RESULTS = 8
+MAX_SNIPPET_LINES = 20
+LEXICAL_WEIGHT = 0.5
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+_retrievers: Optional[MemoryLRU] = None
+_embeddings: Optional[VectorIndex] = None
+_shared_lock = threading.Lock()
+_embedding_lock = threading.Lock()
+_building = SingleFlight()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercased identifier tokens, adding the snake_case and camelCase parts of compound identifiers so 'parse_location' also matches a query for 'location'.
+
+    Args:
+            text (str): The text to split.
+
+    Returns:
+            List[str]: The tokens in order, compound identifiers followed by their parts.
+    """
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text):
+        tokens.append(word.lower())
+        parts = [
+            part.lower()
+            for piece in word.split("_")
+            for part in CAMEL_PATTERN.findall(piece)
+        ]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    An Okapi BM25 inverted index over a fixed list of documents, with each posting's term weight precomputed so a query is a handful of scatter-adds.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        """Tokenize and index the documents.
+
+        Args:
+                documents (List[str]): The documents, scored by their position in this list.
+                k1 (float): The term frequency saturation.
+                b (float): The strength of document length normalization.
+        """
+        self.size = len(documents)
+        counts = [Counter(tokenize(document)) for document in documents]
+        lengths = np.array([sum(count.values()) for count in counts], np.float32)
+        average = float(lengths.mean()) if self.size and lengths.sum() else 1.0
+        postings: Dict[str, List[tuple]] = {}
+        for doc, count in enumerate(counts):
+            for term, frequency in count.items():
+                postings.setdefault(term, []).append((doc, frequency))
+        self.postings: Dict[str, tuple] = {}
+        for term, entries in postings.items():
+            docs = np.array([doc for doc, _ in entries], dtype=np.intp)
+            frequencies = np.array([frequency for _, frequency in entries], np.float32)
+            idf = np.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[docs] / average)
+            weights = idf * frequencies * (k1 + 1) / (frequencies + norm)
+            self.postings[term] = (docs, weights.astype(np.float32))
+
+    def scores(self, query: str) -> np.ndarray:
+        """Score every document against a query.
+
+        Args:
+                query (str): The query text, tokenized like the documents.
+
+        Returns:
+                np.ndarray: The BM25 score of each document, 0 for documents sharing no term with the query.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                docs, weights = self.postings[term]
+                np.add.at(scores, docs, weights)
+        return scores
+
+
+@dataclass
+class RetrievalHit:
+    """A chunk returned by a retrieval query and its fused score."""
+
+    chunk: Chunk
+    score: float
+
+    def __str__(self) -> str:
+        lines = self.chunk.text.splitlines()
+        snippet = annotate_with_line_numbers(
+            "\n".join(lines[:MAX_SNIPPET_LINES]), self.chunk.start_line
+        )
+        if len(lines) > MAX_SNIPPET_LINES:
+            snippet += f"\n... {len(lines) - MAX_SNIPPET_LINES} more lines"
+        return f"{self.chunk.location} {self.chunk.symbol} (score {self.score:.2f})\n{snippet}"
+
+
+def tree_digest(files: Dict[str, str]) -> str:
+    """Identify the contents of a file map, so a checked-out commit is indexed once however many loops query it.
+
+    Args:
+            files (Dict[str, str]): The file map.
+
+    Returns:
+            str: A SHA1 over every path and git blob hash.
+    """
+    digest = hashlib.sha1()
+    for file in sorted(files):
+        digest.update(f"{file}\0{content_hash(files[file])}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class HybridRetriever:
+    """
+    Ranks the symbol chunks of a file map by a weighted sum of BM25 scores and VectorIndex cosine similarities, each scaled to [0, 1], so exact identifiers and paraphrased intent both surface in one query.
+    """
+
+    def __init__(
+        self,
+        files: Dict[str, str],
+        semantic: bool = True,
+        embeddings: Optional[VectorIndex] = None,
+    ):
+        """Chunk every file and build the lexical and vector indexes over the same chunks.
+
+        Args:
+                files (Dict[str, str]): The file map to index.
+                semantic (bool): Whether to embed the chunks; without embeddings ranking is lexical only.
+                embeddings (Optional[VectorIndex]): An on-disk index to take the chunk embeddings from and add new ones to, or None to embed every chunk.
+        """
+        self.digest = tree_digest(files)
+        self.chunks: List[Chunk] = [
+            chunk
+            for file in sorted(files)
+            for chunk in chunk_file(file, files[file])
+            if chunk.text.strip()
+            and estimate_tokens(chunk.text) <= EMBEDDING_MAX_TOKENS
+        ]
+        self.lexical = BM25Index(
+            [f"{c.file} {c.symbol}\n{c.text}" for c in self.chunks]
+        )
+        self.vectors: Optional[VectorIndex] = None
+        if semantic and self.chunks:
+            self.vectors = VectorIndex()
+            if embeddings is None:
+                self.vectors.ingest_chunks(self.chunks)
+            else:
+                self.vectors.store.add_entries(
+                    embeddings.chunk_embeddings(files, self.chunks),
+                    [chunk.to_json() for chunk in self.chunks],
+                )
+
+    def search(
+        self, query: str, n: int = MAX_RESULTS, lexical_weight: float = LEXICAL_WEIGHT
+    ) -> List[RetrievalHit]:
+        """Return the chunks best matching a natural language or identifier query.
+
+        Args:
+                query (str): The query.
+                n (int): The most hits returned.
+                lexical_weight (float): The share of the fused score given to BM25, the rest going to cosine similarity.
+
+        Returns:
+                List[RetrievalHit]: The best hits, best first, leaving out chunks that match neither way.
+        """
+        if not self.chunks:
+            return []
+        lexical = self.lexical.scores(query)
+        if lexical.max() > 0:
+            lexical /= lexical.max()
+        if self.vectors is None:
+            fused = lexical
+        else:
+            semantic = self.vectors.similarities(query)
+            spread = semantic.max() - semantic.min()
+            semantic = (semantic - semantic.min()) / (spread if spread > 0 else 1)
+            fused = lexical_weight * lexical + (1 - lexical_weight) * semantic
+        return [
+            RetrievalHit(self.chunks[i], float(fused[i]))
+            for i in top_k(fused, n)
+            if fused[i] > 0
+        ]
+
+    def size(self) -> int:
+        """Estimate the memory held by the retriever.
+
+        Returns:
+                int: The bytes of chunk text and embeddings.
+        """
+        text = sum(len(chunk.text) for chunk in self.chunks)
+        if self.vectors is None:
+            return text
+        return text + self.vectors.store.matrix.nbytes
+
+
+def _shared() -> Tuple[MemoryLRU, VectorIndex]:
+    """The process wide retriever LRU and on-disk embedding index, created from the settings on first use."""
+    global _retrievers, _embeddings
+    with _shared_lock:
+        if _retrievers is None:
+            settings = get_settings()
+            _retrievers = MemoryLRU(
+                settings.retriever_cache_max_entries,
+                settings.retriever_cache_max_bytes,
+            )
+            _embeddings = VectorIndex(settings.retrieval_index_path)
+        return _retrievers, _embeddings
+
+
+def load_retriever(files: Dict[str, str], semantic: bool = True) -> HybridRetriever:
+    """Return the retriever of a file map, reusing it from a bounded in-memory LRU or else building it with the embeddings the on-disk index already holds for its blobs, so only files no earlier tree contained are embedded.
+
+    Args:
+            files (Dict[str, str]): The file map, normally the files of a checked-out commit.
+            semantic (bool): Whether a newly built retriever embeds its chunks.
+
+    Returns:
+            HybridRetriever: The retriever.
+    """
+    retrievers, embeddings = _shared()
+    key = f"retriever:{tree_digest(files)}:{semantic}"
+    with _building.hold(key):
+        found, retriever = retrievers.get(key)
+        if found:
+            return retriever
+        retrievers.miss()
+        with _embedding_lock:
+            retriever = HybridRetriever(files, semantic, embeddings)
+        retrievers.put(key, retriever, retriever.size())
+        return retriever
@@ -1,3 +1,17 @@
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+MAX_MATCHES = 50
+MAX_SNIPPET_CHARS = 200
+
+
 def search_tool(files: dict, search_string: str) -> list:
     search_string = search_string.lower()
     matching_files = [
@@ -6,3 +20,190 @@ def search_tool(files: dict, search_string: str) -> list:
         if search_string in content.lower()
     ]
     return matching_files
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the set of three character substrings of text.
+
+    Args:
+            text (str): The text to split, already lowercased by callers.
+
+    Returns:
+            Set[str]: Every trigram occurring in text.
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literals(parsed: Iterable) -> List[str]:
+    runs, run = [], []
+
+    def end_run() -> None:
+        if run:
+            runs.append("".join(run))
+            run.clear()
+
+    for op, argument in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(argument))
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            runs.extend(_required_literals(argument[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and argument[0] >= 1:
+            runs.extend(_required_literals(argument[2]))
+    end_run()
+    return runs
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Find literal strings every match of a regex must contain, so the trigram index can narrow candidates before the regex runs.
+
+    Alternations, optional parts and character classes contribute nothing, which keeps the filter conservative.
+
+    Args:
+            pattern (str): The regular expression.
+
+    Returns:
+            List[str]: Lowercased literal runs of at least three characters.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, TypeError):
+        return []
+    return [run.lower() for run in _required_literals(parsed) if len(run) >= 3]
+
+
+@dataclass
+class SearchMatch:
+    """A line of a file matching a search, with its 1-based line number."""
+
+    file: str
+    line: int
+    snippet: str
+
+    def __str__(self) -> str:
+        return f"{self.file}:{self.line}: {self.snippet}"
+
+
+class TrigramIndex:
+    """
+    A case-insensitive trigram inverted index over a file map that narrows the files a search has to scan, kept current by re-indexing only files whose contents changed.
+    """
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Set[str]] = {}
+        self.contents: Dict[str, str] = {}
+        self.lowered: Dict[str, str] = {}
+        self.file_trigrams: Dict[str, Set[str]] = {}
+
+    def _remove(self, filename: str) -> None:
+        for trigram in self.file_trigrams.pop(filename, ()):
+            files = self.postings[trigram]
+            files.discard(filename)
+            if not files:
+                del self.postings[trigram]
+        self.contents.pop(filename, None)
+        self.lowered.pop(filename, None)
+
+    def _add(self, filename: str, content: str) -> None:
+        lowered = content.lower()
+        self.contents[filename] = content
+        self.lowered[filename] = lowered
+        self.file_trigrams[filename] = trigrams(lowered)
+        for trigram in self.file_trigrams[filename]:
+            self.postings.setdefault(trigram, set()).add(filename)
+
+    def sync(self, files: Dict[str, str]) -> None:
+        """Bring the index in line with a file map, re-indexing only files that were added or whose contents changed and dropping files that are gone.
+
+        Args:
+                files (Dict[str, str]): The current file map.
+
+        Returns:
+                None
+        """
+        for filename in list(self.contents):
+            if filename not in files:
+                self._remove(filename)
+        for filename, content in files.items():
+            indexed = self.contents.get(filename)
+            if indexed is content or indexed == content:
+                continue
+            self._remove(filename)
+            self._add(filename, content)
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """Return the files containing every trigram of every literal, in sorted order.
+
+        Args:
+                literals (List[str]): Lowercased strings a matching file must contain.
+
+        Returns:
+                List[str]: The files that may match.
+        """
+        wanted = set().union(*[trigrams(literal) for literal in literals])
+        if not wanted:
+            return sorted(self.contents)
+        postings = sorted(
+            (self.postings.get(trigram, set()) for trigram in wanted), key=len
+        )
+        return sorted(set.intersection(*postings))
+
+    def search(
+        self, query: str, regex: bool = False, max_matches: Optional[int] = MAX_MATCHES
+    ) -> List[SearchMatch]:
+        """Find the lines matching a case-insensitive substring or regular expression, scanning only the files the trigram index cannot rule out.
+
+        Regular expressions, and substrings containing a newline, are matched against the whole file rather than line by line, so a match may span lines; it is reported on the line where it starts.
+
+        Args:
+                query (str): The substring or regular expression.
+                regex (bool): Whether query is a regular expression.
+                max_matches (Optional[int]): The most matches returned, or None for all.
+
+        Returns:
+                List[SearchMatch]: The matches in file then line order.
+
+        Raises:
+                re.error: If regex is True and query is not a valid regular expression.
+        """
+        if regex:
+            compiled = re.compile(query, re.IGNORECASE | re.MULTILINE)
+            literals = required_literals(query)
+        else:
+            literals = [query.lower()]
+        matches = []
+        for filename in self.candidates(literals):
+            if regex or "\n" in query:
+                text = self.contents[filename] if regex else self.lowered[filename]
+                if regex:
+                    starts = [match.start() for match in compiled.finditer(text)]
+                else:
+                    starts = _find_all(text, literals[0])
+                if not starts:
+                    continue
+                lines = self.contents[filename].split("\n")
+                breaks = [match.start() for match in re.finditer("\n", text)]
+                hits = list(
+                    dict.fromkeys(bisect_left(breaks, start) for start in starts)
+                )
+            else:
+                if literals[0] not in self.lowered[filename]:
+                    continue
+                lines = self.contents[filename].splitlines()
+                lowered = self.lowered[filename].splitlines()
+                hits = [i for i, line in enumerate(lowered) if literals[0] in line]
+            for i in hits:
+                snippet = lines[i].strip()[:MAX_SNIPPET_CHARS]
+                matches.append(SearchMatch(filename, i + 1, snippet))
+                if max_matches is not None and len(matches) >= max_matches:
+                    return matches
+        return matches
+
+
+def _find_all(text: str, substring: str) -> List[int]:
+    starts, start = [], text.find(substring)
+    while start != -1:
+        starts.append(start)
+        start = text.find(substring, start + 1)
+    return starts
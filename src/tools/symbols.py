@@ -0,0 +1,300 @@
+import ast
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from tools.imports import module_name, statements_from_tree
+
+
+@dataclass
+class Definition:
+    """A class, function or assignment defined in a file, with its dotted name inside the module, its 1-based inclusive line span, decorators included, and the columns it starts and ends at on those lines, as the UTF-8 byte offsets ast reports."""
+
+    file: str
+    qualified_name: str
+    kind: str
+    start_line: int
+    end_line: int
+    start_col: int = 0
+    end_col: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.qualified_name.rsplit(".", 1)[-1]
+
+
+@dataclass
+class FileSymbols:
+    """The symbols of one version of a file: its definitions, the lines each name is used on, and the modules it imports."""
+
+    definitions: Dict[str, Definition] = field(default_factory=dict)
+    by_name: Dict[str, List[Definition]] = field(default_factory=dict)
+    references: Dict[str, List[int]] = field(default_factory=dict)
+    imports: Set[str] = field(default_factory=set)
+    error: Optional[str] = None
+
+
+def node_position(node: ast.AST) -> Tuple[int, int, int, int]:
+    """Return where a definition starts and ends, so a node and the Definition recorded for it can be matched.
+
+    Args:
+            node (ast.AST): A class, function or assignment node.
+
+    Returns:
+            Tuple[int, int, int, int]: The first line, decorators included, the start column, the last line and the end column.
+    """
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    end_line = node.end_lineno or node.lineno
+    end_col = node.end_col_offset if node.end_col_offset is not None else 0
+    return start, node.col_offset, end_line, end_col
+
+
+class _SymbolVisitor(ast.NodeVisitor):
+    def __init__(self, file: str, symbols: FileSymbols):
+        self.file = file
+        self.symbols = symbols
+        self.scope: List[str] = []
+        self.kinds: List[str] = []
+
+    def define(self, node: ast.AST, name: str, kind: str) -> None:
+        qualified_name = ".".join(self.scope + [name])
+        start_line, start_col, end_line, end_col = node_position(node)
+        definition = Definition(
+            self.file, qualified_name, kind, start_line, end_line, start_col, end_col
+        )
+        self.symbols.definitions.setdefault(qualified_name, definition)
+        self.symbols.by_name.setdefault(name, []).append(definition)
+
+    def visit_scope(self, node: ast.AST, kind: str) -> None:
+        self.define(node, node.name, kind)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.scope.append(node.name)
+        self.kinds.append(kind)
+        for child in ast.iter_child_nodes(node):
+            if child not in node.decorator_list:
+                self.visit(child)
+        self.kinds.pop()
+        self.scope.pop()
+
+    def define_assignment(self, node: ast.AST, target: ast.AST) -> None:
+        if isinstance(target, ast.Name) and self.kinds[-1:] != ["function"]:
+            self.define(node, target.id, "assignment")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self.visit_scope(node, "function")
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self.visit_scope(node, "function")
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.visit_scope(node, "class")
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            self.define_assignment(node, target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self.define_assignment(node, node.target)
+        self.generic_visit(node)
+
+    def reference(self, name: str, line: int) -> None:
+        self.symbols.references.setdefault(name, []).append(line)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.reference(node.id, node.lineno)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.reference(node.attr, node.lineno)
+        self.generic_visit(node)
+
+
+def collect_symbols(file: str, tree: ast.Module) -> FileSymbols:
+    """Collect the definitions and references of a parsed module, leaving its imports empty.
+
+    Args:
+            file (str): The path of the file.
+            tree (ast.Module): The parsed module.
+
+    Returns:
+            FileSymbols: The symbols.
+    """
+    symbols = FileSymbols()
+    _SymbolVisitor(file, symbols).visit(tree)
+    return symbols
+
+
+def resolve(symbols: FileSymbols, name: str) -> Optional[Definition]:
+    """Look up a definition by qualified name, or else by plain name, taking the first definition in file order; every lookup of a node by name resolves it this way.
+
+    Args:
+            symbols (FileSymbols): The symbols of the file.
+            name (str): A qualified name such as 'Class.method', or a plain name.
+
+    Returns:
+            Optional[Definition]: The definition, or None if the file defines no such name.
+    """
+    if name in symbols.definitions:
+        return symbols.definitions[name]
+    candidates = symbols.by_name.get(name)
+    return candidates[0] if candidates else None
+
+
+def parse_symbols(file: str, source: str) -> FileSymbols:
+    """Collect the definitions, references and imports of a Python file in one AST pass.
+
+    Args:
+            file (str): The path of the file, used to resolve relative imports.
+            source (str): The contents of the file.
+
+    Returns:
+            FileSymbols: The symbols, empty with error set if the file does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return FileSymbols(error=str(e))
+    symbols = collect_symbols(file, tree)
+    for statement in statements_from_tree(tree, source, module_name(file)):
+        symbols.imports |= statement.modules()
+    return symbols
+
+
+class SymbolIndex:
+    """
+    Definitions, references and the module import graph of the Python files in a file map, parsed once per file version and kept current by reparsing only files whose contents changed.
+    """
+
+    def __init__(self) -> None:
+        self.contents: Dict[str, str] = {}
+        self.files: Dict[str, FileSymbols] = {}
+        self.referencing: Dict[str, Set[str]] = {}
+        self.importing: Dict[str, Set[str]] = {}
+        self.modules: Dict[str, str] = {}
+
+    def _remove(self, file: str) -> None:
+        symbols = self.files.pop(file, None)
+        self.contents.pop(file, None)
+        self.modules.pop(module_name(file), None)
+        if symbols is None:
+            return
+        for name in symbols.references:
+            self.referencing[name].discard(file)
+            if not self.referencing[name]:
+                del self.referencing[name]
+        for module in symbols.imports:
+            self.importing[module].discard(file)
+            if not self.importing[module]:
+                del self.importing[module]
+
+    def _add(self, file: str, content: str) -> None:
+        symbols = parse_symbols(file, content)
+        self.contents[file] = content
+        self.files[file] = symbols
+        self.modules[module_name(file)] = file
+        for name in symbols.references:
+            self.referencing.setdefault(name, set()).add(file)
+        for module in symbols.imports:
+            self.importing.setdefault(module, set()).add(file)
+
+    def sync(self, files: Dict[str, str]) -> None:
+        """Bring the index in line with a file map, reparsing only Python files that were added or changed and dropping files that are gone.
+
+        Args:
+                files (Dict[str, str]): The current file map.
+
+        Returns:
+                None
+        """
+        for file in list(self.contents):
+            if file not in files:
+                self._remove(file)
+        for file in files:
+            if not file.endswith(".py"):
+                continue
+            content = files[file]
+            indexed = self.contents.get(file)
+            if indexed is content or indexed == content:
+                continue
+            self._remove(file)
+            self._add(file, content)
+
+    def symbols(self, file: str) -> FileSymbols:
+        """Return the symbols of an indexed file.
+
+        Args:
+                file (str): The path of the file.
+
+        Returns:
+                FileSymbols: The symbols, empty if the file is not indexed.
+        """
+        return self.files.get(file, FileSymbols())
+
+    def definition(self, file: str, name: str) -> Optional[Definition]:
+        """Look up a definition in a file by qualified name, or else by plain name, resolving it as resolve does.
+
+        Args:
+                file (str): The path of the file.
+                name (str): A qualified name such as 'Class.method', or a plain name.
+
+        Returns:
+                Optional[Definition]: The definition, or None if the file defines no such name.
+        """
+        return resolve(self.symbols(file), name)
+
+    def find(self, name: str) -> List[Definition]:
+        """Find the definitions of a qualified or plain name in every indexed file.
+
+        Args:
+                name (str): The name to look up.
+
+        Returns:
+                List[Definition]: The definitions, in file order.
+        """
+        found = []
+        for file in sorted(self.files):
+            definition = self.definition(file, name)
+            if definition is not None:
+                found.append(definition)
+        return found
+
+    def references(self, name: str) -> List[str]:
+        """Return the files that use a name, as a variable or an attribute.
+
+        Args:
+                name (str): The unqualified name.
+
+        Returns:
+                List[str]: The referencing files, sorted.
+        """
+        return sorted(self.referencing.get(name, ()))
+
+    def importers(self, module: str) -> List[str]:
+        """Return the files importing a module, directly or by importing a name from it.
+
+        Args:
+                module (str): The dotted module name.
+
+        Returns:
+                List[str]: The importing files, sorted.
+        """
+        return sorted(self.importing.get(module, ()))
+
+    def dependencies(self, file: str) -> List[str]:
+        """Return the indexed files a file imports, the edges of the project import graph.
+
+        Args:
+                file (str): The path of the importing file.
+
+        Returns:
+                List[str]: The imported project files, sorted.
+        """
+        return sorted(
+            {
+                self.modules[module]
+                for module in self.symbols(file).imports
+                if module in self.modules and self.modules[module] != file
+            }
+        )
@@ -0,0 +1,65 @@
+from tools.chunk import Chunk, chunk_file, chunk_python, parse_location
+
+SOURCE = '''import os
+
+X = 1
+
+
+@decorator
+def first():
+    return 1
+
+
+class Big:
+    """Docstring."""
+
+    value = 2
+
+    def method(self):
+        return self.value
+
+    async def other(self):
+        return 3
+
+
+# trailing comment
+print(first())
+'''
+
+
+def test_chunk_python_splits_by_symbol_with_spans():
+    chunks = chunk_python("a.py", SOURCE)
+    assert [(c.symbol, c.start_line, c.end_line) for c in chunks] == [
+        ("<module>", 1, 5),
+        ("first", 6, 8),
+        ("Big", 11, 20),
+        ("<module>", 21, 24),
+    ]
+    lines = SOURCE.splitlines()
+    for chunk in chunks:
+        assert chunk.text == "\n".join(lines[chunk.start_line - 1 : chunk.end_line])
+
+
+def test_large_classes_are_split_into_methods():
+    chunks = chunk_python("a.py", SOURCE, max_chars=120)
+    symbols = [c.symbol for c in chunks]
+    assert "Big.method" in symbols and "Big.other" in symbols
+    assert all(len(c.text) <= 120 for c in chunks)
+
+
+def test_non_python_and_invalid_files_use_windows():
+    text = "\n".join(f"line {i}" for i in range(150))
+    chunks = chunk_file("notes.txt", text)
+    assert [(c.start_line, c.end_line) for c in chunks] == [
+        (1, 60),
+        (51, 110),
+        (101, 150),
+    ]
+    assert chunk_file("broken.py", "def (:\n")[0].symbol == ""
+
+
+def test_locations_round_trip():
+    chunk = Chunk("src/a.py", "first", 6, 8, "text")
+    assert parse_location(chunk.location) == ("src/a.py", (6, 8))
+    assert parse_location("src/a.py") == ("src/a.py", None)
+    assert Chunk.from_json(chunk.to_json()) == chunk
@@ -1,6 +1,9 @@
+import ast
+
 import pytest
-from tools.code import replace_node
+from tools.code import find_node, replace_node, splice_lines, splice_node
 from dataclasses import dataclass
+from tools.symbols import SymbolIndex
 
 ORIGINAL_CODE = """
 def greet():
@@ -57,3 +60,90 @@ def test_replace_constant():
     # Check if NEW_CONSTANT is in the result and CONSTANT is not
     assert "CONSTANT = 'new_value'" in result
     assert "CONSTANT = 'old_value'" not in result
+
+
+SPLICE_SOURCE = """import os  # keep this comment
+
+
+class Greeter:
+    # The greeting used by default
+    default = 'hi'
+
+    @staticmethod
+    def greet(name):
+        # say hello
+        return 'hello ' + name
+
+    def part(self):
+        return   'bye'   # odd spacing stays
+
+
+def greet():
+    return 'top level'
+"""
+
+
+def test_splice_node_replaces_only_the_qualified_node():
+    result = splice_node(
+        SPLICE_SOURCE,
+        "Greeter.greet",
+        "@staticmethod\ndef greet(name, punctuation='!'):\n\treturn 'hello ' + name + punctuation",
+    )
+    before, _, after = SPLICE_SOURCE.partition(
+        "    @staticmethod\n    def greet(name):\n        # say hello\n        return 'hello ' + name\n"
+    )
+    assert result == (
+        before
+        + "    @staticmethod\n    def greet(name, punctuation='!'):\n"
+        + "        return 'hello ' + name + punctuation\n"
+        + after
+    )
+    assert "return 'top level'" in result
+
+
+def test_splice_node_reformats_only_the_new_code():
+    result = splice_node(SPLICE_SOURCE, "greet", "def greet( ):\n  return 'hey'", True)
+    assert result.endswith('def greet():\n    return "hey"\n')
+    assert result.startswith(
+        SPLICE_SOURCE[: SPLICE_SOURCE.index("def greet():\n    return 'top")]
+    )
+    assert "return   'bye'   # odd spacing stays" in result
+
+
+def test_splice_lines_keeps_crlf_line_endings():
+    source = "x = 1\r\ny = 2\r\nz = 3\r\n"
+    assert splice_lines(source, 2, 2, "y = 20\nw = 4") == (
+        "x = 1\r\ny = 20\r\nw = 4\r\nz = 3\r\n"
+    )
+
+
+def test_splice_node_rejects_missing_nodes_and_invalid_code():
+    with pytest.raises(ValueError):
+        splice_node(SPLICE_SOURCE, "Greeter.missing", "def missing(): pass")
+    with pytest.raises(ValueError):
+        splice_node(SPLICE_SOURCE, "Greeter.part", "def part(self:\n    pass")
+
+
+def test_splice_node_keeps_code_sharing_the_node_line():
+    source = "a = 1; b = 2\nif DEBUG: LEVEL = 'debug'\nc = 3\n"
+    assert splice_node(source, "b", "b = 20") == (
+        "a = 1; b = 20\nif DEBUG: LEVEL = 'debug'\nc = 3\n"
+    )
+    assert splice_node(source, "LEVEL", "LEVEL = 'trace'", True) == (
+        "a = 1; b = 2\nif DEBUG: LEVEL = 'trace'\nc = 3\n"
+    )
+    assert splice_node(source, "c", "c = 30\nd = 4") == (
+        "a = 1; b = 2\nif DEBUG: LEVEL = 'debug'\nc = 30\nd = 4\n"
+    )
+    with pytest.raises(ValueError):
+        splice_node(source, "a", "a = 10\nz = 0")
+
+
+def test_find_node_resolves_names_like_the_symbol_index():
+    source = "class A:\n    def run(self):\n        pass\n\n\ndef helper():\n    def run():\n        pass\n"
+    index = SymbolIndex()
+    index.sync({"m.py": source})
+    definition = index.definition("m.py", "run")
+    node = find_node(ast.parse(source), "run")
+    assert (definition.qualified_name, node.lineno) == ("A.run", 2)
+    assert find_node(ast.parse(source), "helper.run").lineno == 7
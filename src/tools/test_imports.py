@@ -0,0 +1,88 @@
+import os
+import pytest
+from tools.imports import (
+    _tokenized_statements,
+    dependency_graph,
+    extract_imports,
+    imports,
+    module_name,
+)
+
+CASES = {
+    "plain": "import os\nimport os.path as osp, sys\n",
+    "from": "from typing import Dict, List\nfrom json import *\n",
+    "parenthesized": "from collections import (\n    OrderedDict,\n    defaultdict,  # comment\n)\nx = 1\n",
+    "relative": "from . import sibling\nfrom .. import parent\nfrom .child import thing\n",
+    "conditional": "try:\n    import numpy\nexcept ImportError:\n    numpy = None\nif TYPE_CHECKING:\n    from a import b\n",
+    "nested": "def load():\n    import yaml\n    return yaml\n\nclass A:\n    from b import c\n",
+    "semicolons": "import a; import b\n",
+    "continuation": "from x import a, \\\n    b\n",
+    "strings": 'text = """\nimport not_an_import\n"""\n# import commented\n',
+    "unicode": "name = 'é'; import é_module\n",
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_tokenize_fallback_matches_ast(name):
+    source = CASES[name]
+    package = module_name("src/pkg/sub/mod.py")
+    assert _tokenized_statements(source, package) == extract_imports(
+        source, "src/pkg/sub/mod.py"
+    )
+
+
+def test_tokenize_fallback_matches_ast_on_repository_sources():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith(".py"):
+                continue
+            with open(os.path.join(path, name), "r") as file:
+                source = file.read()
+            file_name = os.path.relpath(os.path.join(path, name), root)
+            expected = extract_imports(source, file_name)
+            assert _tokenized_statements(source, module_name(file_name)) == expected
+
+
+def test_extract_imports_resolves_and_flags_statements():
+    statements = extract_imports(
+        CASES["relative"] + CASES["conditional"], "src/pkg/sub/mod.py"
+    )
+    assert [s.module for s in statements] == [
+        "pkg.sub",
+        "pkg",
+        "pkg.sub.child",
+        "numpy",
+        "a",
+    ]
+    assert statements[0].modules() == {"pkg.sub", "pkg.sub.sibling"}
+    assert [s.conditional for s in statements] == [False] * 3 + [True] * 2
+
+
+def test_broken_sources_use_the_token_stream():
+    source = "import os\nfrom typing import (\n    List,\n)\ndef broken(:\n"
+    assert [s.module for s in extract_imports(source)] == ["os", "typing"]
+    assert extract_imports(source)[1].end_line == 4
+
+
+def test_imports_lists_statement_text():
+    assert imports(CASES["parenthesized"] + CASES["semicolons"]) == (
+        "from collections import (\n    OrderedDict,\n    defaultdict,  # comment\n)\n"
+        "import a\nimport b"
+    )
+
+
+def test_dependency_graph_resolves_project_files():
+    files = {
+        "src/main.py": "import pkg\nfrom pkg import mod\nimport requests\n",
+        "src/pkg/__init__.py": "from .mod import run\n",
+        "src/pkg/mod.py": "from . import helpers\n",
+        "src/pkg/helpers.py": "",
+        "README.md": "import pkg",
+    }
+    assert dependency_graph(files) == {
+        "src/main.py": ["src/pkg/__init__.py", "src/pkg/mod.py"],
+        "src/pkg/__init__.py": ["src/pkg/mod.py"],
+        "src/pkg/helpers.py": [],
+        "src/pkg/mod.py": ["src/pkg/__init__.py", "src/pkg/helpers.py"],
+    }
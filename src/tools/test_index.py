@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+from git import Repo
 from tools import index
 
 django_query = """
@@ -64,6 +67,21 @@ print(a)
 """
 
 
+@pytest.fixture
+def embedded(monkeypatch):
+    texts_embedded = []
+
+    def fake_embeddings(texts):
+        texts_embedded.extend(texts)
+        return [
+            np.random.default_rng(len(text)).standard_normal(index.EMBEDDING_DIMENSIONS)
+            for text in texts
+        ]
+
+    monkeypatch.setattr(index, "calculate_text_embeddings", fake_embeddings)
+    return texts_embedded
+
+
 def test_VectorIndex_ingest():
     vector_index_instance = index.VectorIndex()
     vector_index_instance.ingest(django_query)
@@ -78,3 +96,76 @@ def test_VectorIndex_retrieve():
     vector_index_instance.ingest(numpy_code2)
     results = vector_index_instance.retrieve(numpy_code3, 2)
     assert set(results) == {numpy_code1, numpy_code2}
+
+
+def test_sync_embeds_only_changed_blobs(tmp_path, embedded):
+    work = tmp_path / "repo"
+    git_repo = Repo.init(work)
+    for name, code in [
+        ("a.py", quicksort_code),
+        ("b.py", numpy_code1),
+        ("c.py", numpy_code2),
+    ]:
+        (work / name).write_text(code)
+    git_repo.index.add(["a.py", "b.py", "c.py"])
+    git_repo.index.commit("initial")
+    vector_index = index.VectorIndex(str(tmp_path / "index"))
+    assert vector_index.sync(str(work)) == {"added": 3, "removed": 0, "unchanged": 0}
+    (work / "b.py").write_text(numpy_code3)
+    git_repo.index.add(["b.py"])
+    git_repo.index.remove(["c.py"], working_tree=True)
+    git_repo.index.commit("change")
+    embedded.clear()
+    assert vector_index.sync(str(work)) == {"added": 1, "removed": 2, "unchanged": 1}
+    assert embedded == [numpy_code3.rstrip("\n")]
+    assert len(vector_index.store.hashes()) == 2
+
+
+def test_sync_keeps_duplicate_files_until_each_path_is_gone(tmp_path, embedded):
+    work = tmp_path / "repo"
+    git_repo = Repo.init(work)
+    for name in ["a.py", "b.py"]:
+        (work / name).write_text(numpy_code1)
+    git_repo.index.add(["a.py", "b.py"])
+    git_repo.index.commit("initial")
+    vector_index = index.VectorIndex(str(tmp_path / "index"))
+    assert vector_index.sync(str(work)) == {"added": 2, "removed": 0, "unchanged": 0}
+    assert embedded == [numpy_code1.rstrip("\n")]
+    git_repo.index.move(["b.py", "c.py"])
+    git_repo.index.commit("rename")
+    assert vector_index.sync(str(work)) == {"added": 1, "removed": 1, "unchanged": 1}
+    git_repo.index.remove(["c.py"], working_tree=True)
+    git_repo.index.commit("delete")
+    assert vector_index.sync(str(work)) == {"added": 0, "removed": 1, "unchanged": 1}
+    assert embedded == [numpy_code1.rstrip("\n")]
+    (key,) = vector_index.store.hashes()
+    assert key.endswith(":a.py")
+    _, values = vector_index.store.entries(key)
+    assert {index.Chunk.from_json(value).file for value in values} == {"a.py"}
+
+
+def test_sync_keeps_files_ingested_before_and_rereads_nothing(
+    tmp_path, embedded, monkeypatch
+):
+    work = tmp_path / "repo"
+    git_repo = Repo.init(work)
+    (work / "a.py").write_text(numpy_code1)
+    (work / "empty.py").write_text("")
+    (work / "data.bin").write_bytes(b"\xff\xfe\x00")
+    git_repo.index.add(["a.py", "empty.py", "data.bin"])
+    git_repo.index.commit("initial")
+    vector_index = index.VectorIndex(str(tmp_path / "index"))
+    assert vector_index.ingest_file("a.py", numpy_code1) == 1
+    embedded.clear()
+    assert vector_index.sync(str(work)) == {"added": 0, "removed": 0, "unchanged": 1}
+    assert embedded == []
+    assert len(vector_index.store) == 1
+    chunked = []
+    chunk_file = index.chunk_file
+    monkeypatch.setattr(
+        index,
+        "chunk_file",
+        lambda path, source: chunked.append(path) or chunk_file(path, source),
+    )
+    assert vector_index.sync(str(work)) == {"added": 0, "removed": 0, "unchanged": 3}
+    assert chunked == []
@@ -0,0 +1,100 @@
+import pytest
+from tools import replace_file
+from tools.patch import (
+    EditBlock,
+    PatchError,
+    apply_edits,
+    parse_edits,
+)
+
+ORIGINAL = """import os
+
+
+class Greeter:
+    def greet(self, name):
+        return "hello " + name
+
+    def part(self, name):
+        return "bye " + name
+"""
+
+
+def test_search_replace_blocks_apply_with_tab_indentation():
+    response = """```
+<<<<<<< SEARCH
+\tdef greet(self, name):
+\t\treturn "hello " + name
+=======
+\tdef greet(self, name, punctuation="!"):
+\t\treturn "hello " + name + punctuation
+>>>>>>> REPLACE
+<<<<<<< SEARCH
+import os
+=======
+>>>>>>> REPLACE
+```"""
+    edited = apply_edits(ORIGINAL, parse_edits(response))
+    assert edited.startswith("\n\nclass Greeter:")
+    assert '        return "hello " + name + punctuation\n' in edited
+    assert '    def greet(self, name, punctuation="!"):\n' in edited
+
+
+def test_unified_diff_hunks_match_by_content():
+    diff = """--- a/greeter.py
++++ b/greeter.py
+@@ -8,2 +8,2 @@
+     def part(self, name):
+-        return "bye " + name
++        return "goodbye " + name
+"""
+    assert parse_edits(diff) == [
+        EditBlock(
+            '    def part(self, name):\n        return "bye " + name\n',
+            '    def part(self, name):\n        return "goodbye " + name\n',
+        )
+    ]
+    assert 'return "goodbye " + name' in apply_edits(ORIGINAL, parse_edits(diff))
+
+
+def test_fuzzy_match_tolerates_small_differences_and_reindents():
+    block = EditBlock(
+        'def part(self, nme):\n    return "bye" + name',
+        'def part(self):\n    return "bye"',
+    )
+    edited = apply_edits(ORIGINAL, [block])
+    assert edited.endswith('    def part(self):\n        return "bye"\n')
+
+
+def test_exact_match_is_anchored_to_whole_lines():
+    content = "total = x = 1\nx = 1\nprint(x)\n"
+    assert apply_edits(content, [EditBlock("x = 1", "x = 2")]) == (
+        "total = x = 1\nx = 2\nprint(x)\n"
+    )
+    assert apply_edits(content, [EditBlock("x = 1\n", "")]) == (
+        "total = x = 1\nprint(x)\n"
+    )
+    with pytest.raises(PatchError):
+        apply_edits(content, [EditBlock("total = x", "total = y")])
+
+
+@pytest.mark.parametrize(
+    "block",
+    [EditBlock("return", "yield"), EditBlock("def missing():\n    pass", "")],
+)
+def test_ambiguous_or_missing_search_text_raises(block):
+    with pytest.raises(PatchError):
+        apply_edits(ORIGINAL, [block])
+
+
+def test_unparsable_edits_fall_back_to_regenerating_the_file(monkeypatch):
+    responses = iter(
+        [
+            "<<<<<<< SEARCH\nimport os\n=======\nimport os(\n>>>>>>> REPLACE",
+            "plan",
+            "import sys\n",
+        ]
+    )
+    monkeypatch.setattr(replace_file, "gpt_query", lambda *a, **k: next(responses))
+    assert replace_file.modify_file(ORIGINAL, "use sys", "", "greeter.py") == (
+        "import sys"
+    )
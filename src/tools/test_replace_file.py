@@ -0,0 +1,72 @@
+import pytest
+from gpt import StreamAborted
+from tools import replace_file
+from tools.replace_file import python_prefix_is_invalid, stream_guard
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "def f(x):\n",
+        "def f(x):\n\treturn [1,\n",
+        "class A:\n\tdef f(self):\n\t\tx = '''abc\n",
+        "```python\nimport os\n",
+        "@decorator\n",
+        "```python\nimport os\n```\n",
+        "```python\nimport os\n```\nThis adds the import.\n",
+    ],
+)
+def test_incomplete_prefix_is_not_invalid(source):
+    assert not python_prefix_is_invalid(source)
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["import os\nx = = 2\n", "def f():\n\treturn 1\n  x = 2\n", "x = 1 +\n"],
+)
+def test_broken_prefix_is_invalid(source):
+    assert python_prefix_is_invalid(source)
+
+
+def test_stream_guard_aborts_past_size_bound():
+    on_token = stream_guard("notes.txt", max_chars=10)
+    assert on_token("hello", "hello")
+    assert not on_token(" world!", "hello world!")
+
+
+def test_stream_guard_aborts_on_invalid_python():
+    on_token = stream_guard("main.py", max_chars=10**6)
+    accumulated = ""
+    results = []
+    for line in ["x = 1\n"] * 10 + ["y = = 2\n"] + ["z = 3\n"] * 10:
+        accumulated += line
+        results.append(on_token(line, accumulated))
+    assert results[:10] == [True] * 10
+    assert False in results
+
+
+def test_stream_guard_skips_syntax_check_for_other_files():
+    on_token = stream_guard("README.md", max_chars=10**6)
+    text = "not = = python\n" * 40
+    assert on_token(text, text)
+
+
+def test_stream_guard_accepts_a_closed_fence():
+    on_token = stream_guard("main.py", max_chars=10**6)
+    text = "```python\n" + "x = 1\n" * 30 + "```\nThe file sets x, then explains it.\n"
+    assert on_token(text, text)
+
+
+def test_modify_file_retries_without_the_guard(monkeypatch):
+    calls = []
+
+    def fake_gpt_query(message, system, on_token=None):
+        calls.append(on_token)
+        if on_token is not None:
+            raise StreamAborted("x = = 1")
+        return "```python\nx = 1\n```"
+
+    monkeypatch.setattr(replace_file, "gpt_query", fake_gpt_query)
+    monkeypatch.setattr(replace_file, "edit_file", lambda *args: None)
+    assert replace_file.modify_file("x = 0\n", "Set x to 1", "", "main.py") == "x = 1"
+    assert calls[-1] is None and calls[-2] is not None
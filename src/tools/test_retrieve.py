@@ -0,0 +1,103 @@
+import zlib
+import numpy as np
+from commands.command_retrieve import Retrieve
+from commands.state import State
+from tools import index, retrieve
+from utilities.cache import MemoryLRU
+
+FILES = {
+    "src/geometry.py": "def area_of_circle(radius):\n    return 3.14159 * radius * radius\n\n\ndef perimeter(width, height):\n    return 2 * (width + height)\n",
+    "src/network.py": "import socket\n\n\nclass HttpClient:\n    def fetch_url(self, url):\n        return socket.create_connection((url, 80))\n",
+    "README.md": "Utilities for shapes and downloading web pages.\n",
+}
+
+
+def fake_embedding(text: str) -> list:
+    vector = np.zeros(64)
+    for token in retrieve.tokenize(text):
+        vector[zlib.crc32(token.encode()) % 64] += 1
+    return list(vector)
+
+
+def use_fake_embeddings(monkeypatch) -> None:
+    monkeypatch.setattr(index, "calculate_text_embedding", fake_embedding)
+    monkeypatch.setattr(
+        index,
+        "calculate_text_embeddings",
+        lambda texts: [fake_embedding(text) for text in texts],
+    )
+
+
+def test_tokenize_splits_compound_identifiers():
+    assert retrieve.tokenize("parse_location(HttpClient)") == [
+        "parse_location",
+        "parse",
+        "location",
+        "httpclient",
+        "http",
+        "client",
+    ]
+
+
+def test_bm25_ranks_rarer_terms_higher():
+    bm25 = retrieve.BM25Index(["apple banana", "apple cherry", "apple"])
+    scores = bm25.scores("cherry apple")
+    assert np.argmax(scores) == 1
+    assert bm25.scores("durian").sum() == 0
+
+
+def test_hybrid_search_returns_symbol_spans(monkeypatch):
+    use_fake_embeddings(monkeypatch)
+    retriever = retrieve.HybridRetriever(FILES)
+    hits = retriever.search("circle radius", 2)
+    assert hits[0].chunk.location == "src/geometry.py:1-2"
+    assert hits[0].chunk.symbol == "area_of_circle"
+    assert str(hits[0]).startswith("src/geometry.py:1-2 area_of_circle")
+    assert "2:     return 3.14159 * radius * radius" in str(hits[0])
+
+
+def test_retrieve_leaves_out_edited_files(monkeypatch):
+    use_fake_embeddings(monkeypatch)
+    state = State(FILES)
+    state.retriever = retrieve.HybridRetriever(FILES)
+    state.files["src/network.py"] = "class HttpClient:\n    pass\n"
+    output = Retrieve("fetch url").execute(state)
+    assert "src/network.py:" not in output
+    assert "edited since the loop started, not shown: src/network.py" in output
+
+
+def test_load_retriever_embeds_each_blob_once(tmp_path, monkeypatch):
+    embedded = []
+
+    def fake_embeddings(texts):
+        embedded.extend(texts)
+        return [fake_embedding(text) for text in texts]
+
+    monkeypatch.setattr(index, "calculate_text_embedding", fake_embedding)
+    monkeypatch.setattr(index, "calculate_text_embeddings", fake_embeddings)
+    monkeypatch.setattr(index, "EMBEDDING_DIMENSIONS", 64)
+    monkeypatch.setattr(retrieve, "_retrievers", MemoryLRU(1, 1 << 20))
+    monkeypatch.setattr(retrieve, "_embeddings", index.VectorIndex(str(tmp_path)))
+    first = retrieve.load_retriever(FILES)
+    assert retrieve.load_retriever(FILES) is first
+    count = len(embedded)
+    edited = dict(FILES, **{"README.md": "Shapes only.\n"})
+    second = retrieve.load_retriever(edited)
+    assert embedded[count:] == ["Shapes only."]
+    assert second.search("circle radius", 1)[0].chunk.symbol == "area_of_circle"
+    embedded.clear()
+    assert retrieve.load_retriever(FILES) is not first
+    assert embedded == []
+
+
+def test_retrieve_reports_a_failed_index_build(tmp_path, monkeypatch):
+    def failing_embeddings(texts):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(index, "calculate_text_embeddings", failing_embeddings)
+    monkeypatch.setattr(retrieve, "_retrievers", MemoryLRU(1, 1 << 20))
+    monkeypatch.setattr(retrieve, "_embeddings", index.VectorIndex(str(tmp_path)))
+    state = State(FILES)
+    output = Retrieve("circle").execute(state)
+    assert output == "Retrieve is unavailable: rate limited. Use Search instead."
+    assert state.retriever is None
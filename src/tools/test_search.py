@@ -0,0 +1,60 @@
+from tools.search import TrigramIndex, required_literals, search_tool
+
+FILES = {
+    "a.py": "import os\n\ndef Load_Config(path):\n    return open(path).read()\n",
+    "b.py": "from a import load_config\n\nCONFIG = load_config('x.yaml')\n",
+    "c.txt": "nothing to see here\n",
+}
+
+
+def test_substring_search_returns_lines_like_search_tool():
+    index = TrigramIndex()
+    index.sync(FILES)
+    matches = index.search("load_config")
+    assert [(m.file, m.line) for m in matches] == [
+        ("a.py", 3),
+        ("b.py", 1),
+        ("b.py", 3),
+    ]
+    assert str(matches[0]) == "a.py:3: def Load_Config(path):"
+    assert sorted({m.file for m in matches}) == sorted(
+        search_tool(FILES, "load_config")
+    )
+    assert index.candidates(["load_config"]) == ["a.py", "b.py"]
+
+
+def test_regex_search_and_required_literals():
+    index = TrigramIndex()
+    index.sync(FILES)
+    assert required_literals(r"def\s+load_\w+\(") == ["def", "load_"]
+    assert required_literals(r"(foo|bar)baz?") == []
+    matches = index.search(r"def\s+load_\w+\(", regex=True)
+    assert [(m.file, m.line) for m in matches] == [("a.py", 3)]
+
+
+def test_sync_reindexes_only_changed_files():
+    index = TrigramIndex()
+    files = dict(FILES)
+    index.sync(files)
+    trigrams_of_a = index.file_trigrams["a.py"]
+    files["b.py"] = "nothing here either\n"
+    del files["c.txt"]
+    files["d.py"] = "load_config()\n"
+    index.sync(files)
+    assert index.file_trigrams["a.py"] is trigrams_of_a
+    assert "c.txt" not in index.contents
+    assert [m.file for m in index.search("load_config")] == ["a.py", "d.py"]
+
+
+def test_queries_spanning_lines_match_the_whole_file():
+    index = TrigramIndex()
+    index.sync(FILES)
+    matches = index.search("(path):\n    RETURN open")
+    assert [str(m) for m in matches] == ["a.py:3: def Load_Config(path):"]
+    assert [(m.file, m.line) for m in index.search("\n\n")] == [
+        ("a.py", 1),
+        ("b.py", 1),
+    ]
+    matches = index.search(r"load_config\(path\):\s+return", regex=True)
+    assert [(m.file, m.line) for m in matches] == [("a.py", 3)]
+    assert index.search("import os\nfrom") == []
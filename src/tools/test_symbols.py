@@ -0,0 +1,107 @@
+from tools.move_file import move_file
+from tools.symbols import SymbolIndex, parse_symbols
+
+SHAPES = """import math
+from typing import List
+
+
+@dataclass
+class Circle:
+    radius: float
+
+    def area(self) -> float:
+        result: float = math.pi * self.radius**2
+        return result
+
+
+SCALE = 2
+"""
+
+DRAW = """from .shapes import Circle
+from tools import helpers
+
+
+def draw(circle: Circle) -> None:
+    print(circle.area())
+"""
+
+
+def test_parse_symbols_records_spans_references_and_imports():
+    symbols = parse_symbols("src/geometry/shapes.py", SHAPES)
+    circle = symbols.definitions["Circle"]
+    assert (circle.kind, circle.start_line, circle.end_line) == ("class", 5, 11)
+    area = symbols.definitions["Circle.area"]
+    assert (area.kind, area.start_line, area.end_line) == ("function", 9, 11)
+    assert symbols.definitions["Circle.radius"].kind == "assignment"
+    assert symbols.definitions["SCALE"].start_line == 14
+    assert "result" not in symbols.by_name
+    assert symbols.references["pi"] == [10]
+    assert symbols.imports == {"math", "typing", "typing.List"}
+
+
+def test_relative_imports_resolve_against_the_package():
+    symbols = parse_symbols("src/geometry/draw.py", DRAW)
+    assert "geometry.shapes" in symbols.imports
+    assert "geometry.shapes.Circle" in symbols.imports
+    assert "tools.helpers" in symbols.imports
+
+
+def test_syntax_errors_leave_the_file_empty():
+    symbols = parse_symbols("src/broken.py", "def broken(:\n")
+    assert symbols.error is not None
+    assert symbols.definitions == {}
+
+
+def test_index_updates_incrementally():
+    files = {"src/geometry/shapes.py": SHAPES, "src/geometry/draw.py": DRAW}
+    index = SymbolIndex()
+    index.sync(files)
+    assert index.definition("src/geometry/shapes.py", "area").qualified_name == (
+        "Circle.area"
+    )
+    assert index.importers("geometry.shapes") == ["src/geometry/draw.py"]
+    assert index.dependencies("src/geometry/draw.py") == ["src/geometry/shapes.py"]
+    assert index.references("area") == ["src/geometry/draw.py"]
+    parsed = index.files["src/geometry/shapes.py"]
+    files["src/geometry/draw.py"] = "def draw():\n    pass\n"
+    index.sync(files)
+    assert index.files["src/geometry/shapes.py"] is parsed
+    assert index.importers("geometry.shapes") == []
+    assert index.references("area") == []
+    del files["src/geometry/shapes.py"]
+    index.sync(files)
+    assert index.find("Circle") == []
+
+
+class UnreadableFiles(dict):
+    def __getitem__(self, file):
+        assert file.endswith(".py"), f"read {file}"
+        return super().__getitem__(file)
+
+    def items(self):
+        return [(file, self[file]) for file in self]
+
+
+def test_index_reads_only_python_files():
+    index = SymbolIndex()
+    index.sync(UnreadableFiles({"src/geometry/shapes.py": SHAPES, "README.md": ""}))
+    assert list(index.files) == ["src/geometry/shapes.py"]
+
+
+def test_move_file_fixes_only_importers():
+    files = {
+        "src/geometry/shapes.py": SHAPES,
+        "src/main.py": "from geometry.shapes import Circle\n",
+        "README.md": "import geometry.shapes to draw",
+    }
+    index = SymbolIndex()
+    index.sync(files)
+    moved = move_file(
+        files,
+        "src/geometry/shapes.py",
+        "src/shapes.py",
+        index.importers("geometry.shapes"),
+    )
+    assert "src/shapes.py" in moved
+    assert moved["src/main.py"] == "from shapes import Circle\n"
+    assert moved["README.md"] == files["README.md"]
@@ -6,6 +6,7 @@ TAG_COLOR_MAPPING = {
     "gpt-output": {"background": "#000000", "border": "#808080", "text": "#A3E8FA"},
     "exception": {"background": "#000000", "border": "#FF0000", "text": "#FF9698"},
     "system": {"background": "#000000", "border": "#000000", "text": "#A9A9A9"},
+    "metric": {"background": "#000000", "border": "#FFD700", "text": "#FFD700"},
 }
 
 
@@ -2,3 +2,4 @@ GPT_INPUT = "gpt-input"
 GPT_OUTPUT = "gpt-output"
 EXCEPTION = "exception"
 SYSTEM = "system"
+METRIC = "metric"
@@ -1,10 +1,12 @@
+from contextvars import ContextVar
 from dataclasses import dataclass
-from threading import local
+from threading import Lock, local
 import os
 from typing import Optional, Tuple
 from tracing.render import render_trace
 
 _thread_local = local()
+_task_trace: ContextVar[Optional["Trace"]] = ContextVar("task_trace", default=None)
 
 
 @dataclass
@@ -22,15 +24,17 @@ class Trace:
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.name = f"{current_time}_{name}"
         self.trace_data = []
+        self._lock = Lock()
 
     def add_trace_data(self, tag, trace, tokens: Optional[Tuple[int, int]] = None):
         if self.name == "":
             return
-        self.trace_data.append(TraceData(tag, trace, tokens))
-        html_trace = render_trace(self)
-        os.makedirs("traces", exist_ok=True)
-        with open(f"traces/{self.name}.html", "wb") as f:
-            f.write(html_trace.encode("utf-8"))
+        with self._lock:
+            self.trace_data.append(TraceData(tag, trace, tokens))
+            html_trace = render_trace(self)
+            os.makedirs("traces", exist_ok=True)
+            with open(f"traces/{self.name}.html", "wb") as f:
+                f.write(html_trace.encode("utf-8"))
 
 
 def create_trace(name: str):
@@ -41,7 +45,19 @@ def bind_trace(trace: Trace):
     _thread_local.trace = trace
 
 
+def bind_task_trace(trace: Trace) -> None:
+    """Bind a trace to the current asyncio task context, so coroutines running on a shared event loop thread report into the trace of the thread that scheduled them.
+
+    Args:
+        trace (Trace): The trace instance to bind to the current context.
+    """
+    _task_trace.set(trace)
+
+
 def get_trace() -> Trace:
+    task_trace = _task_trace.get()
+    if task_trace is not None:
+        return task_trace
     return getattr(_thread_local, "trace", Trace(""))
 
 
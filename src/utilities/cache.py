@@ -1,6 +1,14 @@
+import atexit
 import os
 import hashlib
 import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from settings import get_settings
 
 
 class KeyValueStore:
@@ -10,21 +18,41 @@ class KeyValueStore:
             os.makedirs(self.cache_dir)
 
     def read(self, key):
-        key_hash = self._hash_key(key)
-        file_path = self.cache_dir + key_hash
+        return pickle.loads(self.read_bytes(key))
+
+    def write(self, key, value):
+        self.write_bytes(key, pickle.dumps(value))
+
+    def read_bytes(self, key: str) -> bytes:
+        """Read the pickled value stored under key without unpickling it.
+
+        Args:
+                key (str): The key to look up.
+
+        Returns:
+                bytes: The pickled value.
+
+        Raises:
+                FileNotFoundError: If the key has never been written.
+        """
+        file_path = self.cache_dir + self._hash_key(key)
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Key not found: {key}")
-
         with open(file_path, "rb") as file:
-            value = pickle.load(file)
-        return value
+            return file.read()
 
-    def write(self, key, value):
-        key_hash = self._hash_key(key)
-        file_path = self.cache_dir + key_hash
+    def write_bytes(self, key: str, data: bytes) -> None:
+        """Store an already pickled value under key.
+
+        Args:
+                key (str): The key to store under.
+                data (bytes): The pickled value.
 
-        with open(file_path, "wb") as file:
-            pickle.dump(value, file)
+        Returns:
+                None
+        """
+        with open(self.cache_dir + self._hash_key(key), "wb") as file:
+            file.write(data)
 
     def _hash_key(self, key):
         md5_hash = hashlib.md5()
@@ -33,26 +61,368 @@ class KeyValueStore:
         return "p_" + hashed_key
 
 
+class SQLiteKeyValueStore(KeyValueStore):
+    """
+    A KeyValueStore kept in a single SQLite database in WAL mode, so concurrent readers in any thread or process never see a torn value and writes are grouped into batched transactions.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/cache.sqlite3",
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Open or create the database and prepare per-thread connections and the pending write batch.
+
+        Args:
+                path (str): The database file, keyed by the same hashes KeyValueStore uses as file names.
+                batch_size (int): The number of pending writes that triggers an immediate commit.
+                flush_interval (float): The longest a write waits in the batch before it is committed.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, bytes] = {}
+        self._timer: Optional[threading.Timer] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        connection.commit()
+        atexit.register(self.flush)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def read_bytes(self, key: str) -> bytes:
+        """Read the pickled value stored under key, including writes still waiting in the batch.
+
+        Args:
+                key (str): The key to look up.
+
+        Returns:
+                bytes: The pickled value.
+
+        Raises:
+                FileNotFoundError: If the key has never been written, matching KeyValueStore.
+        """
+        key_hash = self._hash_key(key)
+        with self._lock:
+            data = self._pending.get(key_hash)
+        if data is None:
+            row = (
+                self._connection()
+                .execute("SELECT value FROM entries WHERE key = ?", (key_hash,))
+                .fetchone()
+            )
+            if row is None:
+                raise FileNotFoundError(f"Key not found: {key}")
+            data = row[0]
+        return data
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        """Queue a pickled value for the next batched commit, committing at once when the batch is full.
+
+        Args:
+                key (str): The key to store under.
+                data (bytes): The pickled value.
+
+        Returns:
+                None
+        """
+        self.write_hashed(self._hash_key(key), data)
+
+    def write_hashed(self, key_hash: str, data: bytes) -> None:
+        """Queue already pickled data under an already hashed key, which is how migrated cache files are imported verbatim.
+
+        Args:
+                key_hash (str): The hashed key, as produced by _hash_key.
+                data (bytes): The pickled value.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            self._pending[key_hash] = data
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit every pending write in one transaction.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not pending:
+                return
+            connection = self._connection()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)",
+                    pending.items(),
+                )
+
+
+_stores: Dict[str, KeyValueStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store() -> KeyValueStore:
+    """Return the process wide store for the configured cache backend, 'sqlite' for the single-file database or 'files' for one pickle file per key.
+
+    Returns:
+            KeyValueStore: The shared store.
+    """
+    backend = get_settings().cache_backend
+    with _stores_lock:
+        if backend not in _stores:
+            if backend == "sqlite":
+                _stores[backend] = SQLiteKeyValueStore()
+            elif backend == "files":
+                _stores[backend] = KeyValueStore()
+            else:
+                raise ValueError(f"Unknown cache backend: {backend}")
+        return _stores[backend]
+
+
+def migrate_directory(store: SQLiteKeyValueStore, cache_dir: str = ".cache/") -> int:
+    """Import every pickle file written by the file backend into a SQLite store, keeping the hashed file names as keys so existing entries stay reachable.
+
+    Args:
+            store (SQLiteKeyValueStore): The store to import into.
+            cache_dir (str): The directory holding the file backend's p_ files.
+
+    Returns:
+            int: The number of entries imported.
+    """
+    count = 0
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.startswith("p_"):
+            with open(entry.path, "rb") as file:
+                store.write_hashed(entry.name, file.read())
+            count += 1
+    store.flush()
+    return count
+
+
+class MemoryLRU:
+    """
+    An in-process least recently used map bounded by both entry count and the pickled size of its values, counting hits and misses for the function it serves.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """Create an empty LRU.
+
+        Args:
+                max_entries (int): The most values held at once.
+                max_bytes (int): The most pickled bytes held at once.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a value and mark it most recently used.
+
+        Args:
+                key (str): The hashed key.
+
+        Returns:
+                Tuple[bool, Any]: Whether the key was held, and its value if so.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """Hold a value, evicting least recently used values until both bounds are met; values larger than max_bytes are not held at all.
+
+        Args:
+                key (str): The hashed key.
+                value (Any): The value to hold.
+                size (int): The pickled size of the value in bytes.
+
+        Returns:
+                None
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+
+    def pop(self, key: str) -> None:
+        """Drop a value if it is held.
+
+        Args:
+                key (str): The hashed key.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def record(self, disk_hit: bool) -> None:
+        """Count a lookup the memory tier could not answer.
+
+        Args:
+                disk_hit (bool): Whether the disk store held the value, rather than it being computed.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            if disk_hit:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+
+    def miss(self) -> None:
+        """Count a lookup that no tier could answer, for users without a disk store.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Report how often calls were answered from memory, from the disk store, or computed.
+
+        Returns:
+                Dict[str, float]: Memory hits, disk hits, misses, overall hit ratio, entries and bytes held.
+        """
+        with self._lock:
+            calls = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / calls if calls else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+
+class SingleFlight:
+    """
+    Hands out one lock per key in use, so concurrent callers computing the same key run one after another and later callers find the first caller's result.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        """Hold the lock for key, dropping it once no caller is waiting on it.
+
+        Args:
+                key (str): The key being computed.
+
+        Returns:
+                Iterator[None]: A context in which the caller is the only one computing key.
+        """
+        with self._lock:
+            lock, users = self._locks.get(key, (threading.Lock(), 0))
+            self._locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+
+_memoized: Dict[str, MemoryLRU] = {}
+
+
+def memoize_stats() -> Dict[str, Dict[str, float]]:
+    """Return the in-memory tier statistics of every memoized function, keyed by qualified function name.
+
+    Returns:
+            Dict[str, Dict[str, float]]: The MemoryLRU.stats of each memoized function.
+    """
+    return {name: lru.stats() for name, lru in _memoized.items()}
+
+
 def memoize(func):
-    kv_store = KeyValueStore()
+    settings = get_settings()
+    lru = MemoryLRU(settings.memoize_max_entries, settings.memoize_max_bytes)
+    flight = SingleFlight()
+    _memoized[f"{func.__module__}.{func.__qualname__}"] = lru
 
     def memoized_func(*args, **kwargs):
         key = f"{func.__name__}_{str(args)}_{str(kwargs)}"
-        try:
-            return kv_store.read(key)
-        except FileNotFoundError:
-            result = func(*args, **kwargs)
-            kv_store.write(key, result)
+        key_hash = hashlib.md5(key.encode("utf-8")).hexdigest()
+        found, data = lru.get(key_hash)
+        if found:
+            return pickle.loads(data)
+        with flight.hold(key_hash):
+            found, data = lru.get(key_hash)
+            if found:
+                return pickle.loads(data)
+            kv_store = get_store()
+            try:
+                data = kv_store.read_bytes(key)
+                result = pickle.loads(data)
+                lru.record(disk_hit=True)
+            except FileNotFoundError:
+                result = func(*args, **kwargs)
+                data = pickle.dumps(result)
+                kv_store.write_bytes(key, data)
+                lru.record(disk_hit=False)
+            lru.put(key_hash, data, len(data))
             return result
 
+    memoized_func.stats = lru.stats
     return memoized_func
 
 
 def read(key):
-    store = KeyValueStore()
+    store = get_store()
     return store.read(key)
 
 
 def write(key, value):
-    store = KeyValueStore()
+    store = get_store()
     store.write(key, value)
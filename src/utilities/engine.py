@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+import httpx
+from openai import AsyncOpenAI, DEFAULT_TIMEOUT
+
+from settings import bind_task_settings, get_settings
+from tracing.trace import bind_task_trace, get_trace
+
+
+class RequestEngine:
+    """
+    Runs OpenAI requests as coroutines on a dedicated event loop thread, sharing one pooled AsyncOpenAI client between every caller in the process.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ) -> None:
+        """Start the event loop thread and create an AsyncOpenAI client whose connection pool holds up to max_connections sockets.
+
+        Args:
+                max_connections (int): The size of the HTTP connection pool shared by all in-flight requests.
+                api_key (Optional[str]): The OpenAI API key, defaulting to the OPENAI_API_KEY environment variable.
+                base_url (Optional[str]): The API base URL, defaulting to OPENAI_BASE_URL or the public endpoint.
+        """
+        self.max_connections = max_connections
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="request-engine", daemon=True
+        )
+        self.thread.start()
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key or os.environ["OPENAI_API_KEY"],
+            base_url=base_url or os.environ.get("OPENAI_BASE_URL"),
+            http_client=httpx.AsyncClient(limits=limits, timeout=DEFAULT_TIMEOUT),
+            max_retries=0,
+        )
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """Schedule a coroutine on the engine loop without blocking, carrying the caller's trace and settings into the task so they behave as they would on the calling thread.
+
+        Args:
+                coroutine (Coroutine): The coroutine to run on the engine loop.
+
+        Returns:
+                Future: A concurrent future resolving to the coroutine's result.
+        """
+        trace_instance = get_trace()
+        settings_instance = get_settings()
+
+        async def bound() -> Any:
+            bind_task_trace(trace_instance)
+            bind_task_settings(settings_instance)
+            return await coroutine
+
+        return asyncio.run_coroutine_threadsafe(bound(), self.loop)
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """Run a coroutine on the engine loop and block the calling thread until it completes, which is how the synchronous gpt wrappers reach the async client.
+
+        Args:
+                coroutine (Coroutine): The coroutine to run on the engine loop.
+
+        Returns:
+                Any: The value returned by the coroutine.
+        """
+        if threading.current_thread() is self.thread:
+            coroutine.close()
+            raise RuntimeError(
+                "RequestEngine.run cannot be called from the engine loop; await the coroutine instead"
+            )
+        return self.submit(coroutine).result()
+
+    def close(self) -> None:
+        """Close the pooled client and stop the event loop thread.
+
+        Returns:
+                None
+        """
+        self.submit(self.client.close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+_engine: Optional[RequestEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> RequestEngine:
+    """Return the process wide RequestEngine, creating it on first use with a pool sized from Settings.max_workers.
+
+    Returns:
+            RequestEngine: The shared request engine.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            settings = get_settings()
+            _engine = RequestEngine(
+                settings.max_workers * settings.max_connections_per_worker
+            )
+        return _engine
@@ -0,0 +1,171 @@
+import atexit
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import black
+from black import FileMode, format_str
+from settings import get_settings
+from tracing.tags import EXCEPTION, METRIC
+from tracing.trace import trace
+from utilities.cache import MemoryLRU
+
+
+def _format_in_worker(code: str, mode: FileMode) -> str:
+    return format_str(code, mode=mode)
+
+
+def content_hash(code: str, mode: FileMode) -> str:
+    """Hash code together with the black version and mode that format it, so a cached result is never reused under different formatting rules.
+
+    Args:
+            code (str): The source code.
+            mode (FileMode): The black mode.
+
+    Returns:
+            str: The hex digest.
+    """
+    key = f"{black.__version__}\0{mode!r}\0{code}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FormattingService:
+    """
+    Formats Python code with black, remembering the output for each input hash and recognising code that is already formatted, optionally in a persistent worker process that imports black once and formats outside this process's GIL.
+    """
+
+    def __init__(
+        self, max_bytes: int, worker: bool = False, max_entries: int = 4096
+    ) -> None:
+        """Create a service with an empty cache.
+
+        Args:
+                max_bytes (int): The most characters of formatted code held in the cache.
+                worker (bool): Whether to format in a worker process rather than in this one.
+                max_entries (int): The most formatted outputs held in the cache.
+        """
+        self.cache = MemoryLRU(max_entries=max_entries, max_bytes=max_bytes)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._restarted = False
+        if worker:
+            self._executor = self._start_worker()
+
+    def _start_worker(self) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        executor.submit(_format_in_worker, "", FileMode()).result()
+        return executor
+
+    def format(self, code: str, mode: Optional[FileMode] = None) -> str:
+        """Format code, answering from the cache when the same code was formatted before or is the output of an earlier call, and trace the time taken as a metric.
+
+        Args:
+                code (str): The source code.
+                mode (Optional[FileMode]): The black mode, or None for black's defaults.
+
+        Returns:
+                str: The formatted code.
+
+        Raises:
+                black.InvalidInput: If the code does not parse.
+        """
+        start = time.perf_counter()
+        mode = mode or FileMode()
+        key = content_hash(code, mode)
+        found, formatted = self.cache.get(key)
+        if found:
+            self._trace_time(start, "cached")
+            return formatted
+        self.cache.miss()
+        formatted = self._format_uncached(code, mode)
+        self.cache.put(key, formatted, len(formatted))
+        if formatted != code:
+            self.cache.put(content_hash(formatted, mode), formatted, len(formatted))
+        self._trace_time(start, "black")
+        return formatted
+
+    def _format_uncached(self, code: str, mode: FileMode) -> str:
+        """Format code with black in the worker process, replacing a worker that died once and formatting in this process from then on if the replacement dies too.
+
+        Args:
+                code (str): The source code.
+                mode (FileMode): The black mode.
+
+        Returns:
+                str: The formatted code.
+        """
+        executor = self._executor
+        while executor is not None:
+            try:
+                return executor.submit(_format_in_worker, code, mode).result()
+            except BrokenProcessPool as error:
+                with self._executor_lock:
+                    if self._executor is executor:
+                        executor.shutdown(wait=False)
+                        self._executor = None
+                        if not self._restarted:
+                            self._restarted = True
+                            trace(
+                                EXCEPTION,
+                                f"format: worker process died ({error}), restarting it",
+                            )
+                            try:
+                                self._executor = self._start_worker()
+                            except BrokenProcessPool:
+                                pass
+                        if self._executor is None:
+                            trace(
+                                EXCEPTION,
+                                "format: worker process unavailable, formatting in process",
+                            )
+                    executor = self._executor
+        return format_str(code, mode=mode)
+
+    def _trace_time(self, start: float, source: str) -> None:
+        elapsed = (time.perf_counter() - start) * 1000
+        trace(METRIC, f"format: {elapsed:.2f}ms ({source})")
+
+    def stats(self) -> Dict[str, float]:
+        """Report how often code was answered from the cache rather than formatted.
+
+        Returns:
+                Dict[str, float]: The cache's MemoryLRU.stats.
+        """
+        return self.cache.stats()
+
+    def close(self) -> None:
+        """Stop the worker process, if any.
+
+        Returns:
+                None
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+_service: Optional[FormattingService] = None
+_service_lock = threading.Lock()
+
+
+def get_formatter() -> FormattingService:
+    """Return the process wide formatting service, creating it from the settings on first use.
+
+    Returns:
+            FormattingService: The shared service.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            settings = get_settings()
+            _service = FormattingService(
+                settings.format_cache_max_bytes, settings.format_worker
+            )
+            atexit.register(_service.close)
+        return _service
@@ -0,0 +1,173 @@
+import math
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utilities.minicos import VectorStore, blocked_scores, normalize, top_k
+
+ASSIGN_BLOCK_ROWS = 8192
+
+
+def nearest_centroids(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Find the most similar centroid of each vector, a block of vectors at a time so the score matrix stays small.
+
+    Args:
+            centroids (np.ndarray): Normalized centroids, one per row.
+            vectors (np.ndarray): Normalized vectors, one per row.
+
+    Returns:
+            np.ndarray: The index of the nearest centroid of each vector.
+    """
+    assignment = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = vectors[start : start + ASSIGN_BLOCK_ROWS]
+        assignment[start : start + len(block)] = np.argmax(
+            blocked_scores(centroids, block), axis=1
+        )
+    return assignment
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, clusters: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Cluster normalized vectors by cosine similarity, starting from randomly chosen vectors and renormalizing the centroids after every update.
+
+    Args:
+            vectors (np.ndarray): Normalized float32 vectors, one per row.
+            clusters (int): The number of centroids.
+            iterations (int): The number of assignment and update rounds.
+            rng (np.random.Generator): The random generator used to pick the starting centroids.
+
+    Returns:
+            np.ndarray: The normalized centroids, one per row.
+    """
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = nearest_centroids(centroids, vectors)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFVectorStore:
+    """
+    An approximate VectorStore that partitions keys into inverted lists around k-means centroids and searches only the lists nearest each query, trading recall for speed through n_probe.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_size: int = 100000,
+        iterations: int = 10,
+        min_train: int = 1024,
+        seed: int = 0,
+    ):
+        """Create an empty store that searches exactly until it holds min_train keys, then trains its centroids on first search.
+
+        Args:
+                n_lists (Optional[int]): The number of inverted lists, defaulting to 4 * sqrt(n) at training time.
+                n_probe (int): The number of lists scanned per query; higher raises recall and cost.
+                train_size (int): The most keys sampled to train the centroids.
+                iterations (int): The number of k-means rounds.
+                min_train (int): The size below which searches stay exact and training is deferred.
+                seed (int): The seed of the training sample and starting centroids.
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.min_train = min_train
+        self.rng = np.random.default_rng(seed)
+        self.store = VectorStore()
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def values(self) -> List[str]:
+        """The stored values in insertion order, held by the exact store underneath.
+
+        Returns:
+                List[str]: The values, one per stored key.
+        """
+        return self.store.values
+
+    def train(self) -> None:
+        """Fit centroids to a sample of the stored keys and rebuild every inverted list.
+
+        Returns:
+                None
+        """
+        keys = self.store.keys
+        n_lists = self.n_lists or max(1, int(4 * math.sqrt(len(keys))))
+        n_lists = min(n_lists, len(keys))
+        sample = keys
+        if len(keys) > self.train_size:
+            sample = keys[self.rng.choice(len(keys), self.train_size, replace=False)]
+        self.centroids = spherical_kmeans(sample, n_lists, self.iterations, self.rng)
+        self.lists = [[] for _ in range(n_lists)]
+        self._list_arrays = [None] * n_lists
+        self._assign(0, len(keys))
+
+    def _assign(self, start: int, end: int) -> None:
+        assignment = nearest_centroids(self.centroids, self.store.keys[start:end])
+        for row, list_id in enumerate(assignment, start):
+            self.lists[list_id].append(row)
+            self._list_arrays[list_id] = None
+
+    def add_entry(self, key: np.ndarray, value: str):
+        self.add_entries(np.asarray(key)[np.newaxis, :], [value])
+
+    def add_entries(self, keys: np.ndarray, values: Sequence[str]) -> None:
+        """Append entries, assigning them to their nearest list when the centroids are already trained.
+
+        Args:
+                keys (np.ndarray): A matrix with one key per row.
+                values (Sequence[str]): The value stored under each key.
+
+        Returns:
+                None
+        """
+        start = len(self.store)
+        self.store.add_entries(keys, values)
+        if self.centroids is not None:
+            self._assign(start, len(self.store))
+
+    def _list_array(self, list_id: int) -> np.ndarray:
+        if self._list_arrays[list_id] is None:
+            self._list_arrays[list_id] = np.array(self.lists[list_id], dtype=np.intp)
+        return self._list_arrays[list_id]
+
+    def search(self, vec: np.ndarray, n: int) -> List[str]:
+        return self.search_many(np.asarray(vec)[np.newaxis, :], n)[0]
+
+    def search_many(self, vecs: np.ndarray, n: int) -> List[List[str]]:
+        """Search for several query vectors, scanning the n_probe nearest lists of each query exactly.
+
+        Args:
+                vecs (np.ndarray): A matrix with one query vector per row.
+                n (int): The number of values to return per query.
+
+        Returns:
+                List[List[str]]: The n most similar values found for each query, best first.
+        """
+        if len(self.store) < self.min_train:
+            return self.store.search_many(vecs, n)
+        if self.centroids is None:
+            self.train()
+        queries = normalize(vecs)
+        probes = top_k(queries @ self.centroids.T, self.n_probe)
+        keys = self.store.keys
+        results = []
+        for query, lists in zip(queries, probes):
+            candidates = np.concatenate([self._list_array(i) for i in lists])
+            best = candidates[top_k(keys[candidates] @ query, n)]
+            results.append([self.store.values[i] for i in best])
+        return results
@@ -0,0 +1,110 @@
+import os
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+BINARY_SNIFF_BYTES = 8000
+
+
+def is_binary(path: str) -> bool:
+    """Guess whether a file is binary the way git does, by looking for a NUL byte near its start.
+
+    Args:
+            path (str): The file to inspect.
+
+    Returns:
+            bool: True if the file looks binary.
+    """
+    with open(path, "rb") as file:
+        return b"\0" in file.read(BINARY_SNIFF_BYTES)
+
+
+def read_text(path: str) -> str:
+    """Read a UTF-8 file with universal newlines like utils.read_file.
+
+    Args:
+            path (str): The file to read.
+
+    Returns:
+            str: The contents, with undecodable bytes replaced.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return file.read()
+
+
+class LazyFileMap(Mapping):
+    """
+    A read-only file map of a directory whose names are listed up front with their size and modification time, and whose contents are read on first access, leaving out binary files and files over a size limit.
+    """
+
+    def __init__(
+        self, directory: str, names: Iterable[str], max_bytes: Optional[int] = None
+    ):
+        """List the readable files among names, checking their size and leading bytes but not reading them.
+
+        Args:
+                directory (str): The directory the names are relative to.
+                names (Iterable[str]): The candidate relative paths, such as the files git does not ignore.
+                max_bytes (Optional[int]): The largest file included, or None for no limit.
+        """
+        self.directory = directory
+        self.sizes: Dict[str, int] = {}
+        self.mtimes: Dict[str, int] = {}
+        self.skipped: List[str] = []
+        for name in names:
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            if (max_bytes is not None and stat.st_size > max_bytes) or is_binary(path):
+                self.skipped.append(name)
+            else:
+                self.sizes[name] = stat.st_size
+                self.mtimes[name] = stat.st_mtime_ns
+        self._contents: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> str:
+        content = self._contents.get(name)
+        if content is not None:
+            return content
+        if name not in self.sizes:
+            raise KeyError(name)
+        content = read_text(os.path.join(self.directory, name))
+        with self._lock:
+            return self._contents.setdefault(name, content)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.sizes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sizes)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def unchanged_on_disk(self, name: str) -> bool:
+        """Check whether a listed file still has the size and modification time it was listed with, without reading it.
+
+        Args:
+                name (str): The relative path of the file.
+
+        Returns:
+                bool: True if the file's stat data is unchanged, so its contents can be assumed to be too.
+        """
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (
+            self.sizes.get(name),
+            self.mtimes.get(name),
+        )
+
+    def materialized(self) -> Set[str]:
+        """The files whose contents have been read so far.
+
+        Returns:
+                Set[str]: The loaded names.
+        """
+        return set(self._contents)
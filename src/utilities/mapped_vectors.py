@@ -0,0 +1,418 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from utilities.minicos import SEARCH_BLOCK_ROWS, blocked_scores, normalize, top_k
+
+
+def content_hash(text: str) -> str:
+    """Hash text the way git hashes a blob, so an entry ingested from a file shares its identity with the file's blob SHA.
+
+    Args:
+            text (str): The content to hash.
+
+    Returns:
+            str: The hex SHA-1 of the git blob header and the UTF-8 content.
+    """
+    data = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class MappedVectorStore:
+    """
+    An append-only on-disk vector store: normalized keys live in a flat matrix file that is memory-mapped read-only, so worker processes share its pages, and a SQLite sidecar maps each row to its content hash and value.
+
+    The matrix file is named after the generation recorded in the sidecar, so compact writes a new file and switches to it in the same transaction that renumbers the rows; a reader or a crash sees either the old rows with the old file or the new rows with the new file. One connection is shared by every thread of a process, serialized by a lock.
+    """
+
+    def __init__(
+        self, directory: str, dimensions: Optional[int] = None, dtype: str = "float32"
+    ):
+        """Open the store in directory, creating it if needed; opening only maps the matrix file and reads the row count.
+
+        Args:
+                directory (str): The directory holding vectors.bin and index.sqlite3.
+                dimensions (Optional[int]): The length of every key, or None to open an existing store with whatever shape and dtype it was created with.
+                dtype (str): 'float32' or 'float16', the element type of the matrix file.
+
+        Raises:
+                ValueError: If the directory holds a store with a different shape or dtype, or holds none and dimensions is None.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (row INTEGER PRIMARY KEY, content_hash TEXT NOT NULL, value TEXT NOT NULL, live INTEGER NOT NULL DEFAULT 1)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_hash ON entries (content_hash)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS empty (content_hash TEXT PRIMARY KEY)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        meta = self._meta()
+        if not meta:
+            if dimensions is None:
+                raise ValueError(f"{directory} does not hold a vector store")
+            self.connection.execute(
+                "INSERT INTO meta VALUES ('dimensions', ?), ('dtype', ?), ('generation', '0')",
+                (str(dimensions), dtype),
+            )
+            meta = self._meta()
+        if dimensions is None:
+            dimensions, dtype = int(meta["dimensions"]), meta["dtype"]
+        if meta["dimensions"] != str(dimensions) or meta["dtype"] != dtype:
+            raise ValueError(
+                f"{directory} holds {meta['dimensions']} dimensional {meta['dtype']} vectors"
+            )
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dimensions * self.dtype.itemsize
+        if not os.path.exists(self._vectors_path(meta["generation"])):
+            open(self._vectors_path(meta["generation"]), "ab").close()
+        self.matrix: Optional[np.ndarray] = None
+        self.generation: Optional[str] = None
+        self.dead = np.zeros(0, dtype=bool)
+        self.refresh()
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self.connection.execute("SELECT name, value FROM meta"))
+
+    def _vectors_path(self, generation: str) -> str:
+        name = "vectors.bin" if generation == "0" else f"vectors.{generation}.bin"
+        return os.path.join(self.directory, name)
+
+    def __len__(self) -> int:
+        return int(len(self.dead) - self.dead.sum())
+
+    def refresh(self) -> None:
+        """Remap the matrix file and reload the dead-row mask if another writer appended, removed or compacted since the last look.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            self.connection.execute("BEGIN")
+            try:
+                rows, dead_rows = self.connection.execute(
+                    "SELECT COALESCE(MAX(row) + 1, 0), COUNT(*) - SUM(live) FROM entries"
+                ).fetchone()
+                generation = self._meta()["generation"]
+                if (
+                    self.matrix is not None
+                    and len(self.matrix) == rows
+                    and generation == self.generation
+                    and int(self.dead.sum()) == (dead_rows or 0)
+                ):
+                    return
+                dead = [
+                    row
+                    for (row,) in self.connection.execute(
+                        "SELECT row FROM entries WHERE live = 0"
+                    )
+                ]
+            finally:
+                self.connection.execute("COMMIT")
+            self.generation = generation
+            if rows == 0:
+                self.matrix = np.empty((0, self.dimensions), dtype=self.dtype)
+            else:
+                self.matrix = np.memmap(
+                    self._vectors_path(generation),
+                    dtype=self.dtype,
+                    mode="r",
+                    shape=(rows, self.dimensions),
+                )
+            self.dead = np.zeros(rows, dtype=bool)
+            self.dead[dead] = True
+
+    def contains(self, key_hash: str) -> bool:
+        """Check whether any live entry has the given content hash, or it was marked as indexed without entries.
+
+        Args:
+                key_hash (str): The content hash to look for.
+
+        Returns:
+                bool: True if the hash is indexed.
+        """
+        with self._lock:
+            return (
+                self.connection.execute(
+                    "SELECT 1 FROM entries WHERE content_hash = ? AND live = 1 UNION ALL SELECT 1 FROM empty WHERE content_hash = ? LIMIT 1",
+                    (key_hash, key_hash),
+                ).fetchone()
+                is not None
+            )
+
+    def hashes(self) -> List[str]:
+        """List the distinct content hashes of the live entries and of the hashes marked as indexed without entries.
+
+        Returns:
+                List[str]: The indexed content hashes.
+        """
+        with self._lock:
+            return [
+                key_hash
+                for (key_hash,) in self.connection.execute(
+                    "SELECT content_hash FROM entries WHERE live = 1 UNION SELECT content_hash FROM empty"
+                )
+            ]
+
+    def mark_empty(self, key_hashes: Sequence[str]) -> None:
+        """Record content hashes as indexed although they have no entries, such as files that produce no chunks, so they are not processed again; remove drops them like any other hash.
+
+        Args:
+                key_hashes (Sequence[str]): The content hashes to record.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO empty (content_hash) VALUES (?)",
+                [(key_hash,) for key_hash in key_hashes],
+            )
+
+    def entries(
+        self, key_hash: str, prefix: bool = False
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Read back the normalized keys and values of the live entries with a content hash, or with a content hash starting with a prefix, in row order.
+
+        Args:
+                key_hash (str): The content hash, or prefix of content hashes, to look up.
+                prefix (bool): Whether key_hash is a prefix rather than a whole hash.
+
+        Returns:
+                Tuple[np.ndarray, List[str]]: A matrix with one key per entry, and the value of each entry.
+        """
+        with self._lock:
+            self.refresh()
+            if prefix:
+                found = self.connection.execute(
+                    "SELECT row, value FROM entries WHERE content_hash >= ? AND content_hash < ? AND live = 1 ORDER BY row",
+                    (key_hash, key_hash + "\U0010ffff"),
+                ).fetchall()
+            else:
+                found = self.connection.execute(
+                    "SELECT row, value FROM entries WHERE content_hash = ? AND live = 1 ORDER BY row",
+                    (key_hash,),
+                ).fetchall()
+            rows = [row for row, _ in found]
+            return np.array(self.matrix[rows]), [value for _, value in found]
+
+    def add_entry(self, key: np.ndarray, value: str, key_hash: Optional[str] = None):
+        self.add_entries(np.asarray(key)[np.newaxis, :], [value], [key_hash])
+
+    def add_entries(
+        self,
+        keys: np.ndarray,
+        values: Sequence[str],
+        key_hashes: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        """Append entries under one write transaction, which also serializes appends from other processes and with compact.
+
+        Args:
+                keys (np.ndarray): A matrix with one key per row.
+                values (Sequence[str]): The value stored under each key.
+                key_hashes (Optional[Sequence[Optional[str]]]): The content hash of each entry, defaulting to the hash of its value.
+
+        Returns:
+                None
+        """
+        if len(values) == 0:
+            return
+        key_hashes = key_hashes or [None] * len(values)
+        key_hashes = [
+            key_hash or content_hash(value)
+            for key_hash, value in zip(key_hashes, values)
+        ]
+        rows = normalize(np.asarray(keys)).astype(self.dtype)
+        if rows.shape != (len(values), self.dimensions):
+            raise ValueError(
+                f"Expected {len(values)} keys of {self.dimensions} dimensions"
+            )
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                (start,) = self.connection.execute(
+                    "SELECT COALESCE(MAX(row) + 1, 0) FROM entries"
+                ).fetchone()
+                vectors_path = self._vectors_path(self._meta()["generation"])
+                with open(vectors_path, "r+b") as file:
+                    file.seek(start * self.row_bytes)
+                    file.write(rows.tobytes())
+                    file.truncate()
+                    file.flush()
+                    os.fsync(file.fileno())
+                self.connection.executemany(
+                    "INSERT INTO entries (row, content_hash, value) VALUES (?, ?, ?)",
+                    [
+                        (start + i, key_hash, value)
+                        for i, (key_hash, value) in enumerate(zip(key_hashes, values))
+                    ],
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.refresh()
+
+    def remove(self, key_hashes: Sequence[str]) -> None:
+        """Mark every entry with one of the given content hashes as stale, and forget the hashes marked empty; a stale row stays in the file until compact.
+
+        Args:
+                key_hashes (Sequence[str]): The content hashes to drop.
+
+        Returns:
+                None
+        """
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(
+                    "UPDATE entries SET live = 0 WHERE content_hash = ?",
+                    [(key_hash,) for key_hash in key_hashes],
+                )
+                self.connection.executemany(
+                    "DELETE FROM empty WHERE content_hash = ?",
+                    [(key_hash,) for key_hash in key_hashes],
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.refresh()
+
+    def scores(self, vecs: np.ndarray) -> np.ndarray:
+        """Score query vectors against every row, block by block so a float16 file is widened only a block at a time, with stale rows scored -inf.
+
+        Args:
+                vecs (np.ndarray): A matrix with one query vector per row.
+
+        Returns:
+                np.ndarray: One row of similarities per query.
+        """
+        with self._lock:
+            self.refresh()
+            matrix, dead = self.matrix, self.dead
+        scores = blocked_scores(matrix, normalize(vecs))
+        scores[:, dead] = -np.inf
+        return scores
+
+    def _values(self, rows: np.ndarray) -> List[str]:
+        rows = [int(row) for row in rows]
+        if not rows:
+            return []
+        with self._lock:
+            found = dict(
+                self.connection.execute(
+                    f"SELECT row, value FROM entries WHERE row IN ({','.join('?' * len(rows))})",
+                    rows,
+                )
+            )
+        return [found[row] for row in rows]
+
+    def search(self, vec: np.ndarray, n: int) -> List[str]:
+        return self.search_many(np.asarray(vec)[np.newaxis, :], n)[0]
+
+    def search_many(self, vecs: np.ndarray, n: int) -> List[List[str]]:
+        """Search for several query vectors, returning the values of the n most similar live entries for each.
+
+        Args:
+                vecs (np.ndarray): A matrix with one query vector per row.
+                n (int): The number of values to return per query.
+
+        Returns:
+                List[List[str]]: The n most similar values for each query, best first.
+        """
+        with self._lock:
+            scores = self.scores(vecs)
+            n = min(n, len(self))
+            return [self._values(row) for row in top_k(scores, n)]
+
+    def compact(self) -> int:
+        """Rewrite the live rows into the matrix file of the next generation, then renumber the rows and switch the generation in one transaction so other processes never pair rows with the wrong file.
+
+        The previous generation's file is kept for readers that looked up the generation just before the switch, and older ones are deleted; a crash before the commit leaves only an unused file behind.
+
+        Returns:
+                int: The number of stale rows removed.
+        """
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                live = [
+                    row
+                    for (row,) in self.connection.execute(
+                        "SELECT row FROM entries WHERE live = 1 ORDER BY row"
+                    )
+                ]
+                (total,) = self.connection.execute(
+                    "SELECT COUNT(*) FROM entries"
+                ).fetchone()
+                generation = self._meta()["generation"]
+                matrix = (
+                    np.memmap(
+                        self._vectors_path(generation),
+                        dtype=self.dtype,
+                        mode="r",
+                        shape=(total, self.dimensions),
+                    )
+                    if total
+                    else np.empty((0, self.dimensions), dtype=self.dtype)
+                )
+                next_generation = str(int(generation) + 1)
+                with open(self._vectors_path(next_generation), "wb") as file:
+                    for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                        file.write(
+                            matrix[live[start : start + SEARCH_BLOCK_ROWS]].tobytes()
+                        )
+                    file.flush()
+                    os.fsync(file.fileno())
+                del matrix
+                self.connection.execute("DELETE FROM entries WHERE live = 0")
+                self.connection.executemany(
+                    "UPDATE entries SET row = ? WHERE row = ?",
+                    [(new, old) for new, old in enumerate(live) if new != old],
+                )
+                self.connection.execute(
+                    "UPDATE meta SET value = ? WHERE name = 'generation'",
+                    (next_generation,),
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.refresh()
+            self._remove_files(keep={generation, next_generation})
+            return total - len(live)
+
+    def _remove_files(self, keep: Set[str]) -> None:
+        """Delete the matrix files of generations other than keep, leaving any that another process still has mapped on Windows for a later compact."""
+        current = {
+            os.path.basename(self._vectors_path(generation)) for generation in keep
+        }
+        for name in os.listdir(self.directory):
+            if (
+                name.startswith("vectors.")
+                and name.endswith(".bin")
+                and name not in current
+            ):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
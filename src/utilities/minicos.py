@@ -1,6 +1,9 @@
-from typing import List
+from typing import List, Optional, Sequence
 import numpy as np
 
+SEARCH_BLOCK_ROWS = 65536
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
 
 def cosine_similarity(vec1, vec2):
     vec1_norm = np.linalg.norm(vec1)
@@ -8,23 +11,228 @@ def cosine_similarity(vec1, vec2):
     return np.dot(vec1, vec2) / (vec1_norm * vec2_norm)
 
 
-class Entry:
-    def __init__(self, key: np.ndarray, value: str):
-        self.key = key
-        self.value = value
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row of a matrix to unit length as float32, leaving all-zero rows as zeros so they score 0 against everything.
+
+    Args:
+            vectors (np.ndarray): A 1-D vector or a 2-D matrix with one vector per row.
+
+    Returns:
+            np.ndarray: The normalized float32 array with the same shape.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_k(scores: np.ndarray, n: int) -> np.ndarray:
+    """Return the indices of the n highest scores along the last axis, best first, selecting with argpartition so only those n are sorted.
+
+    Args:
+            scores (np.ndarray): A 1-D array of scores, or a 2-D array with one row per query.
+            n (int): The number of indices to return per row.
+
+    Returns:
+            np.ndarray: The selected indices, shaped like scores with the last axis cut to n.
+    """
+    n = min(n, scores.shape[-1])
+    if n <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    if n < scores.shape[-1]:
+        candidates = np.argpartition(-scores, n - 1, axis=-1)[..., :n]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def quantize_int8(vectors: np.ndarray) -> "tuple[np.ndarray, np.ndarray]":
+    """Quantize each row to int8 with its own scale, so a row's largest magnitude component maps to 127.
+
+    Args:
+            vectors (np.ndarray): A matrix with one vector per row.
+
+    Returns:
+            tuple[np.ndarray, np.ndarray]: The int8 rows and the float32 scale that multiplies each row back.
+    """
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    return np.round(vectors / scales[:, np.newaxis]).astype(np.int8), scales
+
+
+def blocked_scores(
+    matrix: np.ndarray, queries: np.ndarray, scales: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Score normalized queries against every row of a matrix of any storage dtype, widening it to float32 one block at a time so a compact matrix is never copied whole.
+
+    Args:
+            matrix (np.ndarray): The stored rows, float32, float16 or int8.
+            queries (np.ndarray): Normalized float32 queries, one per row.
+            scales (Optional[np.ndarray]): The per-row scales of an int8 matrix.
+
+    Returns:
+            np.ndarray: One row of similarities per query.
+    """
+    scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), SEARCH_BLOCK_ROWS):
+        block = matrix[start : start + SEARCH_BLOCK_ROWS]
+        block_scores = queries @ block.astype(np.float32, copy=False).T
+        if scales is not None:
+            block_scores *= scales[start : start + len(block)]
+        scores[:, start : start + len(block)] = block_scores
+    return scores
 
 
 class VectorStore:
-    def __init__(self):
-        self.entries = []
+    """
+    Stores values under embedding keys in one contiguous pre-normalized matrix, so a search is a single matrix-vector product.
+
+    The matrix holds float32 keys by default, or float16 or per-row scaled int8 keys to cut memory by half or three quarters. Compact stores can keep exact float32 keys in a memory-mapped file outside the heap and re-rank the best candidates of the compact first pass against them.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 16,
+        storage: str = "float32",
+        exact_path: Optional[str] = None,
+        rerank_factor: int = 4,
+    ):
+        """Create an empty store; the dimension is fixed by the first key added.
+
+        Args:
+                capacity (int): The number of rows allocated up front, doubled whenever the matrix fills.
+                storage (str): The dtype of the in-memory matrix, 'float32', 'float16' or 'int8'.
+                exact_path (Optional[str]): A file to append exact float32 keys to for re-ranking a compact store, or None to rank on the compact scores alone.
+                rerank_factor (int): How many first-pass candidates per requested result are re-ranked exactly.
+        """
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage {storage}")
+        self.capacity = capacity
+        self.storage = storage
+        self.rerank_factor = rerank_factor
+        self.matrix: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.values: List[str] = []
+        self.exact_path = exact_path if storage != "float32" else None
+        self._exact: Optional[np.ndarray] = None
+        if self.exact_path is not None:
+            open(self.exact_path, "wb").close()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def keys(self) -> np.ndarray:
+        """The normalized keys currently stored, one per row, in the storage dtype.
+
+        Returns:
+                np.ndarray: A view of the filled rows of the matrix.
+        """
+        if self.matrix is None:
+            return np.empty((0, 0), dtype=STORAGE_DTYPES[self.storage])
+        return self.matrix[: len(self.values)]
+
+    @property
+    def nbytes(self) -> int:
+        """The heap memory held by the filled rows of the matrix and their scales.
+
+        Returns:
+                int: The size in bytes.
+        """
+        scales = 0 if self.scales is None else len(self.values) * self.scales.itemsize
+        return self.keys.nbytes + scales
+
+    def _reserve(self, rows: int, dimensions: int) -> None:
+        dtype = STORAGE_DTYPES[self.storage]
+        if self.matrix is None:
+            capacity = max(self.capacity, rows)
+        elif dimensions != self.matrix.shape[1]:
+            raise ValueError(
+                f"Expected {self.matrix.shape[1]} dimensional keys, got {dimensions}"
+            )
+        elif rows > self.matrix.shape[0]:
+            capacity = self.matrix.shape[0]
+            while capacity < rows:
+                capacity *= 2
+        else:
+            return
+        grown = np.empty((capacity, dimensions), dtype=dtype)
+        if self.storage == "int8":
+            scales = np.empty(capacity, dtype=np.float32)
+        if self.matrix is not None:
+            grown[: len(self.values)] = self.keys
+            if self.storage == "int8":
+                scales[: len(self.values)] = self.scales[: len(self.values)]
+        self.matrix = grown
+        if self.storage == "int8":
+            self.scales = scales
 
     def add_entry(self, key: np.ndarray, value: str):
-        self.entries.append(Entry(key, value))
+        self.add_entries(np.asarray(key)[np.newaxis, :], [value])
+
+    def add_entries(self, keys: np.ndarray, values: Sequence[str]) -> None:
+        """Append many entries at once, normalizing and quantizing the keys as they are copied into the matrix.
+
+        Args:
+                keys (np.ndarray): A matrix with one key per row.
+                values (Sequence[str]): The value stored under each key.
+
+        Returns:
+                None
+        """
+        keys = np.asarray(keys)
+        if len(keys) != len(values):
+            raise ValueError("keys and values must have the same length")
+        if len(values) == 0:
+            return
+        start = len(self.values)
+        end = start + len(values)
+        self._reserve(end, keys.shape[1])
+        normalized = normalize(keys)
+        if self.storage == "int8":
+            self.matrix[start:end], self.scales[start:end] = quantize_int8(normalized)
+        else:
+            self.matrix[start:end] = normalized
+        if self.exact_path is not None:
+            with open(self.exact_path, "ab") as file:
+                file.write(normalized.tobytes())
+            self._exact = None
+        self.values.extend(values)
+
+    def _exact_keys(self) -> np.ndarray:
+        if self._exact is None:
+            self._exact = np.memmap(
+                self.exact_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.values), self.matrix.shape[1]),
+            )
+        return self._exact
+
+    def _rank(self, queries: np.ndarray, n: int) -> np.ndarray:
+        scales = self.scales[: len(self.values)] if self.scales is not None else None
+        scores = blocked_scores(self.keys, queries, scales)
+        if self.exact_path is None:
+            return top_k(scores, n)
+        candidates = top_k(scores, n * self.rerank_factor)
+        exact = np.einsum(
+            "qcd,qd->qc", self._exact_keys()[candidates], queries, dtype=np.float32
+        )
+        return np.take_along_axis(candidates, top_k(exact, n), axis=-1)
 
     def search(self, vec: np.ndarray, n: int) -> List[str]:
-        # Calculate similarities and track top n
-        similarities = [
-            (entry.value, cosine_similarity(vec, entry.key)) for entry in self.entries
-        ]
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return [similarity[0] for similarity in similarities[:n]]
+        return self.search_many(np.asarray(vec)[np.newaxis, :], n)[0]
+
+    def search_many(self, vecs: np.ndarray, n: int) -> List[List[str]]:
+        """Search for several query vectors with one matrix-matrix product.
+
+        Args:
+                vecs (np.ndarray): A matrix with one query vector per row.
+                n (int): The number of values to return per query.
+
+        Returns:
+                List[List[str]]: The n most similar values for each query, best first.
+        """
+        if not self.values:
+            return [[] for _ in range(len(vecs))]
+        return [[self.values[i] for i in row] for row in self._rank(normalize(vecs), n)]
@@ -0,0 +1,166 @@
+import difflib
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Union
+
+_DELETED = object()
+
+
+class FileOverlay(MutableMapping):
+    """
+    A copy-on-write file map: reads fall through to a base mapping shared by reference and never modified, while writes and deletions go to a small per-overlay delta.
+    """
+
+    def __init__(self, base: Mapping[str, str]):
+        """Create an overlay with no changes over base.
+
+        Args:
+                base (Mapping[str, str]): The unchanged file contents, which must not be mutated while the overlay is in use.
+        """
+        self.base = base
+        self.delta: Dict[str, Union[str, object]] = {}
+        self.versions: Dict[str, int] = {}
+
+    @staticmethod
+    def freeze(files: Mapping[str, str]) -> Mapping[str, str]:
+        """Return a read-only view of a file map to share as a base, forking overlays so later writes to them are not seen.
+
+        Args:
+                files (Mapping[str, str]): The file map.
+
+        Returns:
+                Mapping[str, str]: A mapping that does not change when files is modified through its own interface.
+        """
+        if isinstance(files, FileOverlay):
+            return files.fork()
+        if isinstance(files, dict):
+            return MappingProxyType(files)
+        return files
+
+    def fork(self) -> "FileOverlay":
+        """Return an overlay with the same base and a copy of the delta, costing the size of the changes rather than of the files.
+
+        Returns:
+                FileOverlay: The new overlay.
+        """
+        forked = FileOverlay(self.base)
+        forked.delta = dict(self.delta)
+        forked.versions = dict(self.versions)
+        return forked
+
+    def version(self, file: str) -> int:
+        """Return a counter that changes whenever a file is written or deleted, so renderings of it can be cached.
+
+        Args:
+                file (str): The path of the file.
+
+        Returns:
+                int: 0 for a file never written through this overlay.
+        """
+        return self.versions.get(file, 0)
+
+    def _touch(self, file: str) -> None:
+        self.versions[file] = self.versions.get(file, 0) + 1
+
+    def __getitem__(self, file: str) -> str:
+        if file in self.delta:
+            content = self.delta[file]
+            if content is _DELETED:
+                raise KeyError(file)
+            return content
+        return self.base[file]
+
+    def __setitem__(self, file: str, content: str) -> None:
+        self.delta[file] = content
+        self._touch(file)
+
+    def __delitem__(self, file: str) -> None:
+        if file not in self:
+            raise KeyError(file)
+        self._touch(file)
+        if file in self.base:
+            self.delta[file] = _DELETED
+        else:
+            del self.delta[file]
+
+    def __contains__(self, file: object) -> bool:
+        if file in self.delta:
+            return self.delta[file] is not _DELETED
+        return file in self.base
+
+    def __iter__(self) -> Iterator[str]:
+        for file in self.base:
+            if self.delta.get(file) is not _DELETED:
+                yield file
+        for file, content in self.delta.items():
+            if content is not _DELETED and file not in self.base:
+                yield file
+
+    def __len__(self) -> int:
+        added = sum(
+            1
+            for file, content in self.delta.items()
+            if content is not _DELETED and file not in self.base
+        )
+        deleted = sum(1 for content in self.delta.values() if content is _DELETED)
+        return len(self.base) + added - deleted
+
+    def replace_all(self, files: Mapping[str, str]) -> None:
+        """Make the overlay hold exactly the given files, recording only their differences from the base.
+
+        Args:
+                files (Mapping[str, str]): The new file map.
+
+        Returns:
+                None
+        """
+        for file, content in files.items():
+            if file not in self or self[file] is not content:
+                self._touch(file)
+        for file in self:
+            if file not in files:
+                self._touch(file)
+        self.delta = {
+            file: content
+            for file, content in files.items()
+            if file not in self.base or self.base[file] is not content
+        }
+        for file in self.base:
+            if file not in files:
+                self.delta[file] = _DELETED
+
+    def changed_files(self) -> List[str]:
+        """List the files added, modified or deleted relative to the base, comparing only files in the delta.
+
+        Returns:
+                List[str]: The changed paths, sorted.
+        """
+        changed = []
+        for file, content in self.delta.items():
+            if content is _DELETED or file not in self.base:
+                changed.append(file)
+            elif self.base[file] != content:
+                changed.append(file)
+        return sorted(changed)
+
+    def diff(self) -> str:
+        """Render the changes relative to the base as a unified diff.
+
+        Returns:
+                str: The diff of every changed file, empty when nothing changed.
+        """
+        chunks = []
+        for file in self.changed_files():
+            old = self.base.get(file, "")
+            new = self.get(file, "")
+            chunks.extend(
+                difflib.unified_diff(
+                    old.splitlines(keepends=True),
+                    new.splitlines(keepends=True),
+                    f"a/{file}" if file in self.base else "/dev/null",
+                    f"b/{file}" if file in self else "/dev/null",
+                )
+            )
+        return "".join(
+            chunk if chunk.endswith("\n") else chunk + "\n" for chunk in chunks
+        )
@@ -0,0 +1,255 @@
+import asyncio
+import re
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+from settings import get_settings
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse an OpenAI rate limit reset duration such as '1s', '6m0s' or '20ms' into seconds.
+
+    Args:
+            value (str): The header value to parse.
+
+    Returns:
+            Optional[float]: The duration in seconds, or None if the value is not a duration.
+    """
+    matches = DURATION_PATTERN.findall(value or "")
+    if not matches:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text using the four characters per token rule of thumb.
+
+    Args:
+            text (str): The text to estimate.
+
+    Returns:
+            int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    A bucket holding up to capacity units that refills continuously at capacity units per period, so consumption is smoothed to the sustained rate.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0) -> None:
+        """Create a full bucket.
+
+        Args:
+                capacity (float): The maximum number of units the bucket holds.
+                period (float): The number of seconds it takes to refill an empty bucket.
+        """
+        self.capacity = capacity
+        self.period = period
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """The refill rate in units per second.
+
+        Returns:
+                float: Units added to the bucket each second.
+        """
+        return self.capacity / self.period
+
+    def refill(self) -> None:
+        """Add the units accrued since the last update, without exceeding capacity.
+
+        Returns:
+                None
+        """
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Return how many seconds must pass before amount units are available, capping amount at capacity so oversized requests are not starved forever.
+
+        Args:
+                amount (float): The number of units wanted.
+
+        Returns:
+                float: Seconds to wait, or 0 if the units are available now.
+        """
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Remove amount units from the bucket, which may drive the level negative to record debt from an underestimate.
+
+        Args:
+                amount (float): The number of units to remove.
+
+        Returns:
+                None
+        """
+        self.refill()
+        self.level -= amount
+
+    def update(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """Adopt the capacity reported by the server and never hold more units than the server says remain.
+
+        Args:
+                limit (Optional[float]): The server's limit per period, if reported.
+                remaining (Optional[float]): The server's remaining units, if reported.
+
+        Returns:
+                None
+        """
+        self.refill()
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+    def drain(self, seconds: float) -> None:
+        """Empty the bucket so that no units become available for the given number of seconds, used when the server answers 429.
+
+        Args:
+                seconds (float): The number of seconds to block the bucket for.
+
+        Returns:
+                None
+        """
+        self.refill()
+        self.level = min(self.level, -seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Paces requests to one model with a requests-per-minute bucket and a tokens-per-minute bucket, queueing callers in arrival order until both have room.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """Create a limiter with full request and token buckets.
+
+        Args:
+                requests_per_minute (int): The initial request budget per minute.
+                tokens_per_minute (int): The initial prompt plus completion token budget per minute.
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._queue: Optional[asyncio.Lock] = None
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Wait until one request and estimated_tokens tokens fit under the limits, then reserve them; callers are served first come first served.
+
+        Args:
+                estimated_tokens (int): The estimated prompt plus completion tokens of the request.
+
+        Returns:
+                None
+        """
+        if self._queue is None:
+            self._queue = asyncio.Lock()
+        async with self._queue:
+            while True:
+                wait = max(
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(estimated_tokens),
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a request is known.
+
+        Args:
+                estimated_tokens (int): The tokens reserved by acquire.
+                actual_tokens (int): The tokens the server reported using.
+
+        Returns:
+                None
+        """
+        self.tokens.consume(actual_tokens - estimated_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adjust both budgets from the x-ratelimit-* response headers sent by the OpenAI API.
+
+        Args:
+                headers (Mapping[str, str]): The HTTP response headers.
+
+        Returns:
+                None
+        """
+
+        def number(name: str) -> Optional[float]:
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        self.requests.update(
+            number("x-ratelimit-limit-requests"),
+            number("x-ratelimit-remaining-requests"),
+        )
+        self.tokens.update(
+            number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens")
+        )
+
+    def back_off(self, headers: Mapping[str, str]) -> float:
+        """Block the limiter after a 429 response for as long as the server asks, falling back to the reset headers or one second.
+
+        Args:
+                headers (Mapping[str, str]): The HTTP headers of the 429 response.
+
+        Returns:
+                float: The number of seconds the limiter is blocked for.
+        """
+        delay = None
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+        if delay is None:
+            resets = [
+                parse_reset_duration(headers.get(name, ""))
+                for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+            ]
+            resets = [reset for reset in resets if reset is not None]
+            delay = max(resets) if resets else 1.0
+        self.requests.drain(delay)
+        self.tokens.drain(delay)
+        return delay
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """Return the process wide rate limiter for a model, creating it from the configured per-minute budgets on first use.
+
+    Args:
+            model (str): The model name the limiter applies to.
+
+    Returns:
+            RateLimiter: The shared limiter for the model.
+    """
+    with _limiters_lock:
+        if model not in _limiters:
+            settings = get_settings()
+            _limiters[model] = RateLimiter(
+                settings.requests_per_minute, settings.tokens_per_minute
+            )
+        return _limiters[model]
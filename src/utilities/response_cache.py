@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from settings import get_settings
+from utilities.cache import MemoryLRU
+
+
+def canonical_key(payload: Dict[str, Any]) -> str:
+    """Hash a request payload into a stable SHA-256 key, serialising it as canonical JSON so dict ordering and whitespace never change the key.
+
+    Args:
+            payload (Dict[str, Any]): The JSON-serialisable request fields identifying a response.
+
+    Returns:
+            str: The hex digest identifying the payload.
+    """
+    encoded = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    A size-bounded, content-addressed disk cache for LLM responses that evicts least recently used entries and optionally expires entries after a TTL, with an in-memory tier of recent entries in front of the disk and single-flight misses so concurrent identical requests make one API call.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".cache/responses/",
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        memory_entries: int = 1024,
+        memory_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        """Open the cache directory and rebuild the LRU index from file access times.
+
+        Args:
+                directory (str): The directory holding one file per cached response.
+                max_bytes (int): The total size of entries kept before the least recently used are evicted.
+                ttl (Optional[float]): Seconds after which an entry is treated as missing, or None to keep entries until evicted.
+                memory_entries (int): The most entries held in memory.
+                memory_bytes (int): The most pickled bytes held in memory.
+        """
+        self.memory = MemoryLRU(memory_entries, memory_bytes)
+        self._flights: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        entries = [
+            entry
+            for entry in os.scandir(directory)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self._index[entry.name] = size
+            self._bytes += size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a response, refreshing its recency on a hit and dropping it if it has outlived the TTL.
+
+        Args:
+                key (str): The canonical key of the request.
+
+        Returns:
+                Tuple[bool, Any]: Whether the key was found, and the cached value if so.
+        """
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return False, None
+            found, data = self.memory.get(key)
+            try:
+                if not found:
+                    with open(self._path(key), "rb") as file:
+                        data = file.read()
+                created, value = pickle.loads(data)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            if self.ttl is not None and time.time() - created > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            self._index.move_to_end(key)
+            if not found:
+                os.utime(self._path(key))
+                self.memory.record(disk_hit=True)
+                self.memory.put(key, data, len(data))
+            self.hits += 1
+            return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a response atomically and evict least recently used entries until the cache fits in max_bytes.
+
+        Args:
+                key (str): The canonical key of the request.
+                value (Any): The picklable response to store.
+
+        Returns:
+                None
+        """
+        data = pickle.dumps((time.time(), value))
+        with self._lock:
+            temp_path = self._path(f"{key}.{threading.get_ident()}.tmp")
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, self._path(key))
+            self.memory.put(key, data, len(data))
+            self._bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def join(self, key: str) -> Tuple[bool, asyncio.Future]:
+        """Join the computation of a missing key already in flight on the running event loop, or start one.
+
+        Args:
+                key (str): The canonical key of the request.
+
+        Returns:
+                Tuple[bool, asyncio.Future]: Whether the caller leads the computation and must pass its outcome to finish, and the future every caller awaits for the value.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._flights.get((id(loop), key))
+            if future is not None:
+                return False, future
+            future = loop.create_future()
+            self._flights[(id(loop), key)] = future
+            return True, future
+
+    def finish(
+        self, key: str, value: Any = None, error: Optional[BaseException] = None
+    ) -> None:
+        """End the computation a join call started, storing the value and handing it, or the error, to every caller that joined.
+
+        Args:
+                key (str): The canonical key of the request.
+                value (Any): The computed response, stored unless error is set.
+                error (Optional[BaseException]): The error the computation raised, if it failed.
+
+        Returns:
+                None
+        """
+        if error is None:
+            self.put(key, value)
+        with self._lock:
+            future = self._flights.pop((id(asyncio.get_running_loop()), key))
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+            future.exception()
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[bool, Any]:
+        """Answer a request from the cache, or from an identical request already in flight, or else compute and store it.
+
+        Args:
+                key (str): The canonical key of the request.
+                compute (Callable[[], Awaitable[Any]]): Makes the request on a miss.
+
+        Returns:
+                Tuple[bool, Any]: Whether the value came from the cache or another request, and the value.
+        """
+        hit, value = self.get(key)
+        if hit:
+            return True, value
+        leader, future = self.join(key)
+        if not leader:
+            return True, await asyncio.shield(future)
+        try:
+            value = await compute()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, value)
+        return False, value
+
+    def _remove(self, key: str) -> None:
+        self.memory.pop(key)
+        self._bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        """Report hit and miss counters along with the current footprint of the cache.
+
+        Returns:
+                Dict[str, float]: Hits, misses, hit ratio, evictions, entry count and bytes held.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "memory_hits": self.memory.hits,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process wide response cache, creating it from the configured size cap and TTL on first use.
+
+    Returns:
+            ResponseCache: The shared response cache.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            settings = get_settings()
+            _response_cache = ResponseCache(
+                max_bytes=settings.response_cache_max_bytes,
+                ttl=settings.response_cache_ttl,
+            )
+        return _response_cache
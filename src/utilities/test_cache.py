@@ -1,6 +1,15 @@
+import pickle
+import threading
+import time
 import pytest
 from datetime import datetime
-from utilities.cache import memoize
+from utilities.cache import (
+    KeyValueStore,
+    MemoryLRU,
+    SQLiteKeyValueStore,
+    memoize,
+    migrate_directory,
+)
 
 
 def test_memoize_side_effects():
@@ -19,3 +28,100 @@ def test_memoize_side_effects():
 
     assert len(side_effect_value) == 1
     assert result1 == result2
+    assert side_effect_function.stats()["hits"] == 1
+
+
+def test_memoize_returns_a_fresh_copy_to_each_caller():
+    @memoize
+    def make_list(arg):
+        return [arg]
+
+    arg = datetime.now().timestamp()
+    first = make_list(arg)
+    first.append("mutated")
+    assert make_list(arg) == [arg]
+    make_list(arg).append("mutated")
+    assert make_list(arg) == [arg]
+
+
+def test_memoize_single_flight():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    @memoize
+    def slow_function(arg):
+        calls.append(arg)
+        time.sleep(0.1)
+        return arg * 2
+
+    arg = datetime.now().timestamp()
+
+    def call():
+        barrier.wait()
+        return slow_function(arg)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert slow_function.stats()["misses"] == 1
+    assert slow_function.stats()["hits"] == 7
+
+
+def test_memory_lru_bounds_entries_and_bytes():
+    lru = MemoryLRU(max_entries=2, max_bytes=100)
+    lru.put("a", 1, 10)
+    lru.put("b", 2, 10)
+    lru.get("a")
+    lru.put("c", 3, 10)
+    assert lru.get("b") == (False, None)
+    lru.put("d", 4, 85)
+    assert lru.get("a") == (False, None)
+    assert lru.stats()["bytes"] == 95
+    lru.put("e", 5, 101)
+    assert lru.get("e") == (False, None)
+
+
+def test_sqlite_store_round_trips_and_batches(tmp_path):
+    store = SQLiteKeyValueStore(str(tmp_path / "cache.sqlite3"), batch_size=2)
+    with pytest.raises(FileNotFoundError):
+        store.read("missing")
+    store.write("a", {"value": 1})
+    assert store.read("a") == {"value": 1}
+    other = SQLiteKeyValueStore(str(tmp_path / "cache.sqlite3"))
+    with pytest.raises(FileNotFoundError):
+        other.read("a")
+    store.write("b", [2])
+    assert other.read("a") == {"value": 1}
+    assert other.read("b") == [2]
+
+
+def test_sqlite_store_concurrent_writers(tmp_path):
+    store = SQLiteKeyValueStore(str(tmp_path / "cache.sqlite3"), batch_size=7)
+
+    def work(worker):
+        for i in range(50):
+            store.write(f"{worker}-{i}", i)
+            assert store.read(f"{worker}-{i}") == i
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+    reader = SQLiteKeyValueStore(str(tmp_path / "cache.sqlite3"))
+    assert all(reader.read(f"{w}-49") == 49 for w in range(10))
+
+
+def test_migrate_directory_imports_pickle_files(tmp_path):
+    legacy = KeyValueStore()
+    source = tmp_path / "legacy"
+    source.mkdir()
+    (source / legacy._hash_key("issue-1")).write_bytes(pickle.dumps("state"))
+    (source / "responses").mkdir()
+    store = SQLiteKeyValueStore(str(tmp_path / "cache.sqlite3"))
+    assert migrate_directory(store, str(source)) == 1
+    assert store.read("issue-1") == "state"
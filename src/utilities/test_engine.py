@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from benchmarks.mock_openai import MockOpenAIServer
+from tracing.trace import Trace, bind_trace, get_trace
+from utilities.engine import RequestEngine
+
+
+@pytest.fixture
+def engine():
+    instance = RequestEngine(4, api_key="test")
+    yield instance
+    instance.close()
+
+
+def test_run_returns_coroutine_result(engine):
+    async def add(x, y):
+        await asyncio.sleep(0)
+        return x + y
+
+    assert engine.run(add(2, 3)) == 5
+
+
+def test_run_carries_caller_trace(engine):
+    trace_instance = Trace("")
+    bind_trace(trace_instance)
+
+    async def current_trace():
+        return get_trace()
+
+    assert engine.run(current_trace()) is trace_instance
+
+
+def test_completions_share_pooled_client():
+    with MockOpenAIServer(latency=0.2) as server:
+        engine = RequestEngine(8, api_key="test", base_url=server.base_url)
+        try:
+
+            async def complete_many():
+                return await asyncio.gather(
+                    *[
+                        engine.client.chat.completions.create(
+                            model="mock", messages=[{"role": "user", "content": "hi"}]
+                        )
+                        for _ in range(8)
+                    ]
+                )
+
+            completions = engine.run(complete_many())
+        finally:
+            engine.close()
+    assert [c.choices[0].message.content for c in completions] == ["ok"] * 8
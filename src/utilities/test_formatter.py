@@ -0,0 +1,67 @@
+import black
+import pytest
+from black import FileMode
+from utilities import formatter
+from utilities.formatter import FormattingService
+
+
+def test_formatted_code_and_repeated_inputs_skip_black(monkeypatch):
+    calls = []
+    format_str = formatter.format_str
+
+    def counting_format_str(code, mode):
+        calls.append(code)
+        return format_str(code, mode=mode)
+
+    monkeypatch.setattr(formatter, "format_str", counting_format_str)
+    service = FormattingService(max_bytes=10**6)
+    assert service.format("x = {'a':1}") == 'x = {"a": 1}\n'
+    assert service.format("x = {'a':1}") == 'x = {"a": 1}\n'
+    assert service.format('x = {"a": 1}\n') == 'x = {"a": 1}\n'
+    assert len(calls) == 1
+    assert service.format("x = {'a':1}", FileMode(string_normalization=False)) == (
+        "x = {'a': 1}\n"
+    )
+    assert len(calls) == 2
+    assert service.stats()["hits"] == 2
+    assert service.stats()["misses"] == 2
+    with pytest.raises(black.InvalidInput):
+        service.format("x = = 1")
+
+
+def test_cache_is_bounded_by_entries():
+    service = FormattingService(max_bytes=10**6, max_entries=2)
+    for name in "abc":
+        service.format(f"{name}=1")
+    assert service.stats()["entries"] == 2
+
+
+def test_worker_process_formats_code():
+    service = FormattingService(max_bytes=10**6, worker=True)
+    try:
+        assert service.format("def f( a ):\n  return a") == (
+            "def f(a):\n    return a\n"
+        )
+    finally:
+        service.close()
+
+
+def test_dead_worker_is_restarted_once_then_formatting_runs_in_process():
+    service = FormattingService(max_bytes=10**6, worker=True)
+
+    def kill_worker():
+        for process in list(service._executor._processes.values()):
+            process.kill()
+            process.join()
+
+    try:
+        first = service._executor
+        kill_worker()
+        assert service.format("a = ( 1 )") == "a = 1\n"
+        assert service._executor not in (None, first)
+        kill_worker()
+        assert service.format("b = ( 1 )") == "b = 1\n"
+        assert service._executor is None
+        assert service.format("c = ( 1 )") == "c = 1\n"
+    finally:
+        service.close()
@@ -0,0 +1,42 @@
+import numpy as np
+from utilities.ivf import IVFVectorStore, spherical_kmeans
+from utilities.minicos import VectorStore, normalize
+
+
+def clustered(rng, rows):
+    centres = rng.standard_normal((20, 16)) * 3
+    return centres[rng.integers(0, 20, rows)] + rng.standard_normal((rows, 16))
+
+
+def test_spherical_kmeans_returns_unit_centroids():
+    rng = np.random.default_rng(0)
+    vectors = normalize(clustered(rng, 500))
+    centroids = spherical_kmeans(vectors, 8, 5, rng)
+    assert centroids.shape == (8, 16)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1, atol=1e-5)
+
+
+def test_probing_every_list_is_exact_and_adds_after_training_are_found():
+    rng = np.random.default_rng(1)
+    keys = clustered(rng, 2000)
+    values = [str(i) for i in range(2000)]
+    exact = VectorStore()
+    exact.add_entries(keys, values)
+    ann = IVFVectorStore(n_lists=16, n_probe=16, min_train=100)
+    ann.add_entries(keys[:1500], values[:1500])
+    queries = rng.standard_normal((10, 16))
+    ann.search_many(queries, 1)
+    ann.add_entries(keys[1500:], values[1500:])
+    assert ann.search_many(queries, 5) == exact.search_many(queries, 5)
+    ann.n_probe = 4
+    found = ann.search_many(queries, 5)
+    wanted = exact.search_many(queries, 5)
+    recall = np.mean([len(set(f) & set(w)) / 5 for f, w in zip(found, wanted)])
+    assert recall >= 0.8
+
+
+def test_small_stores_search_exactly_without_training():
+    ann = IVFVectorStore()
+    ann.add_entries(np.eye(3), ["x", "y", "z"])
+    assert ann.search(np.array([0.0, 1.0, 0.1]), 2) == ["y", "z"]
+    assert ann.centroids is None
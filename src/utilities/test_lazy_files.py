@@ -0,0 +1,45 @@
+import os
+from commands.state import State
+from utilities.lazy_files import LazyFileMap
+from utils import synchronize_files_read, synchronize_files_write
+
+
+def make_directory(tmp_path) -> list:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('hi')\n")
+    (tmp_path / "src" / "util.py").write_text("x = 1\r\ny = 2\n")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0")
+    (tmp_path / "data.csv").write_text("a,b\n" * 1000)
+    return ["src/main.py", "src/util.py", "image.png", "data.csv", "missing.txt"]
+
+
+def test_lazy_map_reads_on_first_access(tmp_path):
+    files = LazyFileMap(str(tmp_path), make_directory(tmp_path), max_bytes=1000)
+    assert sorted(files) == ["src/main.py", "src/util.py"]
+    assert sorted(files.skipped) == ["data.csv", "image.png"]
+    assert files.materialized() == set()
+    assert files["src/util.py"] == "x = 1\ny = 2\n"
+    assert files.materialized() == {"src/util.py"}
+    assert "image.png" not in files
+
+
+def test_sync_after_a_command_reads_only_files_changed_on_disk(tmp_path):
+    files = LazyFileMap(str(tmp_path), make_directory(tmp_path), max_bytes=1000)
+    state = State(files)
+    (tmp_path / "src" / "util.py").write_text("x = 3\n")
+    synchronize_files_read(str(tmp_path), state.original_files, state.files)
+    assert files.materialized() == {"src/util.py"}
+    assert state.files["src/util.py"] == "x = 3\n"
+
+
+def test_only_modified_files_are_written_back(tmp_path):
+    files = LazyFileMap(str(tmp_path), make_directory(tmp_path), max_bytes=1000)
+    state = State(files)
+    state.files["src/main.py"] = "print('bye')\n"
+    state.files["src/new.py"] = "new = True\n"
+    del state.files["src/util.py"]
+    synchronize_files_write(str(tmp_path), files, state.files)
+    assert files.materialized() == {"src/main.py"}
+    assert (tmp_path / "src" / "main.py").read_text() == "print('bye')\n"
+    assert (tmp_path / "src" / "new.py").read_text() == "new = True\n"
+    assert not os.path.exists(tmp_path / "src" / "util.py")
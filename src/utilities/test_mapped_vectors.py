@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+from utilities import mapped_vectors
+from utilities.mapped_vectors import MappedVectorStore, content_hash
+from utilities.minicos import VectorStore
+
+
+def test_content_hash_matches_git_blob_sha():
+    assert content_hash("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+def test_search_matches_in_memory_store_and_persists(tmp_path):
+    rng = np.random.default_rng(0)
+    keys = rng.standard_normal((30, 8))
+    values = [f"value {i}" for i in range(30)]
+    store = MappedVectorStore(str(tmp_path), 8)
+    store.add_entries(keys[:10], values[:10])
+    for key, value in zip(keys[10:], values[10:]):
+        store.add_entry(key, value)
+    memory = VectorStore()
+    memory.add_entries(keys, values)
+    query = rng.standard_normal(8)
+    assert store.search(query, 5) == memory.search(query, 5)
+    reopened = MappedVectorStore(str(tmp_path))
+    assert len(reopened) == 30
+    assert reopened.search_many(query[np.newaxis], 5) == [memory.search(query, 5)]
+    with pytest.raises(ValueError):
+        MappedVectorStore(str(tmp_path), 4)
+
+
+def test_remove_and_compact_are_seen_by_other_readers(tmp_path):
+    writer = MappedVectorStore(str(tmp_path), 2, "float16")
+    reader = MappedVectorStore(str(tmp_path))
+    writer.add_entries(np.eye(2), ["x", "y"])
+    writer.add_entry(np.array([1.0, 1.0]), "xy")
+    assert reader.search(np.array([0.0, 1.0]), 1) == ["y"]
+    writer.remove([content_hash("y")])
+    assert reader.search(np.array([0.0, 1.0]), 3) == ["xy", "x"]
+    assert not reader.contains(content_hash("y"))
+    assert writer.compact() == 1
+    assert reader.search(np.array([0.0, 1.0]), 3) == ["xy", "x"]
+    assert sorted(reader.hashes()) == sorted([content_hash("x"), content_hash("xy")])
+
+
+def test_failed_compact_leaves_rows_and_file_paired(tmp_path, monkeypatch):
+    store = MappedVectorStore(str(tmp_path), 2)
+    reader = MappedVectorStore(str(tmp_path))
+    store.add_entries(np.eye(2), ["x", "y"])
+    store.remove([content_hash("x")])
+
+    def crash(descriptor):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mapped_vectors.os, "fsync", crash)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+    assert reader.search(np.array([0.0, 1.0]), 1) == ["y"]
+    assert store.compact() == 1
+    assert reader.search(np.array([0.0, 1.0]), 1) == ["y"]
+    assert reader.search(np.array([1.0, 0.0]), 2) == ["y"]
+    store.add_entry(np.array([1.0, 0.0]), "z")
+    assert store.compact() == 0
+    assert sorted(
+        name for name in os.listdir(tmp_path) if name.startswith("vectors")
+    ) == ["vectors.1.bin", "vectors.2.bin"]
+    assert reader.search(np.array([1.0, 0.0]), 1) == ["z"]
+
+
+def test_threads_share_one_store(tmp_path):
+    store = MappedVectorStore(str(tmp_path), 4)
+    rng = np.random.default_rng(0)
+
+    def add(thread):
+        for i in range(20):
+            store.add_entry(rng.standard_normal(4), f"{thread}-{i}")
+            store.search(rng.standard_normal(4), 3)
+            if i % 5 == 0:
+                store.remove([content_hash(f"{thread}-{i}")])
+                store.compact()
+
+    threads = [threading.Thread(target=add, args=(thread,)) for thread in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 4 * 16
+    assert len(MappedVectorStore(str(tmp_path)).search(np.ones(4), 100)) == 64
+
+
+def test_marked_empty_hashes_are_indexed_until_removed(tmp_path):
+    store = MappedVectorStore(str(tmp_path), 2)
+    store.add_entries(np.eye(2), ["x", "y"], ["a:x.py", "a:y.py"])
+    store.mark_empty(["b:empty.py"])
+    assert store.contains("b:empty.py")
+    assert sorted(store.hashes()) == ["a:x.py", "a:y.py", "b:empty.py"]
+    assert len(store) == 2
+    assert store.entries("a:", prefix=True)[1] == ["x", "y"]
+    store.remove(["b:empty.py"])
+    assert not store.contains("b:empty.py")
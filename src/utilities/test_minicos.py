@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from utilities.minicos import VectorStore, cosine_similarity
+
+
+def test_search_matches_pairwise_cosine_ranking():
+    rng = np.random.default_rng(1)
+    keys = rng.standard_normal((50, 8))
+    store = VectorStore(capacity=2)
+    for i, key in enumerate(keys):
+        store.add_entry(key, str(i))
+    query = rng.standard_normal(8)
+    expected = sorted(range(50), key=lambda i: -cosine_similarity(query, keys[i]))
+    assert store.search(query, 5) == [str(i) for i in expected[:5]]
+    assert store.search(query, 100) == [str(i) for i in expected]
+    assert store.matrix.shape[0] == 64
+
+
+def test_search_many_matches_search():
+    rng = np.random.default_rng(2)
+    store = VectorStore()
+    store.add_entries(rng.standard_normal((20, 4)), [str(i) for i in range(20)])
+    queries = rng.standard_normal((3, 4))
+    assert store.search_many(queries, 3) == [store.search(q, 3) for q in queries]
+
+
+def test_empty_store_and_dimension_mismatch():
+    store = VectorStore()
+    assert store.search(np.ones(3), 2) == []
+    store.add_entry(np.zeros(3), "zero")
+    assert store.search(np.ones(3), 2) == ["zero"]
+    with pytest.raises(ValueError):
+        store.add_entry(np.ones(4), "wrong")
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_compact_storage_with_rerank_matches_float32(storage, tmp_path):
+    rng = np.random.default_rng(3)
+    keys = rng.standard_normal((200, 32))
+    values = [str(i) for i in range(200)]
+    exact = VectorStore()
+    exact.add_entries(keys, values)
+    compact = VectorStore(storage=storage, exact_path=str(tmp_path / "exact"))
+    for start in range(0, 200, 50):
+        compact.add_entries(keys[start : start + 50], values[start : start + 50])
+    queries = rng.standard_normal((5, 32))
+    assert compact.search_many(queries, 5) == exact.search_many(queries, 5)
+    assert compact.nbytes < exact.nbytes
@@ -0,0 +1,78 @@
+import pytest
+from commands import state as state_module
+from commands.state import State
+from utilities.overlay import FileOverlay
+
+BASE = {"a.py": "a = 1\n", "b.py": "b = 2\n", "c.py": "c = 3\n"}
+
+
+def test_overlay_reads_through_and_records_changes():
+    base = dict(BASE)
+    overlay = FileOverlay(base)
+    overlay["a.py"] = "a = 10\n"
+    overlay["d.py"] = "d = 4\n"
+    del overlay["b.py"]
+    overlay["c.py"] = "c = 3\n"
+    assert base == BASE
+    assert dict(overlay) == {"a.py": "a = 10\n", "c.py": "c = 3\n", "d.py": "d = 4\n"}
+    assert len(overlay) == 3
+    assert "b.py" not in overlay
+    assert overlay.changed_files() == ["a.py", "b.py", "d.py"]
+    with pytest.raises(KeyError):
+        del overlay["b.py"]
+    del overlay["d.py"]
+    assert "d.py" not in overlay.delta
+
+
+def test_overlay_diff():
+    overlay = FileOverlay(BASE)
+    overlay["a.py"] = "a = 10\n"
+    del overlay["b.py"]
+    assert overlay.diff() == (
+        "--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n-a = 1\n+a = 10\n"
+        "--- a/b.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-b = 2\n"
+    )
+
+
+def test_state_shares_contents_and_keeps_a_small_delta():
+    files = dict(BASE)
+    state = State(files)
+    assert state.files["a.py"] is files["a.py"]
+    state.files["a.py"] = "changed\n"
+    state.files = {**state.files, "e.py": "e\n"}
+    assert files == BASE
+    assert state.original_files["a.py"] == BASE["a.py"]
+    assert set(state.files.delta) == {"a.py", "e.py"}
+    assert state.changed_files() == ["a.py", "e.py"]
+    check = State(state.files)
+    state.files["b.py"] = "later\n"
+    assert check.files["b.py"] == BASE["b.py"]
+    assert check.files["a.py"] == "changed\n"
+    assert check.changed_files() == []
+
+
+def test_render_information_reuses_unchanged_files(monkeypatch):
+    calls = []
+    annotate = state_module.annotate_with_line_numbers
+
+    def counting_annotate(content, start=1):
+        calls.append(content)
+        return annotate(content, start)
+
+    monkeypatch.setattr(state_module, "annotate_with_line_numbers", counting_annotate)
+    state = State({"a.py": "a = 1\n", "b.py": "b = 2\n"})
+    state.add_file("a.py")
+    state.add_file("b.py")
+    first = state.render_information()
+    assert "*** a.py ***\n1: a = 1" in first
+    assert state.render_information() is first
+    assert len(calls) == 2
+    state.files["b.py"] = "b = 3\n"
+    second = state.render_information()
+    assert "2: " not in second and "1: b = 3" in second
+    assert len(calls) == 3
+    state.information["a.py:1-1"] = "1: a = 1"
+    assert state.render_information().endswith("*** a.py:1-1 ***\n1: a = 1")
+    state.files = {"a.py": "a = 2\n", "b.py": state.files["b.py"]}
+    assert "1: a = 2" in state.render_information()
+    assert len(calls) == 4
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+from utilities.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    parse_reset_duration,
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m3.5s", 3723.5), ("", None)],
+)
+def test_parse_reset_duration(value, expected):
+    assert parse_reset_duration(value) == pytest.approx(expected)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 400) == 101
+
+
+def test_bucket_wait_time_reflects_refill_rate():
+    bucket = TokenBucket(60, period=60)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_bucket_caps_oversized_requests_at_capacity():
+    bucket = TokenBucket(10, period=60)
+    assert bucket.wait_time(100) == 0.0
+
+
+def test_acquire_paces_requests_to_sustained_rate():
+    limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=10**9)
+    limiter.requests.level = 0
+
+    async def acquire_many():
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire(1) for _ in range(4)])
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(acquire_many())
+    assert 0.15 <= elapsed < 1.0
+
+
+def test_update_from_headers_adopts_server_budget():
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=30000)
+    limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "10000",
+            "x-ratelimit-remaining-requests": "9999",
+            "x-ratelimit-limit-tokens": "800000",
+            "x-ratelimit-remaining-tokens": "1000",
+        }
+    )
+    assert limiter.requests.capacity == 10000
+    assert limiter.tokens.capacity == 800000
+    assert limiter.tokens.level <= 1000
+
+
+def test_back_off_honours_retry_after():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60000)
+    assert limiter.back_off({"retry-after": "2"}) == 2.0
+    assert limiter.requests.wait_time(1) == pytest.approx(3.0, abs=0.05)
+    assert limiter.back_off({"x-ratelimit-reset-tokens": "1m30s"}) == 90.0
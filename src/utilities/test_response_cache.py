@@ -0,0 +1,73 @@
+import asyncio
+import time
+from utilities.response_cache import ResponseCache, canonical_key
+
+
+def test_canonical_key_ignores_dict_ordering():
+    first = canonical_key(
+        {"model": "m", "messages": [{"role": "user", "content": "x"}]}
+    )
+    second = canonical_key(
+        {"messages": [{"content": "x", "role": "user"}], "model": "m"}
+    )
+    assert first == second
+    assert first != canonical_key({"model": "m", "messages": []})
+
+
+def test_get_and_put_count_hits_and_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("a") == (False, None)
+    cache.put("a", {"answer": 42})
+    assert cache.get("a") == (True, {"answer": 42})
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert ResponseCache(str(tmp_path)).get("a") == (True, {"answer": 42})
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 100)
+    cache.get("a")
+    cache.max_bytes = cache.stats()["bytes"] - 1
+    cache.put("c", "z")
+    assert cache.get("b") == (False, None)
+    assert cache.get("a")[0] and cache.get("c")[0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=0.05)
+    cache.put("a", "value")
+    assert cache.get("a") == (True, "value")
+    time.sleep(0.1)
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_tier_returns_fresh_copies(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("a", ["value"])
+    cache.get("a")[1].append("mutated")
+    assert cache.get("a") == (True, ["value"])
+    assert cache.stats()["memory_hits"] == 2
+
+
+def test_concurrent_identical_misses_compute_once(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def both():
+        return await asyncio.gather(
+            cache.get_or_compute("a", compute), cache.get_or_compute("a", compute)
+        )
+
+    assert asyncio.run(both()) == [(False, "value"), (True, "value")]
+    assert len(calls) == 1
+    assert cache.get("a") == (True, "value")
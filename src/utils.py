@@ -1,10 +1,12 @@
 import os
 import threading
-from black import FileMode, format_str
 from typing import Callable, Any
 from queue import Queue
 from time import sleep
 from functools import wraps
+from utilities.formatter import get_formatter
+from utilities.lazy_files import LazyFileMap
+from utilities.overlay import FileOverlay
 
 
 class TimeoutException(Exception):
@@ -79,22 +81,22 @@ def replace_spaces_with_tabs(content: str) -> str:
     )
 
 
-def annotate_with_line_numbers(content: str) -> str:
+def annotate_with_line_numbers(content: str, start: int = 1) -> str:
     """
-    Annotate a file content with line numbers.
+    Annotate a file content with line numbers, counting from start so an excerpt keeps the numbering of its file.
     Now handles empty content, and returns '1: <blank line>'.
     """
     if not content:
-        return "1: <blank line>"
+        return f"{start}: <blank line>"
     annotated_lines = [
-        f"{i + 1}: {line}" for i, line in enumerate(content.splitlines())
+        f"{i + start}: {line}" for i, line in enumerate(content.splitlines())
     ]
     return "\n".join(annotated_lines)
 
 
 def format_python_code(code: str) -> str:
-    formatted_code = format_str(code, mode=FileMode())
-    return formatted_code
+    """Formats Python code with black through the shared formatting service, which skips code it has already formatted."""
+    return get_formatter().format(code)
 
 
 def list_files(files):
@@ -104,10 +106,23 @@ def list_files(files):
     return file_info
 
 
+def changed_files(old_files, updated_files) -> list:
+    """
+    Lists the files added, modified or deleted between two file maps, asking a copy-on-write overlay for its delta so unread files of a lazy map stay unread.
+    """
+    if isinstance(updated_files, FileOverlay) and updated_files.base is old_files:
+        return updated_files.changed_files()
+    changed = [
+        k for k, v in updated_files.items() if k not in old_files or old_files[k] != v
+    ]
+    return changed + [k for k in old_files if k not in updated_files]
+
+
 def synchronize_files_write(target_dir, old_files, updated_files):
-    """Writes the contents of updated_files to disk and removes files that no longer exist."""
-    for k, v in updated_files.items():
-        write_file(os.path.join(target_dir, k), v)
+    """Writes the files of updated_files that were added or modified to disk and removes files that no longer exist."""
+    for k in changed_files(old_files, updated_files):
+        if k in updated_files:
+            write_file(os.path.join(target_dir, k), updated_files[k])
     deleted_files = [f for f in old_files.keys() if f not in updated_files]
     for f in deleted_files:
         os.remove(os.path.join(target_dir, f))
@@ -116,18 +131,27 @@ def synchronize_files_write(target_dir, old_files, updated_files):
 def synchronize_files_read(target_dir, old_files, updated_files):
     """
     Copies file contents from the disk into updated_files. Removes entries from updated_files if they no longer exist on disk.
-    This does not add new files that have been added to the disk.
+    This does not add new files that have been added to the disk. Files of a lazy map that updated_files has not changed are only read when their size or modification time differs from when they were listed.
     """
+    base = updated_files.base if isinstance(updated_files, FileOverlay) else None
     for root, dirs, files in os.walk(target_dir):
         for file_name_on_disk in files:
             relative_path = os.path.relpath(
                 os.path.join(root, file_name_on_disk), target_dir
             )
+            if (
+                isinstance(base, LazyFileMap)
+                and relative_path not in updated_files.delta
+                and base.unchanged_on_disk(relative_path)
+            ):
+                continue
             if relative_path in updated_files:
                 with open(
                     os.path.join(root, file_name_on_disk), "r", encoding="utf-8"
                 ) as file:
-                    updated_files[relative_path] = file.read()
+                    content = file.read()
+                if updated_files[relative_path] != content:
+                    updated_files[relative_path] = content
     files_not_found = set(old_files.keys()) - set(updated_files.keys())
     for file_name in files_not_found:
         updated_files.pop(file_name, None)